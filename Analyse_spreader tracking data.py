@@ -1,95 +1,103 @@
 import sys
-import matplotlib.pyplot as plt
-from matplotlib.ticker import ScalarFormatter
 import pandas as pd
-import tkinter as tk
-from tkinter import filedialog
-from tkinter import messagebox
 import os
+import argparse
+import multiprocessing
+import functools
 
 # Append path to the parser module
 sys.path.append('/C:/Users/henttju/Python scripts/TLMS log analysis/TLMS SprTrack parse')
 import SprTrc_parser as stp # Import the parser module
+import SprTrc_columnar # Columnar typed parse results
+import SprTrc_cache # Persistent parse cache
+import SprTrc_settling # Settling height constants and batch analysis
+import SprTrc_dataset # Parquet and Feather output
+import SprTrc_render # Off-screen plot rendering
+import SprTrc_catalog # File catalog of the log directories
+import SprTrc_profile # Stage timers and counters of the run
 
 
 # Analyse spreader tracking data
-def main():
-    # Ask for the root directory of the log files
-    # Ask if the user wants to define log files from an excel file
-
-    if prompt_use_excel():
-        excel_file = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx *.xls")])
-        if excel_file:
-            df_excel = pd.read_excel(excel_file)
-            log_files = df_excel['filename'].tolist()
-            log_root = os.path.dirname(excel_file)
+# log_files: files to analyse, asked with dialogs when None
+# output_file: analysis result workbook (or .parquet/.feather table), Spreader_tracking_analysis.xlsx in the working directory by default
+# workers > 1 parses and analyses the files in a process pool of that size, without per-file plot windows
+# cache: optional SprTrc_cache.ParseCache to reuse the parse results of unchanged files
+# plots: show the settling height plot of every file
+# plot_dir: save the settling height plot of every file to this directory instead, also with workers > 1
+# plot_format: 'png' or 'svg', max_plot_points: decimate longer plotted series to about this many points
+# catalog: optional SprTrc_catalog.LogCatalog of the log root selected with the dialog
+def main(log_files=None, output_file=None, workers=1, chunksize=8, cache=None, plots=True, plot_dir=None, plot_format='png', max_plot_points=None, catalog=None):
+    if log_files is None:
+        from tkinter import filedialog
+
+        # Ask for the root directory of the log files
+        # Ask if the user wants to define log files from an excel file
+
+        if prompt_use_excel():
+            excel_file = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx *.xls")])
+            if excel_file:
+                df_excel = pd.read_excel(excel_file)
+                log_files = df_excel['filename'].tolist()
+                log_root = os.path.dirname(excel_file)
+            else:
+                print("No excel file selected. Exiting.")
+                return
         else:
-            print("No excel file selected. Exiting.")
-            return
-    else:
-        log_root = filedialog.askdirectory()
-        if not log_root:
-            print("No directory selected. Exiting.")
-            return
+            log_root = filedialog.askdirectory()
+            if not log_root:
+                print("No directory selected. Exiting.")
+                return
 
-        # Collect MeasureResult files under log root
-        log_files = collect_measure_result_files(log_root)
+            # Collect MeasureResult files under log root
+            log_files = collect_measure_result_files(log_root, catalog)
     print("Found {} MeasureResult files.".format(len(log_files)))
 
-    # define the analysed log dataframe
-    df_processed_logs = pd.DataFrame()
+    # define the analysed log records, the dataframe is built once after the loop
+    processed_logs = AnalysisAccumulator()
 
     # Parse and analyse the MeasureResult files
 
-    print("\n") # Print a newline for better readability
-    for log_file in log_files:
-        # Initialize the analysis data structure
-        df_current_analysis = initialize_analysis_data_structure()
-
-        # Echo a progress counter of current file index / total file amount
-        print("\033[F", end="") # Move cursor up one line
-        print("Parsing and analysing file {} / {}...".format(log_files.index(log_file) + 1, len(log_files))) # Print the progress counter
-
-        # =================== Data extraction ===================                                                                               
-        # Extract log file name and enter it to the current analysis DataFrame
-        log_file_name = os.path.basename(log_file) # Extract the log file name
-        df_current_analysis.loc[0, 'log_file_name'] = log_file_name # Enter the log file name to the DataFrame
-        
-        # Parse the log file and convert the log data to a pandas DataFrame
-        log_data = stp.parse_log_file(log_file) # Parse the log file
-        df_log_data = pd.DataFrame.from_dict(log_data).ffill(axis=0).infer_objects() # Convert the log data to a pandas DataFrame, fill NaN values, and infer objects
-
-        # Extract the timestamp of the log file and enter it to the DataFrame
-        df_current_analysis.loc[0, 'log_file_timestamp'] = df_log_data.iloc[0]['Timestamp'] # Extract the timestamp of the log file from the first row
-
-        # Extract job pre info from the log file
-        extract_job_info(df_current_analysis, df_log_data)
-        # ====================================================
-
-        # =================== Data analysis ===================
-        # Find the first valid row of 'SpTrMsg_Skew'
-        if False:
-            extract_first_valid_spreader_data(df_current_analysis, df_log_data)
-
-        # Detremine the settling time before final landing
-        df_settling_height_range, settling_time = calculate_settling_range(df_log_data, use_slope=False) # Calculate the settling time before final landing
-        df_current_analysis.loc[0, 'SpTr_settling_time'] = settling_time # Enter the settling time to the DataFrame
-
-        # Plot the spreader x, y and skew position over time at the settling height range
-        plot_settling_height_data(df_log_data, df_settling_height_range)
+    if plot_dir is not None:
+        os.makedirs(plot_dir, exist_ok=True)
+    plot_options = {'plot_dir': plot_dir, 'plot_format': plot_format, 'max_plot_points': max_plot_points}
 
-        # ====================================================
-
-        # =================== Data aggregation ===================
-        # Append the first valid row to the analysed log dataframe
-        df_processed_logs = pd.concat([df_processed_logs, df_current_analysis], ignore_index=True)
-        # ====================================================
-
-        # Move cursor up to print progress counter on the same line
+    print("\n") # Print a newline for better readability
+    if workers > 1:
+        # Parallel batch mode, plots only as image files
+        processed_logs = analyse_log_files_parallel(log_files, workers, chunksize, cache, **plot_options)
+    else:
+        for file_index, log_file in enumerate(log_files):
+            # Echo a progress counter of current file index / total file amount
+            print("\033[F", end="") # Move cursor up one line
+            print("Parsing and analysing file {} / {}...".format(file_index + 1, len(log_files))) # Print the progress counter
+
+            # One analysis record per measurement cycle of the file
+            with SprTrc_profile.file_profile(log_file):
+                try:
+                    for current_analysis, df_log_data, df_settling_height_range in analyse_log_file_cycles(log_file, cache):
+                        # Plot the spreader x, y and skew position over time at the settling height range
+                        with SprTrc_profile.stage('plot'):
+                            if plot_dir is not None:
+                                save_settling_height_plot(current_analysis, log_file, df_log_data, df_settling_height_range, **plot_options)
+                            elif plots:
+                                plot_settling_height_data(df_log_data, df_settling_height_range)
+
+                        # =================== Data aggregation ===================
+                        # Append the analysis record to the analysed log records
+                        processed_logs.append(current_analysis)
+                        # ====================================================
+                except Exception as error:
+                    processed_logs.append(analysis_error_row(log_file, error))
+
+            # Move cursor up to print progress counter on the same line
+
+    df_processed_logs = processed_logs.to_dataframe()
 
     # Save the analysed log data to an excel file
-    output_file = os.path.join(os.getcwd(), "Spreader_tracking_analysis.xlsx")
-    df_processed_logs.to_excel(output_file, index=False)
+    if output_file is None:
+        output_file = os.path.join(os.getcwd(), "Spreader_tracking_analysis.xlsx")
+    with SprTrc_profile.stage('write_output'):
+        SprTrc_dataset.write_table(df_processed_logs, output_file)
     print("Analysed data saved to {}.".format(output_file))
 
     # =================== Plots ===================
@@ -100,19 +108,138 @@ def main():
 
     return None
 
+# Parse and analyse the first measurement of a MeasureResult file
+# Returns the analysis record, the parsed log data and the settling height range
+def analyse_log_file(log_file, cache=None):
+    return next(analyse_log_file_cycles(log_file, cache))
+
+# Parse and analyse a MeasureResult file one measurement cycle at a time
+# Yields the analysis record, the parsed log data and the settling height range of every cycle
+def analyse_log_file_cycles(log_file, cache=None):
+    if cache is not None:
+        df_log_data = cache.parse_log_file_columnar(log_file) # Parse the log file
+        for cycle_id, df_cycle in df_log_data.groupby('Cycle_ID', sort=False, dropna=False):
+            yield analyse_log_data(log_file, df_cycle.reset_index(drop=True))
+    else:
+        # The parser also indexes the measurement cycles, the analysis goes to their rows directly
+        cycle_index = stp.CycleIndex(SprTrc_settling.settling_z_bands)
+        for cycle_id, df_cycle in SprTrc_profile.timed_iter('parse', SprTrc_columnar.iter_log_file_cycles(log_file, cycle_index)):
+            cycle = cycle_index.local_cycle(cycle_id) if cycle_id is not None else None
+            yield analyse_log_data(log_file, df_cycle, cycle)
+
+# Analyse the parsed data of one measurement cycle of a log file
+# cycle: optional cycle of the stp.CycleIndex of the parser, with offsets into df_log_data
+def analyse_log_data(log_file, df_log_data, cycle=None):
+    # Initialize the analysis data structure
+    current_analysis = initialize_analysis_data_structure()
+
+    # =================== Data extraction ===================                                                                               
+    # Extract log file name and enter it to the current analysis record
+    log_file_name = os.path.basename(log_file) # Extract the log file name
+    current_analysis['log_file_name'] = log_file_name # Enter the log file name to the analysis record
+    
+    with SprTrc_profile.stage('ffill'):
+        df_log_data = df_log_data.ffill(axis=0) # Fill NaN values
+    current_analysis['Cycle_ID'] = int(df_log_data.iloc[0]['Cycle_ID']) if pd.notnull(df_log_data.iloc[0]['Cycle_ID']) else None # Measurement cycle of the file
+
+    # Extract the timestamp of the log file and enter it to the analysis record
+    current_analysis['log_file_timestamp'] = df_log_data.iloc[0]['Timestamp'] # Extract the timestamp of the log file from the first row
+
+    # Extract job pre info from the log file
+    with SprTrc_profile.stage('job_info'):
+        extract_job_info(current_analysis, df_log_data)
+    # ====================================================
+
+    # =================== Data analysis ===================
+    # Find the first valid row of 'SpTrMsg_Skew'
+    if False:
+        extract_first_valid_spreader_data(current_analysis, df_log_data, cycle)
+
+    # Detremine the settling time before final landing
+    with SprTrc_profile.stage('settling'):
+        df_settling_height_range, settling_time = calculate_settling_range(df_log_data, use_slope=False, cycle=cycle) # Calculate the settling time before final landing
+    current_analysis['SpTr_settling_time'] = settling_time # Enter the settling time to the analysis record
+    # ====================================================
+
+    return current_analysis, df_log_data, df_settling_height_range
+
+# Analysis record of a file that could not be parsed or analysed
+def analysis_error_row(log_file, error):
+    current_analysis = initialize_analysis_data_structure()
+    current_analysis['log_file_name'] = os.path.basename(log_file)
+    current_analysis['error'] = "{}: {}".format(type(error).__name__, error)
+    return current_analysis
+
+# Render the settling height plot of a file to an image file in plot_dir
+# A failed plot is recorded in the analysis record, the analysis values are kept
+def save_settling_height_plot(current_analysis, log_file, df_log_data, df_settling_height_range, plot_dir, plot_format='png', max_plot_points=None):
+    try:
+        task, lane, position = extract_task_lane_position(df_settling_height_range)
+        figure = SprTrc_render.get_figure(SprTrc_render.SettlingHeightFigure, max_plot_points)
+        figure.render(filter_spreader_data_by_z(df_log_data), df_settling_height_range, f"Task: {task}, Lane: {lane}, Position: {position}", SprTrc_render.image_file_path(plot_dir, log_file, plot_format, current_analysis['Cycle_ID']))
+    except Exception as error:
+        current_analysis['error'] = "Plot {}: {}".format(type(error).__name__, error)
+
+# Process pool worker: analyse one (index, log file) pair. Returns the analysis records of its
+# measurement cycles, errors are recorded in an analysis record
+# plot_dir: render the settling height plot to this directory, see save_settling_height_plot
+# profile: also return the SprTrc_profile data of the file, None otherwise
+def analyse_indexed_log_file(indexed_log_file, cache=None, plot_dir=None, plot_format='png', max_plot_points=None, profile=False):
+    file_index, log_file = indexed_log_file
+    analysis_records = []
+    if profile:
+        SprTrc_profile.start_profile()
+    with SprTrc_profile.file_profile(log_file):
+        try:
+            for current_analysis, df_log_data, df_settling_height_range in analyse_log_file_cycles(log_file, cache):
+                if plot_dir is not None:
+                    with SprTrc_profile.stage('plot'):
+                        save_settling_height_plot(current_analysis, log_file, df_log_data, df_settling_height_range, plot_dir, plot_format, max_plot_points)
+                analysis_records.append(current_analysis)
+        except Exception as error:
+            analysis_records.append(analysis_error_row(log_file, error))
+    profile_data = SprTrc_profile.stop_profile().to_dict() if profile else None
+    return file_index, analysis_records, profile_data
+
+# Parse and analyse the log files in a process pool. The analysis records are returned in input order
+def analyse_log_files_parallel(log_files, workers=None, chunksize=8, cache=None, plot_dir=None, plot_format='png', max_plot_points=None):
+    analysis_records = [None] * len(log_files)
+    profile = SprTrc_profile.current_profile
+    worker = functools.partial(analyse_indexed_log_file, cache=cache, plot_dir=plot_dir, plot_format=plot_format, max_plot_points=max_plot_points, profile=profile is not None)
+    with multiprocessing.Pool(processes=workers) as pool:
+        files_done = 0
+        for file_index, file_analysis_records, profile_data in pool.imap_unordered(worker, enumerate(log_files), chunksize=chunksize):
+            analysis_records[file_index] = file_analysis_records
+            if profile_data is not None:
+                profile.merge(profile_data)
+            files_done += 1
+            # Echo a progress counter of finished files / total file amount
+            print("\033[F", end="") # Move cursor up one line
+            print("Parsed and analysed file {} / {}...".format(files_done, len(log_files)))
+
+    processed_logs = AnalysisAccumulator()
+    for file_analysis_records in analysis_records:
+        for current_analysis in file_analysis_records:
+            processed_logs.append(current_analysis)
+    return processed_logs
+
 def plot_settling_height_data(df_log_data, df_settling_height_range):
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import ScalarFormatter
+
     fig, axs = plt.subplots(3, 2, figsize=(18, 12)) # Create a figure with 3 rows and 2 columns of subplots
+    df_z_range = filter_spreader_data_by_z(df_log_data) # Rows in the plotted Z range, filtered once
+
     # Plot spreader x position over time
-    df_log_data[(df_log_data['SpTrMsg_position_Z'] < 5500) & (df_log_data['SpTrMsg_position_Z'] > 4000)].plot(x='Timestamp', y=['Point_Center_X', 'SpTrRes_calc_X'], ax=axs[0, 0], title='Spreader X Position Over Time', color='blue')
+    df_z_range.plot(x='Timestamp', y=['Point_Center_X', 'SpTrRes_calc_X'], ax=axs[0, 0], title='Spreader X Position Over Time', color='blue')
 
     # Plot spreader y position over time
-    df_log_data[(df_log_data['SpTrMsg_position_Z'] < 5500) & (df_log_data['SpTrMsg_position_Z'] > 4000)].plot(x='Timestamp', y=['Point_Center_Y', 'SpTrRes_calc_Y'], ax=axs[1, 0], title='Spreader Y Position Over Time', color='blue')
+    df_z_range.plot(x='Timestamp', y=['Point_Center_Y', 'SpTrRes_calc_Y'], ax=axs[1, 0], title='Spreader Y Position Over Time', color='blue')
 
     # Plot spreader skew position over time
-    df_log_data[(df_log_data['SpTrMsg_position_Z'] < 5500) & (df_log_data['SpTrMsg_position_Z'] > 4000)].plot(x='Timestamp', y=['Skew', 'SpTrRes_calc_Skew'], ax=axs[2, 0], title='Spreader Skew Position Over Time', color='blue')
+    df_z_range.plot(x='Timestamp', y=['Skew', 'SpTrRes_calc_Skew'], ax=axs[2, 0], title='Spreader Skew Position Over Time', color='blue')
 
     # Plot spreader Z position over time
-    df_z_range = filter_spreader_data_by_z(df_log_data)
     if not df_z_range.empty:
         df_z_range.plot(x='Timestamp', y='SpTrMsg_position_Z', ax=axs[0, 1], title='Spreader Z Position Over Time')
     else:
@@ -170,11 +297,16 @@ def filter_spreader_data_by_z(df_log_data):
     return df_log_data[(df_log_data['SpTrMsg_position_Z'] < 5500) & (df_log_data['SpTrMsg_position_Z'] > 4000)]
 
 
-def calculate_settling_range(df_log_data, use_slope=False):
+# cycle: optional measurement of the stp.CycleIndex of the parser, built with SprTrc_settling.settling_z_bands.
+# Its first 'Done' row and settling window rows are taken from the index instead of scanning the table
+def calculate_settling_range(df_log_data, use_slope=False, cycle=None):
     # Settling time is defined as the time spreader is at the settling height before final landing
 
     # FInd the target Z height based on the task
-    df_measurement_done = df_log_data[df_log_data['Measurement_Status'] == 'Done'] # Find rows with measurement status 'Done'
+    if cycle is not None:
+        df_measurement_done = df_log_data.iloc[[cycle['first_done_row']] if cycle['first_done_row'] is not None else []]
+    else:
+        df_measurement_done = df_log_data[df_log_data['Measurement_Status'] == 'Done'] # Find rows with measurement status 'Done'
     if not df_measurement_done.empty:
         # df_measurement_done = df_measurement_done.iloc[0] # Select the first row
         target_z_height = df_measurement_done.iloc[0]['Point_Center_Z'] # Extract the target Z height
@@ -183,12 +315,12 @@ def calculate_settling_range(df_log_data, use_slope=False):
 
     # Define the settling height based on the task
     if target_z_height is not None:
-        if df_measurement_done.iloc[0]['Task'] == '1 -  Pick':
+        if df_measurement_done.iloc[0]['Task'] == SprTrc_settling.PICK_TASK:
             # Estimate the settling time before final landing
-            settling_height = target_z_height + 370 # Z target height + 400 mm offset
-        elif df_measurement_done.iloc[0]['Task'] == '2 -  Place':
+            settling_height = target_z_height + SprTrc_settling.PICK_SETTLING_OFFSET # Z target height + 370 mm offset
+        elif df_measurement_done.iloc[0]['Task'] == SprTrc_settling.PLACE_TASK:
             # Estimate the settling time before final landing
-            settling_height = target_z_height + df_measurement_done.iloc[0]['Cont_Height'] + 360 # Z target height + container height + 360 mm offset
+            settling_height = target_z_height + df_measurement_done.iloc[0]['Cont_Height'] + SprTrc_settling.PLACE_SETTLING_OFFSET # Z target height + container height + 360 mm offset
         else:
             settling_height = None
     else:
@@ -196,15 +328,18 @@ def calculate_settling_range(df_log_data, use_slope=False):
 
     # Set settling height upper and lower limits
     if settling_height is not None:
-        settling_height_upper_limit = settling_height + 50
-        settling_height_lower_limit = settling_height - 60
+        settling_height_upper_limit = settling_height + SprTrc_settling.SETTLING_WINDOW_ABOVE
+        settling_height_lower_limit = settling_height - SprTrc_settling.SETTLING_WINDOW_BELOW
     else:
         settling_height_upper_limit = None
         settling_height_lower_limit = None
 
     # Find the first row where the spreader is at the settling height before final landing
     if settling_height_upper_limit is not None and settling_height_lower_limit is not None:
-        df_settling_height_range = df_log_data[(df_log_data['SpTrMsg_position_Z'] >= settling_height_lower_limit) & (df_log_data['SpTrMsg_position_Z'] <= settling_height_upper_limit)]
+        if cycle is not None:
+            df_settling_height_range = df_log_data.iloc[SprTrc_settling.cycle_band_positions(cycle, 'settling')]
+        else:
+            df_settling_height_range = df_log_data[(df_log_data['SpTrMsg_position_Z'] >= settling_height_lower_limit) & (df_log_data['SpTrMsg_position_Z'] <= settling_height_upper_limit)]
         if not df_settling_height_range.empty:
             settling_time = calculate_settling_time(df_settling_height_range)
 
@@ -221,27 +356,17 @@ def calculate_settling_range(df_log_data, use_slope=False):
         settling_time = None
         df_settling_height_range = None
 
-    if use_slope:
+    if use_slope and df_settling_height_range is not None:
         # Settling height is defined as the height in which the spreader height slope is (near) zero
-        # Find the first row where the spreader height slope is (near) zero for a certain time period
-
-       # Create the Z_diff column
-        df_settling_height_range_filtered = df_settling_height_range.copy()
-        df_settling_height_range_filtered['Z_diff'] = df_settling_height_range_filtered['SpTrMsg_position_Z'].diff().fillna(0)
-
-        # Apply a low pass filter to the Z_diff column
-        df_settling_height_range_filtered.loc[:, 'Z_diff_filtered'] = df_settling_height_range_filtered['Z_diff'].rolling(window=12, min_periods=1).mean()
-        
-        # Filter the DataFrame based on the Z_diff_filtered column
-        df_settling_height_range = df_settling_height_range_filtered[df_settling_height_range_filtered['Z_diff_filtered'].abs() < 0.5]
-        
-        if not df_settling_height_range.empty:
+        # Find the first and last rows where the spreader height slope is (near) zero for a certain time period
+        df_settling_height_range = SprTrc_settling.find_settling_plateau_range(df_settling_height_range)
+
+        if df_settling_height_range is not None:
             settling_time = calculate_settling_time(df_settling_height_range)
         else:
             settling_time = None
-            df_settling_height_range = None
 
-    # df_current_analysis.loc[0, 'SpTr_settling_time'] = settling_time
+    # current_analysis['SpTr_settling_time'] = settling_time
     return df_settling_height_range, settling_time
 
 def calculate_settling_time(df_settling_height_range):
@@ -251,6 +376,8 @@ def calculate_settling_time(df_settling_height_range):
     return settling_time
 
 def render_settling_height_plot(df_settling_height_range, df_spreader_validation_height_range):
+    import matplotlib.pyplot as plt
+
     df_spreader_validation_height_range.plot(x='Timestamp', y='SpTrMsg_position_Z', figsize=(12, 6), label='Validation Height Range')
     df_settling_height_range.plot(x='Timestamp', y='SpTrMsg_position_Z', label='Settling Height Range', ax=plt.gca())
     
@@ -271,37 +398,42 @@ def extract_task_lane_position(df_settling_height_range):
         position = df_settling_height_range.iloc[0]['Position'].split('-')[-1].strip()
     return task,lane,position
 
-def extract_job_info(df_current_analysis, df_log_data):
-    df_current_analysis.loc[0, 'Lane'] = df_log_data.iloc[0]['Lane'] if pd.notnull(df_log_data.iloc[0]['Lane']) else None
-    df_current_analysis.loc[0, 'Task'] = df_log_data.iloc[0]['Task'] if pd.notnull(df_log_data.iloc[0]['Task']) else None
-    df_current_analysis.loc[0, 'Position'] = df_log_data.iloc[0]['Position'] if pd.notnull(df_log_data.iloc[0]['Position']) else None
-    df_current_analysis.loc[0, 'Chassis_length'] = df_log_data.iloc[0]['Chassis_length'] if pd.notnull(df_log_data.iloc[0]['Chassis_length']) else None
-    df_current_analysis.loc[0, 'Chassis_type'] = df_log_data.iloc[0]['Chassis_type'] if pd.notnull(df_log_data.iloc[0]['Chassis_type']) else None
-    df_current_analysis.loc[0, 'Cont_Length'] = df_log_data.iloc[0]['Cont_Length'].astype(int) if pd.notnull(df_log_data.iloc[0]['Cont_Length']) else None
-    df_current_analysis.loc[0, 'Cont_Width'] = df_log_data.iloc[0]['Cont_Width'].astype(int) if pd.notnull(df_log_data.iloc[0]['Cont_Width']) else None
-    df_current_analysis.loc[0, 'Cont_Height'] = df_log_data.iloc[0]['Cont_Height'].astype(int) if pd.notnull(df_log_data.iloc[0]['Cont_Height']) else None
+def extract_job_info(current_analysis, df_log_data):
+    store_job_info(current_analysis, df_log_data.iloc[0])
+
+# job_info: first data row of a log file, a DataFrame row or a dict of SprTrc_parser.JOB_INFO_COLUMNS
+def store_job_info(current_analysis, job_info):
+    for column in ['Lane', 'Task', 'Position', 'Chassis_length', 'Chassis_type']:
+        current_analysis[column] = job_info[column] if pd.notnull(job_info[column]) else None
+    for column in ['Cont_Length', 'Cont_Width', 'Cont_Height']:
+        current_analysis[column] = int(job_info[column]) if pd.notnull(job_info[column]) else None
 
 # Extract the first valid spreader tracking calculation values
-def extract_first_valid_spreader_data(df_current_analysis, df_log_data):
+def extract_first_valid_spreader_data(current_analysis, df_log_data, cycle=None):
     # 'SpTrMsg_Skew_1st_valid',
     # 'SpTrRes_Skew_1st_valid',
     # 'SpTrRes_Skew_1st_valid_timestamp'
 
     # Find the first valid row of 'SpTrMsg_Skew' 
-    valid_rows = df_log_data[df_log_data['SpTrRes_Event_code'] == 5.0]
+    if cycle is not None: # First valid row from the cycle index of the parser
+        valid_rows = df_log_data.iloc[[cycle['first_valid_row']] if cycle['first_valid_row'] is not None else []]
+    else:
+        valid_rows = df_log_data[df_log_data['SpTrRes_Event_code'] == 5.0]
     if not valid_rows.empty:
-        df_current_analysis.loc[0, 'SpTrRes_Skew_1st_valid_timestamp'] = pd.to_datetime(valid_rows.iloc[0]['Timestamp'], errors='coerce')
-        df_current_analysis.loc[0, 'SpTrRes_Skew_1st_valid'] = valid_rows.iloc[0]['SpTrRes_calc_Skew']
-        df_current_analysis.loc[0, 'SpTrMsg_Skew_1st_valid'] = valid_rows.iloc[0]['SpTrMsg_position_Skew']
+        current_analysis['SpTrRes_Skew_1st_valid_timestamp'] = pd.to_datetime(valid_rows.iloc[0]['Timestamp'], errors='coerce')
+        current_analysis['SpTrRes_Skew_1st_valid'] = valid_rows.iloc[0]['SpTrRes_calc_Skew']
+        current_analysis['SpTrMsg_Skew_1st_valid'] = valid_rows.iloc[0]['SpTrMsg_position_Skew']
     else:
-        df_current_analysis.loc[0, 'SpTrRes_Skew_1st_valid_timestamp'] = None
-        df_current_analysis.loc[0, 'SpTrRes_Skew_1st_valid'] = None
-        df_current_analysis.loc[0, 'SpTrMsg_Skew_1st_valid'] = None
+        current_analysis['SpTrRes_Skew_1st_valid_timestamp'] = None
+        current_analysis['SpTrRes_Skew_1st_valid'] = None
+        current_analysis['SpTrMsg_Skew_1st_valid'] = None
 
     return None
 
 # Plot the 'SpTrMsg_position_Skew' and 'SpTrRes_calc_Skew' initial values over time in ATH
 def plot_initial_ath_skew(df_processed_logs):
+    import matplotlib.pyplot as plt
+
     df_processed_logs['SpTrMsg_Skew_1st_valid'] = pd.to_numeric(df_processed_logs['SpTrMsg_Skew_1st_valid'], errors='coerce') # Convert to numeric
     df_processed_logs = df_processed_logs.sort_values(by='SpTrRes_Skew_1st_valid_timestamp') # Sort by timestamp
     df_processed_logs.plot(x='SpTrRes_Skew_1st_valid_timestamp', y=['SpTrMsg_Skew_1st_valid', 'SpTrRes_Skew_1st_valid'], figsize=(12, 6)) # Plot with increased size
@@ -310,39 +442,80 @@ def plot_initial_ath_skew(df_processed_logs):
     plt.show()
     return None
 
-# Initialize analysis data structure of the MeasureResult files
+# Initialize analysis data structure of the MeasureResult files, one record per file
 def initialize_analysis_data_structure():
-    df = pd.DataFrame(columns=[
-        'log_file_name',
-        'log_file_timestamp',
-        'Lane',
-        'Task',
-        'Position',
-        'Chassis_length',
-        'Chassis_type',
-        'Cont_Length',
-        'Cont_Width',
-        'Cont_Height',
-        'SpTrRes_Skew_1st_valid_timestamp',
-        'SpTrRes_Skew_1st_valid',
-        'SpTrMsg_Skew_1st_valid',
-        'SpTr_settling_time'
-    ])
-    return df
-
-def collect_measure_result_files(log_root):
-    measure_result_files = []
-    for root, dirs, files in os.walk(log_root):
-        for file in files:
-            if file.startswith("MeasureResult") and file.lower().endswith(".csv"):
-                measure_result_files.append(os.path.join(root, file))
-    return measure_result_files
+    analysis_record = {
+        'log_file_name' : None,
+        'Cycle_ID' : None,
+        'log_file_timestamp' : None,
+        'Lane' : None,
+        'Task' : None,
+        'Position' : None,
+        'Chassis_length' : None,
+        'Chassis_type' : None,
+        'Cont_Length' : None,
+        'Cont_Width' : None,
+        'Cont_Height' : None,
+        'SpTrRes_Skew_1st_valid_timestamp' : None,
+        'SpTrRes_Skew_1st_valid' : None,
+        'SpTrMsg_Skew_1st_valid' : None,
+        'SpTr_settling_time' : None,
+        'error' : None
+    }
+    return analysis_record
+
+# Collects the analysis records column-wise, the dataframe is built once at the end
+class AnalysisAccumulator:
+    def __init__(self):
+        self.columns = {column: [] for column in initialize_analysis_data_structure()}
+
+    def append(self, analysis_record):
+        for column, values in self.columns.items():
+            values.append(analysis_record[column])
+
+    def __len__(self):
+        return len(self.columns['log_file_name'])
+
+    def to_dataframe(self):
+        return pd.DataFrame(self.columns)
+
+def collect_measure_result_files(log_root, catalog=None):
+    return stp.collect_measure_result_files(log_root, catalog)
 
 def prompt_use_excel():
+    import tkinter as tk
+    from tkinter import messagebox
+
     root = tk.Tk()
     root.withdraw()  # Hide the root window
     use_excel = messagebox.askyesno("Use Excel file", "Do you want to define log files from an Excel file?")
     return use_excel   
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Analyse spreader tracking data of MeasureResult files. Without inputs the log files are selected with dialogs.")
+    parser.add_argument('inputs', nargs='*', help="Log files, directories, glob patterns or @file_list.txt")
+    parser.add_argument('-o', '--output', help="Analysis result file, .xlsx workbook or .parquet/.feather table (default: Spreader_tracking_analysis.xlsx in the working directory)")
+    parser.add_argument('--plots', action='store_true', help="Show the per-file plots, default when the files are selected with dialogs")
+    parser.add_argument('--plot-dir', help="Save the per-file plots as image files to this directory, also with --workers")
+    parser.add_argument('--plot-format', choices=SprTrc_render.IMAGE_FORMATS, default='png', help="Image format of --plot-dir")
+    parser.add_argument('--max-plot-points', type=int, help="Decimate longer plotted series to about this many points")
+    parser.add_argument('--workers', type=int, default=1, help="Parallel worker processes (default 1, no plot windows when > 1)")
+    parser.add_argument('--chunksize', type=int, default=8, help="Files handed to a worker at a time")
+    parser.add_argument('--cache-dir', help="Reuse parse results of unchanged files from this cache directory")
+    parser.add_argument('--cache-max-mb', type=int, default=SprTrc_cache.DEFAULT_CACHE_MAX_BYTES // 1024 ** 2, help="Cache size cap, least recently used entries are evicted")
+    parser.add_argument('--catalog', help="File catalog of the log directories, refreshed incrementally instead of walking them")
+    parser.add_argument('--from', dest='start', help="With --catalog: files whose first timestamp is from, e.g. 2024-03-01")
+    parser.add_argument('--to', dest='end', help="With --catalog: files whose first timestamp is before, e.g. 2024-04-01")
+    parser.add_argument('--lane', type=int, help="With --catalog: files of this lane")
+    parser.add_argument('--task', help="With --catalog: files of this task, e.g. Pick or Place")
+    parser.add_argument('--position', help="With --catalog: files of this position, e.g. Middle")
+    SprTrc_profile.add_profile_arguments(parser)
+    args = parser.parse_args()
+    cache = SprTrc_cache.ParseCache(args.cache_dir, args.cache_max_mb * 1024 ** 2) if args.cache_dir else None
+    catalog = SprTrc_catalog.LogCatalog(args.catalog) if args.catalog else None
+    catalog_filters = {name: value for name, value in [('start', args.start), ('end', args.end), ('lane', args.lane), ('task', args.task), ('position', args.position)] if value is not None}
+    with SprTrc_profile.profile_run(args.profile, args.profiler, args.profiler_output):
+        if args.inputs:
+            main(stp.expand_log_inputs(args.inputs, catalog, catalog_filters), args.output, args.workers, args.chunksize, cache, plots=args.plots, plot_dir=args.plot_dir, plot_format=args.plot_format, max_plot_points=args.max_plot_points)
+        else:
+            main(output_file=args.output, workers=args.workers, chunksize=args.chunksize, cache=cache, plot_dir=args.plot_dir, plot_format=args.plot_format, max_plot_points=args.max_plot_points, catalog=catalog)
\ No newline at end of file
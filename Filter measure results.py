@@ -1,21 +1,36 @@
+import argparse
 import pandas as pd
-import tkinter as tk
-from tkinter import filedialog, simpledialog
+
+import SprTrc_dataset # Table readers and writers
+import SprTrc_filter # Filtering engine
+
+DEFAULT_OUTPUT_FILE = 'filtered_output.xlsx' # GUI
+HEADLESS_OUTPUT_FILE = 'filtered_output.parquet' # Command line filtering of large tables
+
+# Keep the rows whose column values are among the selected values, compared as text
+# selected_columns: {column: [values]}, columns without values are not filtered
+def filter_measure_results(df, selected_columns):
+    return SprTrc_filter.MeasureResultFilter(df).filter(selected_columns)
 
 class FilterMeasureResultsApp:
-    def __init__(self, root):
+    def __init__(self, root, output_file=DEFAULT_OUTPUT_FILE):
         self.root = root
         self.root.withdraw()
         self.df = None
+        self.engine = None
+        self.output_file = output_file
         self.selected_columns = {}
 
     def select_file(self):
-        input_file_path = filedialog.askopenfilename(title="Select the input Excel file", filetypes=[("Excel files", "*.xlsx")])
+        from tkinter import filedialog
+        input_file_path = filedialog.askopenfilename(title="Select the input file", filetypes=SprTrc_dataset.TABLE_FILE_TYPES)
         if input_file_path:
-            self.df = pd.read_excel(input_file_path)
+            self.df = SprTrc_dataset.read_table(input_file_path)
+            self.engine = SprTrc_filter.MeasureResultFilter(self.df)
             self.show_column_selection()
 
     def show_column_selection(self):
+        import tkinter as tk
         self.root.deiconify()
         self.root.title("Select the columns to filter")
         lb_columns = tk.Listbox(self.root)
@@ -31,13 +46,13 @@ class FilterMeasureResultsApp:
         btn_done.pack()
 
     def on_double_click(self, event):
+        import tkinter as tk
         lb_columns = event.widget
         selected_column = lb_columns.get(lb_columns.curselection())
         lb_values = tk.Listbox(self.root, selectmode=tk.MULTIPLE)
         btn_add = tk.Button(self.root, text="Add", command=lambda: self.add_column_value(selected_column, lb_values, btn_add))
 
-        for value in self.df[selected_column].unique():
-            lb_values.insert(tk.END, value)
+        lb_values.insert(tk.END, *self.engine.column_values(selected_column))
 
         lb_values.pack()
         btn_add.pack()
@@ -62,18 +77,52 @@ class FilterMeasureResultsApp:
 
     def filter_data(self):
         if self.df is not None and self.selected_columns:
-            filtered_df = self.df
-            for column, values in self.selected_columns.items():
-                if values:
-                    filtered_df = filtered_df[filtered_df[column].astype(str).isin(map(str, values))]
-            filtered_df.to_excel('filtered_output.xlsx', index=False)
-            print("Filtered data saved to 'filtered_output.xlsx'.")
+            filtered_df = self.engine.filter(self.selected_columns)
+            SprTrc_dataset.write_table(filtered_df, self.output_file)
+            print("Filtered data saved to '{}'.".format(self.output_file))
 
     def run(self):
         self.select_file()
         self.root.mainloop()
 
+# Headless filtering, e.g. "Filter measure results.py" results.xlsx --filter Lane=3,4 --filter "Task=2 -  Place"
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Filter measure results. Without an input file the filters are selected in a GUI.")
+    parser.add_argument('input', nargs='?', help="Input table: .parquet, .feather, .csv, .xlsx or a dataset directory")
+    parser.add_argument('--filter', action='append', default=[], metavar='COLUMN=VALUE[,VALUE...]', help="Keep rows with one of the values in the column, repeatable")
+    parser.add_argument('-o', '--output', help="Output file, .parquet, .feather, .csv or .xlsx (default: {} with an input file, {} in the GUI)".format(HEADLESS_OUTPUT_FILE, DEFAULT_OUTPUT_FILE))
+    args = parser.parse_args(argv)
+
+    if args.input is None:
+        import tkinter as tk
+        root = tk.Tk()
+        app = FilterMeasureResultsApp(root, args.output or DEFAULT_OUTPUT_FILE)
+        app.run()
+        return
+
+    selected_columns = {}
+    for column_filter in args.filter:
+        column, separator, values = column_filter.partition('=')
+        if not separator:
+            parser.error("filter '{}' is not COLUMN=VALUE[,VALUE...]".format(column_filter))
+        selected_columns.setdefault(column, []).extend(values.split(','))
+
+    df = SprTrc_dataset.read_table(args.input)
+    for column, values in selected_columns.items():
+        if column not in df.columns:
+            parser.error("column '{}' not found in {}".format(column, args.input))
+        # Command line values are text, match them to the values of numeric columns
+        if pd.api.types.is_numeric_dtype(df[column]):
+            try:
+                numeric_values = pd.to_numeric(values)
+            except (ValueError, TypeError):
+                parser.error("column '{}' is numeric, filter values {} are not all numbers".format(column, values))
+            selected_columns[column] = [df[column].dtype.type(value) for value in numeric_values]
+
+    output_file = args.output or HEADLESS_OUTPUT_FILE
+    filtered_df = filter_measure_results(df, selected_columns)
+    SprTrc_dataset.write_table(filtered_df, output_file)
+    print("Filtered data saved to '{}'.".format(output_file))
+
 if __name__ == '__main__':
-    root = tk.Tk()
-    app = FilterMeasureResultsApp(root)
-    app.run()
\ No newline at end of file
+    main()
\ No newline at end of file
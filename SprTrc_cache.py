@@ -0,0 +1,115 @@
+import os
+import hashlib
+import pickle
+import tempfile
+import importlib.util
+
+import SprTrc_parser as stp
+import SprTrc_profile
+
+# Persistent cache of parsed MeasureResult files, the parse_log_file_columnar DataFrames.
+# Entries are keyed on the log file path, size, mtime and a hash of the parser source,
+# so a changed log file or parser never hits a stale entry. Stale entries age out through
+# the LRU eviction which keeps the cache directory below max_bytes.
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'SprTrc_parser')
+DEFAULT_CACHE_MAX_BYTES = 2 * 1024 ** 3
+CACHE_FILE_EXTENSION = '.pkl'
+
+# Hash of the parser sources, cached results of an older parser are never used
+def parser_version():
+    version = hashlib.sha1()
+    for module_file in [stp.__file__, importlib.util.find_spec('SprTrc_columnar').origin]:
+        with open(module_file, 'rb') as file:
+            version.update(file.read())
+    return version.hexdigest()[:16]
+
+class ParseCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = parser_version()
+        self.total_bytes = None # Cache directory size, counted on first store
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def entry_path(self, log_file):
+        log_file = os.path.abspath(log_file)
+        stat = os.stat(log_file)
+        key = "{}|{}|{}|{}".format(log_file, stat.st_size, stat.st_mtime_ns, self.version)
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + CACHE_FILE_EXTENSION)
+
+    # Cached parse result of the log file or None
+    def load(self, log_file):
+        entry_path = self.entry_path(log_file)
+        try:
+            with open(entry_path, 'rb') as file:
+                result = pickle.load(file)
+        except Exception: # Missing, truncated or written by other pandas/numpy versions: parse again
+            return None
+        os.utime(entry_path) # Entry mtime is the LRU access time
+        return result
+
+    def store(self, log_file, result):
+        entry_path = self.entry_path(log_file)
+        # Write to a temporary file first, parallel workers may store the same entry
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        with os.fdopen(file_descriptor, 'wb') as file:
+            pickle.dump(result, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, entry_path)
+
+        if self.total_bytes is None:
+            self.total_bytes = sum(size for _, _, size in self.entries())
+        else:
+            self.total_bytes += os.path.getsize(entry_path)
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    # record_filter: optional stp.RecordFilter. The whole file is cached, the filter is applied to the cached result
+    def parse_log_file_columnar(self, log_file, record_filter=None):
+        import SprTrc_columnar # Imported here, pandas is only loaded when the cache is used
+        if record_filter is not None and not record_filter.matches_file(log_file):
+            return SprTrc_columnar.ColumnarResultBuilder().to_dataframe()
+        with SprTrc_profile.stage('cache_load'):
+            df_parsed_log_file = self.load(log_file)
+        SprTrc_profile.count('cache_hits' if df_parsed_log_file is not None else 'cache_misses')
+        if df_parsed_log_file is None:
+            df_parsed_log_file = SprTrc_columnar.parse_log_file_columnar(log_file)
+            with SprTrc_profile.stage('cache_store'):
+                self.store(log_file, df_parsed_log_file)
+        if record_filter is not None:
+            df_parsed_log_file = SprTrc_columnar.filter_log_data(df_parsed_log_file, record_filter)
+        return df_parsed_log_file
+
+    # (path, access time, size) of every cache entry
+    def entries(self):
+        entries = []
+        with os.scandir(self.cache_dir) as directory:
+            for entry in directory:
+                if entry.name.endswith(CACHE_FILE_EXTENSION):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError: # Evicted by another process
+                        continue
+                    entries.append((entry.path, stat.st_mtime, stat.st_size))
+        return entries
+
+    # Remove least recently used entries until the cache is below max_bytes
+    def evict(self):
+        entries = sorted(self.entries(), key=lambda entry: entry[1])
+        self.total_bytes = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if self.total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.total_bytes -= size
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.total_bytes = 0
@@ -0,0 +1,206 @@
+import os
+import sys
+import sqlite3
+from datetime import datetime
+
+import SprTrc_parser as stp
+
+# Persistent catalog of the MeasureResult files under log roots
+# Every file is stored with its size, mtime and header metadata (first timestamp, Lane, Task,
+# Position), so the files of a date range, lane or task are found without walking the tree or
+# opening the files. refresh() is incremental: a directory whose mtime has not changed since the
+# last refresh is not listed again, only its known subdirectories are visited. Files are only
+# re-read when they are new or their size or mtime changed.
+# Directory mtimes change when entries are added, removed or renamed, not when a file is
+# rewritten in place. full=True refreshes re-check every file.
+
+DEFAULT_CATALOG_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'SprTrc_parser', 'catalog.sqlite')
+HEADER_MAX_LINES = 2000 # Lines read for the header metadata at most
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS directories_parent ON directories (parent);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    directory TEXT,
+    size INTEGER,
+    mtime_ns INTEGER,
+    first_timestamp TEXT,
+    lane INTEGER,
+    task TEXT,
+    position TEXT
+);
+CREATE INDEX IF NOT EXISTS files_directory ON files (directory);
+CREATE INDEX IF NOT EXISTS files_first_timestamp ON files (first_timestamp);
+CREATE INDEX IF NOT EXISTS files_lane_task ON files (lane, task);
+"""
+
+def is_measure_result_file(file_name):
+    return file_name.startswith("MeasureResult") and file_name.lower().endswith(".csv")
+
+# First timestamp, Lane, Task and Position of a log file from the lines before the spreader
+# tracking values (SprTrc_parser.probe_log_header). Values that are not found are None
+def read_header_metadata(log_file, max_lines=HEADER_MAX_LINES):
+    header = {'first_timestamp': None, 'Lane': None, 'Task': None, 'Position': None}
+    for data in stp.probe_log_header(log_file, max_lines):
+        for column in header:
+            source_column = 'Timestamp' if column == 'first_timestamp' else column
+            if header[column] is None and data[source_column] is not None:
+                header[column] = data[source_column]
+    return header
+
+# Catalog text of a timestamp, sorts in time order
+def timestamp_text(timestamp):
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return timestamp.isoformat(' ', timespec='microseconds') if timestamp is not None else None
+
+class LogCatalog:
+    def __init__(self, catalog_file=DEFAULT_CATALOG_FILE):
+        if os.path.dirname(catalog_file):
+            os.makedirs(os.path.dirname(catalog_file), exist_ok=True)
+        self.connection = sqlite3.connect(catalog_file)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Bring the catalog of log_root up to date. Returns the counts of listed directories and
+    # added, updated and removed files
+    def refresh(self, log_root, full=False):
+        log_root = os.path.abspath(log_root)
+        counts = {'directories_listed': 0, 'files_added': 0, 'files_updated': 0, 'files_removed': 0}
+        directories = [(log_root, os.path.dirname(log_root))]
+        while directories:
+            directory, parent = directories.pop()
+            try:
+                directory_mtime_ns = os.stat(directory).st_mtime_ns
+            except FileNotFoundError:
+                self.remove_directory(directory, counts)
+                continue
+            known_mtime = self.connection.execute("SELECT mtime_ns FROM directories WHERE path = ?", (directory,)).fetchone()
+            known_subdirectories = [path for path, in self.connection.execute("SELECT path FROM directories WHERE parent = ?", (directory,))]
+            if not full and known_mtime is not None and known_mtime[0] == directory_mtime_ns:
+                # Unchanged directory, only the subdirectories may have changed
+                directories.extend((subdirectory, directory) for subdirectory in known_subdirectories)
+                continue
+
+            subdirectories, files = self.list_directory(directory)
+            counts['directories_listed'] += 1
+            known_files = {path: (size, mtime_ns) for path, size, mtime_ns in self.connection.execute("SELECT path, size, mtime_ns FROM files WHERE directory = ?", (directory,))}
+            for path in known_files.keys() - files.keys():
+                self.connection.execute("DELETE FROM files WHERE path = ?", (path,))
+                counts['files_removed'] += 1
+            for path, (size, mtime_ns) in files.items():
+                if full or known_files.get(path) != (size, mtime_ns):
+                    self.store_file(path, directory, size, mtime_ns)
+                    counts['files_updated' if path in known_files else 'files_added'] += 1
+            for subdirectory in set(known_subdirectories) - set(subdirectories):
+                self.remove_directory(subdirectory, counts)
+
+            # The mtime read before listing: a change during the listing is seen in the next refresh
+            self.connection.execute("INSERT OR REPLACE INTO directories (path, parent, mtime_ns) VALUES (?, ?, ?)", (directory, parent, directory_mtime_ns))
+            self.connection.commit()
+            directories.extend((subdirectory, directory) for subdirectory in subdirectories)
+        self.connection.commit()
+        return counts
+
+    # Subdirectories and {path: (size, mtime_ns)} of the MeasureResult files of a directory
+    def list_directory(self, directory):
+        subdirectories = []
+        files = {}
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                    elif is_measure_result_file(entry.name) and entry.is_file():
+                        stat = entry.stat()
+                        files[entry.path] = (stat.st_size, stat.st_mtime_ns)
+                except FileNotFoundError: # Removed while listing
+                    continue
+        return subdirectories, files
+
+    def store_file(self, path, directory, size, mtime_ns):
+        try:
+            header = read_header_metadata(path)
+        except (OSError, ValueError): # Unreadable or malformed header, the file is still listed
+            header = {'first_timestamp': None, 'Lane': None, 'Task': None, 'Position': None}
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files (path, directory, size, mtime_ns, first_timestamp, lane, task, position) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (path, directory, size, mtime_ns, timestamp_text(header['first_timestamp']), header['Lane'], header['Task'], header['Position']))
+
+    # Remove a directory and everything under it
+    def remove_directory(self, directory, counts):
+        prefix = directory.rstrip(os.sep) + os.sep
+        removed = self.connection.execute("DELETE FROM files WHERE directory = ? OR substr(directory, 1, ?) = ?", (directory, len(prefix), prefix)).rowcount
+        counts['files_removed'] += removed
+        self.connection.execute("DELETE FROM directories WHERE path = ? OR substr(path, 1, ?) = ?", (directory, len(prefix), prefix))
+
+    # Paths of the catalogued files, in time order of their first timestamp
+    # root: only files under this directory
+    # start, end: first timestamp range, datetime or ISO text, end exclusive
+    # lane: lane number, task and position: full log value ('1 -  Pick') or its name ('Pick')
+    def find(self, root=None, start=None, end=None, lane=None, task=None, position=None):
+        conditions = []
+        parameters = []
+        if root is not None:
+            root = os.path.abspath(root)
+            prefix = root.rstrip(os.sep) + os.sep
+            conditions.append("(directory = ? OR substr(directory, 1, ?) = ?)")
+            parameters += [root, len(prefix), prefix]
+        if start is not None:
+            conditions.append("first_timestamp >= ?")
+            parameters.append(timestamp_text(start))
+        if end is not None:
+            conditions.append("first_timestamp < ?")
+            parameters.append(timestamp_text(end))
+        if lane is not None:
+            conditions.append("lane = ?")
+            parameters.append(int(lane))
+        for column, value in [('task', task), ('position', position)]:
+            if value is not None:
+                # Match the full value or the name after the number, e.g. 'Pick' of '1 -  Pick'
+                conditions.append("({0} = ? OR trim(substr({0}, instr({0}, '-') + 1)) = ?)".format(column))
+                parameters += [value, value.strip()]
+        query = "SELECT path FROM files"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY first_timestamp, path"
+        return [path for path, in self.connection.execute(query, parameters)]
+
+# Refresh a catalog and list the files matching a query
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Catalog the MeasureResult files under log roots and find them by date, lane, task or position")
+    parser.add_argument('log_roots', nargs='+', help="Log root directories")
+    parser.add_argument('--catalog', default=DEFAULT_CATALOG_FILE, help="Catalog file (default: {})".format(DEFAULT_CATALOG_FILE))
+    parser.add_argument('--full', action='store_true', help="Re-check every file, not only the changed directories")
+    parser.add_argument('--no-refresh', action='store_true', help="Query the catalog as it is")
+    parser.add_argument('--from', dest='start', help="First timestamp from, e.g. 2024-03-01")
+    parser.add_argument('--to', dest='end', help="First timestamp before, e.g. 2024-04-01")
+    parser.add_argument('--lane', type=int, help="Lane number")
+    parser.add_argument('--task', help="Task, e.g. Pick or Place")
+    parser.add_argument('--position', help="Position, e.g. Middle")
+    args = parser.parse_args(argv)
+
+    with LogCatalog(args.catalog) as catalog:
+        for log_root in args.log_roots:
+            if not args.no_refresh:
+                counts = catalog.refresh(log_root, args.full)
+                print("Refreshed {}: {}".format(log_root, counts), file=sys.stderr)
+            for path in catalog.find(log_root, args.start, args.end, args.lane, args.task, args.position):
+                print(path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,300 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+
+import SprTrc_parser as stp
+import SprTrc_profile
+
+# Columnar typed output of the MeasureResult parser
+# Text values are dictionary encoded (pandas Categorical), numeric values are int32 with
+# a null mask (pandas Int32) and timestamps are int64 microseconds (datetime64[us]).
+
+TIMESTAMP_COLUMN = 'Timestamp'
+TEXT_COLUMNS = [
+    'Measurement_ID',
+    'Task',
+    'Position',
+    'Chassis_length',
+    'Chassis_type',
+    'Lane_Status',
+    'Measurement_Status',
+    'Assumed_trailer',
+    'SpTrRes_Event_desc'
+]
+INT_COLUMNS = [column for column in stp.init_measure_result_data() if column != TIMESTAMP_COLUMN and column not in TEXT_COLUMNS]
+
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+NULL_TIMESTAMP = np.iinfo(np.int64).min # NaT
+JOB_FILTER_COLUMNS = ['Lane', 'Task', 'Position'] # Job values of stp.RecordFilter.matches_job
+
+# Collects the parsed rows straight into typed column arrays.
+# new_row() appends an empty row and returns a ColumnarRow view of it, item assignment
+# on the view writes into the arrays. The parser keeps a few rows open at a time.
+class ColumnarResultBuilder:
+    def __init__(self, capacity=4096):
+        self.length = 0
+        self.capacity = capacity
+        self.timestamps = np.full(capacity, NULL_TIMESTAMP, dtype=np.int64)
+        self.int_values = {column: np.zeros(capacity, dtype=np.int32) for column in INT_COLUMNS}
+        self.int_valid = {column: np.zeros(capacity, dtype=bool) for column in INT_COLUMNS}
+        self.text_codes = {column: np.full(capacity, -1, dtype=np.int32) for column in TEXT_COLUMNS}
+        self.text_categories = {column: {} for column in TEXT_COLUMNS} # value: code
+        self.text_values = {column: [] for column in TEXT_COLUMNS} # value of every code
+
+    def new_row(self):
+        if self.length == self.capacity:
+            self.grow()
+        self.length += 1
+        return ColumnarRow(self, self.length - 1)
+
+    # Drop the rows after the first length rows, e.g. the partial rows of a file that failed to parse
+    def truncate(self, length):
+        self.timestamps[length:self.length] = NULL_TIMESTAMP
+        for column in INT_COLUMNS:
+            self.int_valid[column][length:self.length] = False
+        for column in TEXT_COLUMNS:
+            self.text_codes[column][length:self.length] = -1
+        self.length = length
+
+    # Keep the rows of start: where keep is True, keep holds a flag for every row from start.
+    # A kept row takes the missing values of the dropped rows before it, see stp.RecordFilter
+    def compact(self, start, keep):
+        kept_positions = np.flatnonzero(keep)
+        kept_length = len(kept_positions)
+        stop = self.length
+        self.timestamps[start:start + kept_length] = self.timestamps[start:stop][kept_positions]
+        for column in INT_COLUMNS:
+            source, carried = carried_positions(self.int_valid[column][start:stop], kept_positions)
+            self.int_values[column][start:start + kept_length] = self.int_values[column][start:stop][source]
+            self.int_valid[column][start:start + kept_length] = carried
+        for column in TEXT_COLUMNS:
+            codes = self.text_codes[column][start:stop]
+            source, carried = carried_positions(codes >= 0, kept_positions)
+            codes[:kept_length] = np.where(carried, codes[source], -1)
+        self.truncate(start + kept_length)
+
+    # Double the capacity of every column
+    def grow(self):
+        self.timestamps = np.concatenate([self.timestamps, np.full(self.capacity, NULL_TIMESTAMP, dtype=np.int64)])
+        for column in INT_COLUMNS:
+            self.int_values[column] = np.concatenate([self.int_values[column], np.zeros(self.capacity, dtype=np.int32)])
+            self.int_valid[column] = np.concatenate([self.int_valid[column], np.zeros(self.capacity, dtype=bool)])
+        for column in TEXT_COLUMNS:
+            self.text_codes[column] = np.concatenate([self.text_codes[column], np.full(self.capacity, -1, dtype=np.int32)])
+        self.capacity *= 2
+
+    def to_dataframe(self):
+        length = self.length
+        columns = {}
+        for column in stp.init_measure_result_data():
+            if column == TIMESTAMP_COLUMN:
+                columns[column] = self.timestamps[:length].view('datetime64[us]')
+            elif column in self.int_values:
+                columns[column] = pd.arrays.IntegerArray(self.int_values[column][:length], ~self.int_valid[column][:length])
+            else:
+                columns[column] = pd.Categorical.from_codes(self.text_codes[column][:length], categories=self.text_values[column])
+        return pd.DataFrame(columns)
+
+# Row of a ColumnarResultBuilder, read and written like the dict rows of init_measure_result_data
+class ColumnarRow:
+    __slots__ = ('builder', 'index')
+
+    def __init__(self, builder, index):
+        self.builder = builder
+        self.index = index
+
+    def __setitem__(self, column, value):
+        builder = self.builder
+        int_values = builder.int_values.get(column)
+        if int_values is not None:
+            int_values[self.index] = value
+            builder.int_valid[column][self.index] = True
+        elif column in builder.text_codes:
+            categories = builder.text_categories[column]
+            code = categories.get(value)
+            if code is None:
+                code = categories[value] = len(categories)
+                builder.text_values[column].append(value)
+            builder.text_codes[column][self.index] = code
+        elif column == TIMESTAMP_COLUMN: # Int microseconds, stp.MeasureResultParser(timestamp_us=True)
+            builder.timestamps[self.index] = value
+        else:
+            raise KeyError(column)
+
+    def __getitem__(self, column):
+        builder = self.builder
+        if column == TIMESTAMP_COLUMN:
+            timestamp = builder.timestamps[self.index]
+            return stp.timestamp_from_us(int(timestamp)) if timestamp != NULL_TIMESTAMP else None
+        elif column in builder.int_values:
+            return int(builder.int_values[column][self.index]) if builder.int_valid[column][self.index] else None
+        elif column in builder.text_codes:
+            code = builder.text_codes[column][self.index]
+            return builder.text_values[column][code] if code >= 0 else None
+        raise KeyError(column)
+
+# Position of the value of every kept row: its own or the last one of the dropped rows before it.
+# Returns the positions and whether there is such a value
+def carried_positions(valid, kept_positions):
+    last_valid = np.maximum.accumulate(np.where(valid, np.arange(len(valid)), -1))
+    source = last_valid[kept_positions]
+    previous_kept = np.concatenate([[-1], kept_positions[:-1]])
+    carried = source > previous_kept
+    return np.where(carried, source, kept_positions), carried
+
+# Rows matching the row filters of a stp.RecordFilter, by the int64 microsecond timestamps and
+# the SpTrMsg_position_Z values with their null mask
+def record_filter_mask(record_filter, timestamps, z_values, z_valid):
+    keep = timestamps != NULL_TIMESTAMP if record_filter.start is not None or record_filter.end is not None else np.ones(len(timestamps), dtype=bool)
+    if record_filter.start is not None:
+        keep &= timestamps >= (record_filter.start - EPOCH) // ONE_MICROSECOND
+    if record_filter.end is not None:
+        keep &= timestamps < (record_filter.end - EPOCH) // ONE_MICROSECOND
+    if record_filter.z_low is not None or record_filter.z_high is not None:
+        # Forward filled Z
+        last_valid = np.maximum.accumulate(np.where(z_valid, np.arange(len(z_valid)), -1))
+        keep &= last_valid >= 0
+        z = z_values[np.maximum(last_valid, 0)]
+        if record_filter.z_low is not None:
+            keep &= z > record_filter.z_low
+        if record_filter.z_high is not None:
+            keep &= z < record_filter.z_high
+    return keep
+
+# Rows of the measurement cycles matching the job filters of a stp.RecordFilter, by the Cycle_ID
+# of every row (-1 when missing), its 'Done' Measurement_Status, the null mask of every job column
+# and job_value(column, position), the job value of the row at position. The job values of a cycle
+# are forward filled up to its first 'Done' row like stp.cycle_job_info
+def job_filter_mask(record_filter, cycle_ids, done, job_valid, job_value):
+    if len(cycle_ids) == 0:
+        return np.ones(0, dtype=bool)
+    cycle_starts = np.flatnonzero(np.concatenate([[True], cycle_ids[1:] != cycle_ids[:-1]]))
+    cycle_ends = np.append(cycle_starts[1:], len(cycle_ids))
+    # First 'Done' row of every cycle, or its last row
+    done_positions = np.append(np.flatnonzero(done), len(cycle_ids))
+    first_done = done_positions[np.searchsorted(done_positions, cycle_starts)]
+    job_rows = np.minimum(first_done, cycle_ends - 1)
+    sources = {}
+    for column in JOB_FILTER_COLUMNS:
+        last_valid = np.maximum.accumulate(np.where(job_valid[column], np.arange(len(cycle_ids)), -1))[job_rows]
+        sources[column] = np.where(last_valid >= cycle_starts, last_valid, -1)
+    cycle_matches = np.array([record_filter.matches_job({column: job_value(column, sources[column][cycle]) if sources[column][cycle] >= 0 else None
+                                                         for column in JOB_FILTER_COLUMNS})
+                              for cycle in range(len(cycle_starts))], dtype=bool)
+    return np.repeat(cycle_matches, cycle_ends - cycle_starts)
+
+# Parse a log file into the builder and drop the rows filtered out by record_filter
+def scan_into_builder(builder, log_file, record_filter=None, cycle_index=None):
+    start = builder.length
+    records = stp.scan_measurement_records(log_file, new_row=builder.new_row, cycle_index=cycle_index, timestamp_us=True)
+    if record_filter is None or not (record_filter.has_row_filter() or record_filter.has_job_filter()):
+        for _ in records:
+            pass
+        return
+    end = (record_filter.end - EPOCH) // ONE_MICROSECOND if record_filter.end is not None else None
+    for finished_row in records:
+        if end is not None and builder.timestamps[finished_row.index] >= end: # stp.RecordFilter.past_end
+            records.close()
+            break
+    stop = builder.length
+    keep = np.ones(stop - start, dtype=bool)
+    if record_filter.has_row_filter():
+        keep &= record_filter_mask(record_filter, builder.timestamps[start:stop],
+                                   builder.int_values['SpTrMsg_position_Z'][start:stop], builder.int_valid['SpTrMsg_position_Z'][start:stop])
+    if record_filter.has_job_filter():
+        cycle_ids = np.where(builder.int_valid['Cycle_ID'][start:stop], builder.int_values['Cycle_ID'][start:stop], -1)
+        done = builder.text_codes['Measurement_Status'][start:stop] == builder.text_categories['Measurement_Status'].get('Done', -2)
+        job_valid = {column: builder.int_valid[column][start:stop] if column in builder.int_valid else builder.text_codes[column][start:stop] >= 0
+                     for column in JOB_FILTER_COLUMNS}
+        keep &= job_filter_mask(record_filter, cycle_ids, done, job_valid, lambda column, position: ColumnarRow(builder, start + position)[column])
+    builder.compact(start, keep)
+
+# Rows of a parsed DataFrame matching the row and job filters of a stp.RecordFilter, for results parsed
+# without the filter, e.g. from the parse cache. Same rows as parse_log_file_columnar with the filter
+def filter_log_data(df_log_data, record_filter):
+    if not (record_filter.has_row_filter() or record_filter.has_job_filter()):
+        return df_log_data
+    keep = np.ones(len(df_log_data), dtype=bool)
+    if record_filter.has_row_filter():
+        z = df_log_data['SpTrMsg_position_Z']
+        keep &= record_filter_mask(record_filter, df_log_data[TIMESTAMP_COLUMN].to_numpy(dtype='datetime64[us]').astype(np.int64),
+                                   z.to_numpy(dtype=float, na_value=0.0), z.notna().to_numpy())
+    if record_filter.has_job_filter():
+        done = (df_log_data['Measurement_Status'] == 'Done').to_numpy(dtype=bool, na_value=False)
+        job_valid = {column: df_log_data[column].notna().to_numpy() for column in JOB_FILTER_COLUMNS}
+        keep &= job_filter_mask(record_filter, df_log_data['Cycle_ID'].to_numpy(dtype=np.int64, na_value=-1), done, job_valid,
+                                lambda column, position: df_log_data[column].iloc[position])
+    kept_positions = np.flatnonzero(keep)
+    columns = {}
+    for column in df_log_data.columns:
+        if column == TIMESTAMP_COLUMN:
+            columns[column] = df_log_data[column].iloc[kept_positions].reset_index(drop=True)
+            continue
+        source, carried = carried_positions(df_log_data[column].notna().to_numpy(), kept_positions)
+        columns[column] = df_log_data[column].iloc[source].reset_index(drop=True).where(carried)
+    return pd.DataFrame(columns)
+
+# Parse a log file to a typed DataFrame with the columns of init_measure_result_data
+# Same rows as pd.DataFrame.from_dict(stp.parse_log_file(log_file)), without the per-row dicts
+# record_filter: optional stp.RecordFilter, no rows of the measurement cycles of another job
+# cycle_index: optional stp.CycleIndex, its row offsets are positions in the DataFrame
+def parse_log_file_columnar(log_file, record_filter=None, cycle_index=None):
+    if record_filter is not None and cycle_index is not None:
+        raise ValueError("a cycle index is built of the unfiltered rows")
+    builder = ColumnarResultBuilder()
+    with SprTrc_profile.stage('parse'):
+        if record_filter is None or record_filter.matches_file(log_file):
+            scan_into_builder(builder, log_file, record_filter, cycle_index)
+    with SprTrc_profile.stage('dataframe'):
+        return builder.to_dataframe()
+
+# Parse a log file one measurement cycle at a time. Yields (Cycle_ID, typed DataFrame) of every
+# cycle in file order, the same rows as parse_log_file_columnar split by Cycle_ID with a fresh
+# index. The rows of every cycle go to a builder of their own, which is dropped when the cycle
+# is yielded: only one cycle and the few open rows of the next are kept in memory.
+# cycle_index: optional stp.CycleIndex, complete for a cycle when it is yielded
+def iter_log_file_cycles(log_file, cycle_index=None):
+    builders = {}
+    def new_row():
+        builder = builders.get(parser.cycle_id)
+        if builder is None:
+            builder = builders[parser.cycle_id] = ColumnarResultBuilder()
+        return builder.new_row()
+    parser = stp.MeasureResultParser(new_row, cycle_index=cycle_index, field_counts=SprTrc_profile.field_counts(), timestamp_us=True)
+
+    cycle_id = None
+    for finished_row in stp.scan_log_file(parser, log_file):
+        if finished_row.builder is not builders.get(cycle_id):
+            if cycle_id in builders:
+                yield cycle_id, builders.pop(cycle_id).to_dataframe()
+            cycle_id = finished_row['Cycle_ID']
+    if cycle_id in builders:
+        yield cycle_id, builders.pop(cycle_id).to_dataframe()
+
+# Parse many log files into one typed DataFrame, file_column holds the index of the file of every row.
+# The rows are forward filled within each file like the per-file analysis does.
+# Returns the DataFrame and a dict of file index: exception of the files that failed to parse
+# record_filter: optional stp.RecordFilter, files of one measurement of another job are skipped after reading their header
+# and only the matching rows of the other files are kept
+def parse_log_files_columnar(log_files, file_column='file_index', record_filter=None):
+    builder = ColumnarResultBuilder()
+    file_lengths = []
+    failed_files = {}
+    for file_index, log_file in enumerate(log_files):
+        length = builder.length
+        with SprTrc_profile.file_profile(log_file), SprTrc_profile.stage('parse'):
+            try:
+                if record_filter is None or record_filter.matches_file(log_file):
+                    scan_into_builder(builder, log_file, record_filter)
+            except Exception as error:
+                builder.truncate(length)
+                failed_files[file_index] = error
+        file_lengths.append(builder.length - length)
+    with SprTrc_profile.stage('dataframe'):
+        df_log_data = builder.to_dataframe()
+    file_indexes = pd.Series(np.repeat(np.arange(len(file_lengths)), file_lengths), index=df_log_data.index)
+    with SprTrc_profile.stage('ffill'):
+        df_log_data = df_log_data.groupby(file_indexes, sort=False).ffill()
+    df_log_data[file_column] = file_indexes
+    return df_log_data, failed_files
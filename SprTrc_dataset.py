@@ -0,0 +1,119 @@
+import os
+import glob
+import importlib.util
+import pandas as pd
+
+# Columnar output of parsed log data as a partitioned Parquet or Feather (Arrow IPC) dataset
+# The rows of every log file go to the partition of its date, lane and task:
+#   <dataset_dir>/date=2024-03-12/lane=7/task=Pick/part-0.parquet
+# so queries of a date, lane or task only read those directories. Files are compressed and the
+# text columns (pandas Categorical) are stored dictionary encoded.
+# pyarrow is imported when a dataset is written or read.
+
+DATASET_FORMATS = ['parquet', 'feather']
+DATASET_COMPRESSION = 'zstd'
+PARTITION_COLUMNS = ['date', 'lane', 'task']
+LOG_FILE_COLUMN = 'log_file_name'
+
+def partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    return ds.partitioning(pa.schema([('date', pa.string()), ('lane', pa.int32()), ('task', pa.string())]), flavor='hive')
+
+def file_format(dataset_format):
+    import pyarrow.dataset as ds
+    if dataset_format == 'parquet':
+        return ds.ParquetFileFormat()
+    elif dataset_format == 'feather':
+        return ds.IpcFileFormat()
+    raise ValueError("Unknown dataset format: {}".format(dataset_format))
+
+# Task name of a task value, e.g. 'Pick' of '1 -  Pick'
+def task_name(task):
+    return task.split('-', 1)[-1].strip() if isinstance(task, str) else None
+
+# Partition values of every row from the first row of its log file
+# df_batch: forward filled log data of many files, group_column identifies the file
+def partition_values(df_batch, group_column):
+    first_rows = df_batch.groupby(group_column, sort=False, observed=True).head(1).set_index(group_column)
+    first_timestamps = first_rows['Timestamp']
+    dates = pd.Series(first_timestamps.dt.strftime('%Y-%m-%d').to_numpy(dtype=object), index=first_rows.index)
+    lanes = first_rows['Lane'].astype('Int32')
+    tasks = pd.Series([task_name(task) for task in first_rows['Task'].astype(object)], index=first_rows.index, dtype=object)
+    groups = df_batch[group_column]
+    return {
+        'date': pd.Categorical(groups.map(dates)),
+        'lane': pd.array(groups.map(lanes), dtype='Int32'),
+        'task': pd.Categorical(groups.map(tasks))
+    }
+
+# Write the log data of many files to a partitioned dataset
+# df_batch: forward filled log data, e.g. from SprTrc_settling.concat_log_data
+# log_file_names: optional name of every group, stored in the log_file_name column
+# Partitions written again replace the old files, other partitions are kept.
+def write_log_dataset(df_batch, dataset_dir, dataset_format='parquet', group_column='file_index', log_file_names=None, compression=DATASET_COMPRESSION):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    df_dataset = df_batch.copy(deep=False)
+    if log_file_names is not None:
+        df_dataset[LOG_FILE_COLUMN] = pd.Categorical.from_codes(df_batch[group_column].to_numpy(), categories=list(log_file_names))
+    for column, values in partition_values(df_batch, group_column).items():
+        df_dataset[column] = values
+    table = pa.Table.from_pandas(df_dataset, preserve_index=False)
+
+    output_format = file_format(dataset_format)
+    if dataset_format == 'parquet':
+        write_options = output_format.make_write_options(compression=compression, use_dictionary=True)
+    else:
+        write_options = output_format.make_write_options(compression=compression)
+    ds.write_dataset(table, dataset_dir, format=output_format, partitioning=partitioning(), file_options=write_options,
+                     basename_template='part-{i}.' + dataset_format, existing_data_behavior='delete_matching')
+
+# Read a partitioned dataset back to a DataFrame
+# dates ('2024-03-12'), lanes and tasks ('Pick') select partitions, a single value or a list.
+# columns: optional subset of the columns to read
+def read_log_dataset(dataset_dir, dataset_format='parquet', columns=None, dates=None, lanes=None, tasks=None):
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(dataset_dir, format=file_format(dataset_format), partitioning=partitioning())
+    partition_filter = None
+    for field, values in [('date', dates), ('lane', lanes), ('task', tasks)]:
+        if values is None:
+            continue
+        values = [values] if isinstance(values, (str, int)) else list(values)
+        if field == 'task':
+            values = [task_name(value) for value in values] # Full task values work too
+        condition = ds.field(field).isin(values)
+        partition_filter = condition if partition_filter is None else partition_filter & condition
+    return dataset.to_table(columns=columns, filter=partition_filter).to_pandas()
+
+TABLE_FILE_TYPES = [("Parquet files", "*.parquet"), ("Feather files", "*.feather"), ("CSV files", "*.csv"), ("Excel files", "*.xlsx")]
+
+# Write a result table by the extension of output_file: .parquet, .feather, .csv or an Excel workbook
+def write_table(df_table, output_file):
+    extension = os.path.splitext(output_file)[1].lower()
+    if extension == '.parquet':
+        df_table.to_parquet(output_file, compression=DATASET_COMPRESSION, index=False)
+    elif extension == '.feather':
+        df_table.reset_index(drop=True).to_feather(output_file, compression=DATASET_COMPRESSION)
+    elif extension == '.csv':
+        df_table.to_csv(output_file, index=False)
+    else:
+        df_table.to_excel(output_file, index=False)
+
+# Read a result table by the extension of input_file: .parquet, .feather, .csv or an Excel workbook.
+# A directory is read as a partitioned dataset of write_log_dataset
+def read_table(input_file):
+    if os.path.isdir(input_file):
+        dataset_format = 'feather' if glob.glob(os.path.join(input_file, '**', '*.feather'), recursive=True) else 'parquet'
+        return read_log_dataset(input_file, dataset_format)
+    extension = os.path.splitext(input_file)[1].lower()
+    if extension == '.parquet':
+        return pd.read_parquet(input_file)
+    elif extension == '.feather':
+        return pd.read_feather(input_file)
+    elif extension == '.csv':
+        # The multithreaded pyarrow CSV reader when it is installed
+        return pd.read_csv(input_file, engine='pyarrow' if importlib.util.find_spec('pyarrow') else 'c')
+    return pd.read_excel(input_file)
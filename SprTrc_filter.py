@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+# Filtering engine of measure result tables, used by the filter GUI and its command line
+# Every filtered column is factorized once into integer codes and its distinct values, kept as
+# the value index of the column. The distinct values fill the value lists of the GUI, and a
+# selection becomes a lookup table over the codes: all selections combine into one boolean
+# mask without converting the rows to text.
+
+class MeasureResultFilter:
+    def __init__(self, df):
+        self.df = df
+        self.value_indexes = {} # column: (codes, distinct values)
+
+    # Integer codes of the rows (-1 for missing values) and the distinct values of a column
+    def value_index(self, column):
+        if column not in self.value_indexes:
+            values = self.df[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+            else:
+                codes, uniques = pd.factorize(values, sort=False, use_na_sentinel=True)
+            self.value_indexes[column] = (codes, uniques)
+        return self.value_indexes[column]
+
+    # Distinct values of a column like Series.unique(): in the order of their first row (category
+    # order for a Categorical column), the missing value included so that it can be selected too
+    def column_values(self, column):
+        codes, uniques = self.value_index(column)
+        values = list(uniques)
+        missing_rows = np.flatnonzero(codes < 0)
+        if len(missing_rows):
+            first_missing = missing_rows[0]
+            if isinstance(self.df[column].dtype, pd.CategoricalDtype):
+                position = len(values)
+            elif first_missing == 0:
+                position = 0
+            else:
+                position = int(codes[:first_missing].max()) + 1 # Codes are numbered in the order of their first row
+            values.insert(position, self.df[column].iloc[first_missing])
+        return values
+
+    # Rows whose column values are among the selected values, compared as text like
+    # df[column].astype(str).isin(map(str, values)). Only the distinct values are converted.
+    # selected_columns: {column: [values]}, columns without values are not filtered
+    def mask(self, selected_columns):
+        mask = np.ones(len(self.df), dtype=bool)
+        for column, values in selected_columns.items():
+            if not values:
+                continue
+            codes, uniques = self.value_index(column)
+            value_texts = [str(value) for value in values]
+            # Lookup table over the codes, the last entry is code -1 (missing value)
+            selected = np.zeros(len(uniques) + 1, dtype=bool)
+            selected[:-1] = pd.Series(uniques).astype(str).isin(value_texts).to_numpy(dtype=bool)
+            missing_rows = np.flatnonzero(codes < 0)
+            if len(missing_rows):
+                # Missing rows match the text of the missing value of column_values ('nan', 'None', '<NA>'),
+                # astype(str) keeps missing values missing since pandas 3
+                selected[-1] = str(self.df[column].iloc[missing_rows[0]]) in value_texts
+            mask &= selected[codes]
+        return mask
+
+    def filter(self, selected_columns):
+        return self.df[self.mask(selected_columns)]
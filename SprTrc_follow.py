@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import locale
+
+import SprTrc_parser as stp
+
+# Follow a growing MeasureResult log and hand every finished measurement row to a callback
+# The file is read by byte offset. Only complete lines are parsed, a partly written last
+# line waits for the next read. The offset and the MeasureResultParser state are saved to
+# the state file after every read, so a restarted follower continues where it stopped.
+# Rows emitted after the last save are emitted again after a crash (at least once delivery).
+# Every poll checks the file for rotation (new inode) and truncation (smaller, or the last bytes
+# read have changed, i.e. truncated and written again past the offset) before reading.
+
+DEFAULT_POLL_INTERVAL = 0.01 # s
+DEFAULT_IDLE_FLUSH = 0.2 # s without new lines before the open rows are emitted
+DEFAULT_REORDER_ROWS = 1 # Open rows of the parser, a row is emitted as soon as the next one starts
+REWRITE_CHECK_BYTES = 64 # Last bytes read, compared with the file on every poll
+
+class LogFollower:
+    # on_row: called with every finished row, e.g. a queue.Queue().put
+    # state_file: JSON file of the read offset and parser state, optional
+    # idle_flush: emit the open rows when the log has been idle this long, None waits for the next row.
+    #   Values logged in the same 2 ms window after an idle flush start a new row.
+    # reorder_rows: open rows of the parser (stp.REORDER_ROWS for files). More rows join values logged
+    #   out of order like parse_log_file does, but a row is only emitted after that many newer rows started.
+    # timestamp_us: the rows have the int microseconds since the epoch as Timestamp instead of a datetime,
+    #   e.g. for SprTrc_settling.PlateauDetector.update_row
+    def __init__(self, log_file, on_row, state_file=None, poll_interval=DEFAULT_POLL_INTERVAL, idle_flush=DEFAULT_IDLE_FLUSH, encoding=None, reorder_rows=DEFAULT_REORDER_ROWS, timestamp_us=False):
+        self.log_file = log_file
+        self.on_row = on_row
+        self.state_file = state_file
+        self.poll_interval = poll_interval
+        self.idle_flush = idle_flush
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.reorder_rows = reorder_rows
+        self.timestamp_us = timestamp_us
+        self.file = None
+        self.file_id = None
+        self.offset = 0
+        self.pending = b'' # Partly written last line
+        self.tail = b'' # Last bytes read, up to REWRITE_CHECK_BYTES
+        self.parser = stp.MeasureResultParser(reorder_rows=self.reorder_rows, timestamp_us=self.timestamp_us)
+        self.last_data_time = time.monotonic()
+        self.load_state()
+
+    # (device, inode) of the log file, changes when the log is rotated
+    def current_file_id(self):
+        stat = os.stat(self.log_file)
+        return stat.st_dev, stat.st_ino
+
+    def load_state(self):
+        if self.state_file is None or not os.path.exists(self.state_file):
+            return
+        with open(self.state_file, 'r') as file:
+            saved_state = json.load(file)
+        try:
+            file_id = self.current_file_id()
+        except FileNotFoundError:
+            return
+        # Resume only in the same, not truncated file
+        if tuple(saved_state['file_id']) == file_id and os.path.getsize(self.log_file) >= saved_state['offset']:
+            self.file_id = file_id
+            self.offset = saved_state['offset']
+            self.parser.load_state(saved_state['parser'])
+
+    def save_state(self):
+        if self.state_file is None:
+            return
+        saved_state = {'log_file': self.log_file, 'file_id': self.file_id, 'offset': self.offset, 'parser': self.parser.save_state()}
+        temp_path = self.state_file + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(saved_state, file)
+        os.replace(temp_path, self.state_file)
+
+    def open(self):
+        self.file = open(self.log_file, 'rb')
+        file_id = (os.fstat(self.file.fileno()).st_dev, os.fstat(self.file.fileno()).st_ino)
+        if file_id != self.file_id: # New file, not the one of the saved state
+            self.restart(file_id)
+        self.file.seek(self.offset)
+
+    # Start parsing a new or truncated file from the beginning
+    def restart(self, file_id):
+        self.emit_rows(self.parser.flush())
+        self.parser = stp.MeasureResultParser(reorder_rows=self.reorder_rows, timestamp_us=self.timestamp_us)
+        self.file_id = file_id
+        self.offset = 0
+        self.pending = b''
+        self.tail = b''
+
+    def emit(self, row):
+        if row is not None:
+            self.on_row(row)
+
+    def emit_rows(self, rows):
+        for row in rows:
+            self.on_row(row)
+
+    # Parse the complete lines of the data read at the current offset
+    def consume(self, data):
+        self.tail = (self.tail + data)[-REWRITE_CHECK_BYTES:]
+        lines = (self.pending + data).split(b'\n')
+        self.pending = lines.pop()
+        for line in lines:
+            self.offset += len(line) + 1
+            self.emit(self.parser.feed(line.rstrip(b'\r').decode(self.encoding, errors='replace') + '\n'))
+
+    # Parse the partly written last line of a file that is not written any more
+    def consume_pending(self):
+        if self.pending:
+            self.consume(b'\n')
+
+    # Whether the file has been truncated since the last read, also when it has been written again past the offset
+    def truncated(self, size):
+        position = self.offset + len(self.pending)
+        if size < position:
+            return True
+        if not self.tail:
+            return False
+        self.file.seek(position - len(self.tail))
+        changed = self.file.read(len(self.tail)) != self.tail
+        self.file.seek(position)
+        return changed
+
+    # Read what has been written since the last poll. Returns True if there were new lines
+    def poll(self):
+        if self.file is None:
+            try:
+                self.open()
+            except FileNotFoundError:
+                return False
+
+        offset = self.offset
+        lines_read = False
+        try:
+            stat = os.stat(self.log_file)
+        except FileNotFoundError: # Rotated, the new file does not exist yet: keep reading the old one
+            stat = None
+        if stat is not None and (stat.st_dev, stat.st_ino) != self.file_id:
+            # Rotated: finish the old file with its partly written last line, continue with the new one
+            self.consume(self.file.read())
+            self.consume_pending()
+            lines_read = self.offset != offset
+            self.file.close()
+            self.open()
+            offset = self.offset
+        elif stat is not None and self.truncated(stat.st_size):
+            # Truncated: start again from the beginning
+            self.restart(self.file_id)
+            self.file.seek(0)
+            offset = self.offset
+
+        data = self.file.read()
+        if data:
+            self.consume(data)
+            lines_read = lines_read or self.offset != offset
+        if not lines_read:
+            return False
+        self.last_data_time = time.monotonic()
+        self.save_state()
+        return True
+
+    # Follow the log until stop() returns True
+    def follow(self, stop=lambda: False):
+        try:
+            while not stop():
+                if not self.poll():
+                    if self.idle_flush is not None and time.monotonic() - self.last_data_time >= self.idle_flush:
+                        self.emit_rows(self.parser.flush())
+                        self.last_data_time = float('inf') # Flush once per idle period
+                        self.save_state()
+                    time.sleep(self.poll_interval)
+        finally:
+            self.close()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+# Print the rows of a followed log as JSON lines
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Follow a growing MeasureResult log and print every finished measurement row")
+    parser.add_argument('log_file', help="MeasureResult log file")
+    parser.add_argument('--state-file', help="Save the read offset and parser state here and resume from it")
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL, help="Seconds between reads when the log is idle")
+    parser.add_argument('--idle-flush', type=float, default=DEFAULT_IDLE_FLUSH, help="Emit the open rows after this many idle seconds")
+    parser.add_argument('--reorder-rows', type=int, default=DEFAULT_REORDER_ROWS, help="Open rows for values logged out of order, a row is emitted after this many newer rows started (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    follower = LogFollower(args.log_file, lambda row: print(json.dumps(row, default=str), flush=True), args.state_file, args.poll_interval, args.idle_flush, reorder_rows=args.reorder_rows)
+    try:
+        follower.follow()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,17 @@
 import os
 import re
-import tkinter as tk
-from tkinter import filedialog
+import glob
+import mmap
+import locale
 from datetime import datetime, timedelta
 from enum import Enum
-import pandas as pd
-import numpy as np
-from scipy.signal import detrend
-from scipy.optimize import curve_fit
-import matplotlib.pyplot as plt
-from matplotlib.ticker import ScalarFormatter
+from functools import lru_cache
+
+import SprTrc_profile
+
+# The parsing core only needs the standard library. pandas, numpy, scipy and matplotlib
+# are imported inside the analysis, plotting and GUI functions that use them, so importing
+# this module (e.g. in pool workers) stays fast.
 
 class ParsingState(Enum):
     INIT            = 0
@@ -21,6 +23,7 @@ def init_measure_result_data():
     measure_result_data ={
         'Timestamp' : None,
         'Measurement_ID' : None,
+        'Cycle_ID' : None,
         'Lane' : None,
         'Task' : None,
         'Position' : None,
@@ -53,421 +56,818 @@ def init_measure_result_data():
     }
     return measure_result_data
 
+# Log timestamp layout: 'dd.mm.yyyy hh:mm:ss;f' with 1-6 fraction digits
+TIMESTAMP_FORMAT = '%d.%m.%Y %H:%M:%S;%f'
+
+# 'dd.mm.yyyy' -> (year, month, day). The date is the same for thousands of consecutive lines
+@lru_cache(maxsize=64)
+def decode_log_date(date_text):
+    return int(date_text[6:10]), int(date_text[3:5]), int(date_text[0:2])
+
+# Slice-and-int decoder for the fixed layout, same result as datetime.strptime(match_timestamp, TIMESTAMP_FORMAT)
 def parse_timestamp(match_timestamp):
-    return datetime.strptime(match_timestamp, '%d.%m.%Y %H:%M:%S;%f')
+    fraction = match_timestamp[20:]
+    if not 0 < len(fraction) <= 6:
+        return datetime.strptime(match_timestamp, TIMESTAMP_FORMAT) # Raises the strptime error for the odd input
+    year, month, day = decode_log_date(match_timestamp[:10])
+    return datetime(year, month, day,
+                    int(match_timestamp[11:13]), int(match_timestamp[14:16]), int(match_timestamp[17:19]),
+                    int(fraction) * 10 ** (6 - len(fraction))) # '%f' pads the fraction digits on the right
 
-def parse_log_file(log_file):
-    parsed_data = []
-    
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+MICROSECONDS_PER_DAY = 86_400_000_000
+
+# 'dd.mm.yyyy' -> microseconds from 1970-01-01 to the start of the day
+@lru_cache(maxsize=64)
+def log_date_us(date_text):
+    year, month, day = decode_log_date(date_text)
+    return (datetime(year, month, day) - EPOCH).days * MICROSECONDS_PER_DAY
+
+# Timestamp text (str or bytes) -> int64 microseconds since 1970-01-01 (log local time),
+# the same instant as parse_timestamp without building a datetime
+def parse_timestamp_us(match_timestamp):
+    fraction = match_timestamp[20:]
+    hour, minute, second = int(match_timestamp[11:13]), int(match_timestamp[14:16]), int(match_timestamp[17:19])
+    if not 0 < len(fraction) <= 6 or hour > 23 or minute > 59 or second > 59:
+        if isinstance(match_timestamp, bytes):
+            match_timestamp = match_timestamp.decode('ascii')
+        return (parse_timestamp(match_timestamp) - EPOCH) // ONE_MICROSECOND # Raises the strptime error for the odd input
+    return log_date_us(match_timestamp[:10]) + ((hour * 60 + minute) * 60 + second) * 1_000_000 + int(fraction) * 10 ** (6 - len(fraction))
+
+def timestamp_from_us(timestamp_us):
+    return EPOCH + timedelta(microseconds=timestamp_us)
+
+# Bulk variant for already extracted timestamp strings. Decodes the whole column at once
+# to int64 microseconds since 1970-01-01 (log local time), view as 'datetime64[us]' if needed.
+def decode_timestamps_us(timestamps):
+    import numpy as np
+    raw = np.asarray(timestamps, dtype='S27') # 20 fixed characters + up to 6 fraction digits, one extra to detect overflow
+    if len(raw) == 0:
+        return np.zeros(0, dtype=np.int64)
+    chars = raw.view(np.uint8).reshape(len(raw), 27).astype(np.int64)
+    if chars[:, 26].any() or not chars[:, 20].all():
+        raise ValueError("timestamp fraction must have 1 to 6 digits")
+    fraction = chars[:, 20:26]
+    fraction[fraction == 0] = ord('0') # '%f' pads the fraction digits on the right
+    digits = chars - ord('0')
+    digit_columns = [0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15, 17, 18, 20, 21, 22, 23, 24, 25]
+    if ((digits[:, digit_columns] < 0) | (digits[:, digit_columns] > 9)).any():
+        raise ValueError("timestamps do not match format '{}'".format(TIMESTAMP_FORMAT))
+
+    day = digits[:, 0] * 10 + digits[:, 1]
+    month = digits[:, 3] * 10 + digits[:, 4]
+    year = digits[:, 6] * 1000 + digits[:, 7] * 100 + digits[:, 8] * 10 + digits[:, 9]
+    hour = digits[:, 11] * 10 + digits[:, 12]
+    minute = digits[:, 14] * 10 + digits[:, 15]
+    second = digits[:, 17] * 10 + digits[:, 18]
+    microsecond = digits[:, 20:26] @ np.array([100000, 10000, 1000, 100, 10, 1], dtype=np.int64)
+    if ((month < 1) | (month > 12) | (year < 1) | (hour > 23) | (minute > 59) | (second > 59)).any():
+        raise ValueError("timestamp field out of range")
+    leap_year = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    days_in_month = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])[month - 1] + ((month == 2) & leap_year)
+    if ((day < 1) | (day > days_in_month)).any():
+        raise ValueError("day is out of range for month")
+
+    # Days since 1970-01-01 from the civil date
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    days = era * 146097 + day_of_era - 719468
+
+    return ((days * 24 + hour) * 60 + minute) * 60_000_000 + second * 1_000_000 + microsecond
+
+# Text encoding of the logs, the same open() uses for text files
+LOG_ENCODING = locale.getpreferredencoding(False)
+
+# Shared prefix of every log line: 'dd.mm.yyyy hh:mm:ss;ms;n; ; ;S;'
+# Group 1 is the timestamp, the field text starts right after the match
+LOG_LINE_PREFIX_PATTERN = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S;')
+
+# Start of the TLMS measurement
+MEASUREMENT_START_PATTERN = re.compile(r' - ASCCS Start Measurement Message received')
+
+# End of the TLMS measurement: Measurement finished OR Spreader Tracking Message received OR Spreader tracking results
+MEASUREMENT_END_PATTERN = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Measurement finished| - Spreader Tracking Message received|Spreader tracking results:')
+
+# Field value handlers. Each handler stores the values captured after the field group 'index' into the data row
+def store_text(data, columns, key_match, index):
+    data[columns] = key_match.group(index + 1).strip()
+
+def store_raw_text(data, columns, key_match, index):
+    data[columns] = key_match.group(index + 1)
+
+def store_int(data, columns, key_match, index):
+    data[columns] = int(key_match.group(index + 1))
+
+def store_ints(data, columns, key_match, index):
+    # One column per captured value, e.g. Point Center X/Y/Z
+    for offset, column in enumerate(columns, start=1):
+        data[column] = int(key_match.group(index + offset))
+
+def store_keyed_int(data, columns, key_match, index):
+    # First captured value selects the column, second one is the value, e.g. Cont. Length/Width/Height
+    data[columns[key_match.group(index + 1)]] = int(key_match.group(index + 2))
+
+# Text handlers of the bytes patterns, int() takes bytes as they are
+def store_bytes_text(data, columns, key_match, index):
+    data[columns] = key_match.group(index + 1).decode(LOG_ENCODING, errors='replace').strip()
+
+def store_bytes_raw_text(data, columns, key_match, index):
+    data[columns] = key_match.group(index + 1).decode(LOG_ENCODING, errors='replace')
+
+BYTES_HANDLERS = {store_text: store_bytes_text, store_raw_text: store_bytes_raw_text}
+
+# TLMS trailer/container measurement values: (field pattern after the line prefix, data column(s), handler)
+TLMS_MEASUREMENT_FIELDS = [
+    (r' - Measurement ID:\s*(.*?)$', 'Measurement_ID', store_text),
+    (r' - Lane:\s*(\d*)', 'Lane', store_int),
+    (r' - Task:\s*(\d*\s*-\s*[\w ]*)', 'Task', store_text),
+    (r' - Pos:\s*(\d*\s*-\s*[\w ]*)', 'Position', store_text),
+    (r' - Len:\s*(.*?)$', 'Chassis_length', store_text),
+    (r' - Type:\s*(\d*\s*-\s*[\w ]*)', 'Chassis_type', store_text),
+    (r' - Cont\.\s*(Length|Width|Height):\s*(\d*)', {'Length': 'Cont_Length', 'Width': 'Cont_Width', 'Height': 'Cont_Height'}, store_keyed_int),
+    (r' - LaneStat\s*-\s*(\w*)', 'Lane_Status', store_text),
+    (r' -  \| MeasStat\s*-\s*(\w*)', 'Measurement_Status', store_text),
+    (r' - Assuming\s*([\w_]*)', 'Assumed_trailer', store_text),
+    (r' - Point Center X\/Y\/Z:\s*(\d*) / (\d*) / (\d*)', ('Point_Center_X', 'Point_Center_Y', 'Point_Center_Z'), store_ints),
+    (r' - Skew:\s*(-?\d*)', 'Skew', store_int),
+    (r' - Tilt\s*(-?\d*)', 'Tilt', store_int),
+    (r' -- Number of detected twist locks \(TL\):\s*(\d*)', 'Nr_of_detected_TL', store_int),
+]
+
+# Spreader tracking message and result values: (field pattern after the line prefix, data column(s), handler)
+SPREADER_TRACKING_FIELDS = [
+    (r' - Spreader (length|position [XYZ]|position Angle):\s*(-?\d*)', {'length': 'SpTrMsg_length', 'position X': 'SpTrMsg_position_X', 'position Y': 'SpTrMsg_position_Y', 'position Z': 'SpTrMsg_position_Z', 'position Angle': 'SpTrMsg_position_Skew'}, store_keyed_int),
+    (r' - TLMS Status:\s*(\d*)', 'SpTrRes_TLMS_Status', store_int),
+    (r' - Spreader calc\. (position X|position Y|Skew):\s*(-?\d*)', {'position X': 'SpTrRes_calc_X', 'position Y': 'SpTrRes_calc_Y', 'Skew': 'SpTrRes_calc_Skew'}, store_keyed_int),
+    (r' - Calc\. reliability:\s*(\d*)', 'SpTrRes_Reliability', store_int),
+    (r' - Error/Event code:\s*(\d*)', 'SpTrRes_Event_code', store_int),
+    (r' - Error/Event description:\s*([a-zA-Z -]+)', 'SpTrRes_Event_desc', store_raw_text),
+]
+
+def compile_field_dispatch(fields, prefix=''):
+    # Combine the field patterns into one alternation. Every alternative is wrapped in its own group,
+    # so the index of the matched field is key_match.lastindex and its values follow that group.
+    alternatives = []
+    dispatch = {}
+    index = 1 + re.compile(prefix).groups
+    for field_pattern, columns, handler in fields:
+        alternatives.append('(' + field_pattern + ')')
+        dispatch[index] = (columns, handler)
+        index += 1 + re.compile(field_pattern).groups
+    return re.compile(prefix + '(?:' + '|'.join(alternatives) + ')'), dispatch
+
+def compile_bytes_field_dispatch(fields, prefix=''):
+    # Same as compile_field_dispatch for scanning a whole bytes buffer instead of single lines:
+    # whitespace does not cross line ends, '$' matches at every line end and the value keys are bytes
+    bytes_fields = []
+    for field_pattern, columns, handler in fields:
+        if isinstance(columns, dict):
+            columns = {key.encode('ascii'): column for key, column in columns.items()}
+        bytes_fields.append((field_pattern.replace(r'\s', r'[^\S\n]'), columns, BYTES_HANDLERS.get(handler, handler)))
+    pattern, dispatch = compile_field_dispatch(bytes_fields, prefix.replace(r'\s', r'[^\S\n]'))
+    return re.compile(pattern.pattern.encode('ascii'), re.MULTILINE), dispatch
+
+TLMS_MEASUREMENT_PATTERN, TLMS_MEASUREMENT_DISPATCH = compile_field_dispatch(TLMS_MEASUREMENT_FIELDS)
+SPREADER_TRACKING_PATTERN, SPREADER_TRACKING_DISPATCH = compile_field_dispatch(SPREADER_TRACKING_FIELDS)
+
+# Name of a field pattern in the profile: its data column(s)
+def field_name(columns):
+    if isinstance(columns, str):
+        return columns
+    return '/'.join(columns.values() if isinstance(columns, dict) else columns)
+
+# Same dispatch with handlers that also count the matched lines of every field in field_counts
+def counting_dispatch(dispatch, field_counts):
+    counted = {}
+    for index, (columns, handler) in dispatch.items():
+        name = field_name(columns)
+        field_counts.setdefault(name, 0)
+        def count_and_store(data, columns, key_match, index, handler=handler, name=name):
+            field_counts[name] += 1
+            handler(data, columns, key_match, index)
+        counted[index] = (columns, count_and_store)
+    return counted
+
+# Whole-buffer scanner patterns: line prefix (group 1 = timestamp) followed by a field
+MEASUREMENT_START_SCAN_PATTERN = re.compile((LOG_LINE_PREFIX_PATTERN.pattern + MEASUREMENT_START_PATTERN.pattern).encode('ascii'))
+SPREADER_TRACKING_SCAN_PATTERN, SPREADER_TRACKING_SCAN_DISPATCH = compile_bytes_field_dispatch(SPREADER_TRACKING_FIELDS, LOG_LINE_PREFIX_PATTERN.pattern)
+
+TIMESTAMP_WINDOW_US = 2000 # Values logged within 2 ms of the timestamp of a row belong to that row
+REORDER_ROWS = 4 # Rows kept open for values that are logged out of order
+
+# Incremental MeasureResult parser. Lines are fed one by one and every value goes to the open row
+# whose timestamp is within TIMESTAMP_WINDOW_US of it, or to a new row. The last reorder_rows rows
+# stay open, so a value logged after values of a later row still joins its own row instead of
+# starting a fragment row. The oldest open row is finished when a new row exceeds reorder_rows.
+# The rows are finished in the order they were started. reorder_rows=1 only merges into the latest row.
+# Timestamps are compared as int microseconds, a datetime is built once per row unless timestamp_us.
+# Every "ASCCS Start Measurement" line starts a new measurement cycle, also after the spreader
+# tracking values of an earlier one: the rows are tagged with the Cycle_ID of their measurement,
+# 0 for the first one of the file.
+# new_row: factory of the empty data rows, e.g. SprTrc_columnar.ColumnarResultBuilder.new_row
+# cycle_index: optional CycleIndex, built from the parsing state transitions and the finished rows
+# field_counts: optional dict, the matched lines of every field are counted in it (SprTrc_profile)
+# timestamp_us: the rows get the int microseconds since the epoch as Timestamp instead of a datetime,
+#   e.g. for SprTrc_columnar.ColumnarRow or a SprTrc_settling.PlateauDetector
+class MeasureResultParser:
+    def __init__(self, new_row=init_measure_result_data, reorder_rows=REORDER_ROWS, cycle_index=None, field_counts=None, timestamp_us=False):
+        self.new_row = new_row
+        self.row_timestamp = int if timestamp_us else timestamp_from_us
+        self.reorder_rows = reorder_rows
+        self.cycle_index = cycle_index
+        self.tlms_dispatch = TLMS_MEASUREMENT_DISPATCH
+        self.tracking_dispatch = SPREADER_TRACKING_DISPATCH
+        self.tracking_scan_dispatch = SPREADER_TRACKING_SCAN_DISPATCH
+        if field_counts is not None:
+            self.tlms_dispatch = counting_dispatch(TLMS_MEASUREMENT_DISPATCH, field_counts)
+            self.tracking_dispatch = counting_dispatch(SPREADER_TRACKING_DISPATCH, field_counts)
+            self.tracking_scan_dispatch = counting_dispatch(SPREADER_TRACKING_SCAN_DISPATCH, field_counts)
+        self.state = ParsingState.INIT
+        self.field_pattern = TLMS_MEASUREMENT_PATTERN
+        self.field_dispatch = self.tlms_dispatch
+        self.open_rows = [] # [timestamp_us, row, row number] of the open rows, oldest first
+        self.current_row = None # Row of the last stored value
+        self.row_count = 0 # Rows started
+        self.cycle_id = None # Cycle_ID of the current measurement, None before the first one
+
+    # Parse one log line. Returns the row closed by this line or None
+    def feed(self, log_line):
+        if self.state == ParsingState.INIT:
+            self.state = ParsingState.SEARCH_TLMS_MEASUREMENT_START
+
+        # Split off the shared line prefix once
+        prefix_match = LOG_LINE_PREFIX_PATTERN.search(log_line)
+
+        if self.state == ParsingState.SEARCH_TLMS_MEASUREMENT_START:
+            if prefix_match and MEASUREMENT_START_PATTERN.match(log_line, prefix_match.end()):
+                return self.start_measurement(parse_timestamp_us(prefix_match.group(1)))
+            return None
+
+        # Pick the field handler with one combined pattern
+        key_match = self.field_pattern.match(log_line, prefix_match.end()) if prefix_match else None
+        if key_match:
+            return self.store_field(parse_timestamp_us(prefix_match.group(1)), key_match, self.field_dispatch)
+
+        # Start of the next measurement in the same file
+        if prefix_match and MEASUREMENT_START_PATTERN.match(log_line, prefix_match.end()):
+            return self.start_measurement(parse_timestamp_us(prefix_match.group(1)))
+
+        # Search for end of TLMS measurement
+        if self.state == ParsingState.SEARCH_TLMS_MEASUREMENT_VALUES and MEASUREMENT_END_PATTERN.search(log_line):
+            self.state = ParsingState.SEARCH_SPREADER_TRACKING_VALUES
+            self.field_pattern = SPREADER_TRACKING_PATTERN
+            self.field_dispatch = self.tracking_dispatch
+            if self.cycle_index is not None:
+                self.cycle_index.start_tracking(self.row_count)
+        return None
+
+    # Start a measurement cycle with a new row at timestamp_us, values of the previous cycle
+    # never join it. Returns the row finished by it or None
+    def start_measurement(self, timestamp_us):
+        self.cycle_id = 0 if self.cycle_id is None else self.cycle_id + 1
+        finished_row = self.start_row(timestamp_us)
+        if self.cycle_index is not None:
+            self.cycle_index.start_measurement(self.open_rows[-1][2])
+        self.state = ParsingState.SEARCH_TLMS_MEASUREMENT_VALUES
+        self.field_pattern = TLMS_MEASUREMENT_PATTERN
+        self.field_dispatch = self.tlms_dispatch
+        return finished_row
+
+    # Store the values of a matched field at timestamp_us. Returns the row finished by it or None
+    def store_field(self, timestamp_us, key_match, field_dispatch):
+        columns, handler = field_dispatch[key_match.lastindex]
+        finished_row = None
+        open_row = self.find_open_row(timestamp_us)
+        if open_row is not None:
+            self.current_row = open_row[1]
+        else: # There is no data with this timestamp
+            finished_row = self.start_row(timestamp_us)
+        handler(self.current_row, columns, key_match, key_match.lastindex)
+        return finished_row
+
+    # [timestamp_us, row] of the open row within the timestamp window, the latest row first
+    def find_open_row(self, timestamp_us):
+        for open_row in reversed(self.open_rows):
+            if abs(timestamp_us - open_row[0]) < TIMESTAMP_WINDOW_US:
+                return open_row
+        return None
+
+    # Open a new data row. Returns the oldest open row if it is finished by this one, or None
+    def start_row(self, timestamp_us):
+        self.current_row = self.new_row()
+        self.current_row['Timestamp'] = self.row_timestamp(timestamp_us)
+        if self.cycle_id is not None:
+            self.current_row['Cycle_ID'] = self.cycle_id
+        self.open_rows.append([timestamp_us, self.current_row, self.row_count])
+        self.row_count += 1
+        if len(self.open_rows) > self.reorder_rows:
+            return self.finish_row(self.open_rows.pop(0)[1])
+        return None
+
+    def finish_row(self, row):
+        if self.cycle_index is not None:
+            self.cycle_index.add_row(row)
+        return row
+
+    # End of input. Returns the open rows, or an empty row if nothing was parsed
+    def close(self):
+        last_rows = self.flush()
+        if not last_rows:
+            self.row_count += 1
+            last_rows = [self.finish_row(self.new_row())]
+        if self.cycle_index is not None:
+            self.cycle_index.close()
+        return last_rows
+
+    # Finish the open rows without waiting for later values. Returns the rows, oldest first
+    def flush(self):
+        open_rows = [self.finish_row(row) for _, row, _ in self.open_rows]
+        self.open_rows = []
+        self.current_row = None
+        return open_rows
+
+    # JSON serializable parser state, to continue parsing after a restart (dict rows only)
+    def save_state(self):
+        open_rows = []
+        for timestamp_us, row, _ in self.open_rows:
+            saved_row = dict(row)
+            saved_row['Timestamp'] = timestamp_from_us(timestamp_us).isoformat()
+            open_rows.append(saved_row)
+        return {'state': self.state.name, 'cycle_id': self.cycle_id, 'open_rows': open_rows}
+
+    def load_state(self, saved_state):
+        self.state = ParsingState[saved_state['state']]
+        self.cycle_id = saved_state.get('cycle_id')
+        if self.cycle_id is None and self.state in (ParsingState.SEARCH_TLMS_MEASUREMENT_VALUES, ParsingState.SEARCH_SPREADER_TRACKING_VALUES):
+            self.cycle_id = 0 # State saved before the cycles were counted
+        if self.state == ParsingState.SEARCH_SPREADER_TRACKING_VALUES:
+            self.field_pattern = SPREADER_TRACKING_PATTERN
+            self.field_dispatch = self.tracking_dispatch
+        else:
+            self.field_pattern = TLMS_MEASUREMENT_PATTERN
+            self.field_dispatch = self.tlms_dispatch
+        self.open_rows = []
+        self.current_row = None
+        saved_rows = saved_state.get('open_rows')
+        if saved_rows is None: # State saved with a single open row
+            saved_rows = [saved_state['current_row']] if saved_state.get('current_row') is not None else []
+        for saved_row in saved_rows:
+            row = self.new_row()
+            timestamp_us = (datetime.fromisoformat(saved_row['Timestamp']) - EPOCH) // ONE_MICROSECOND
+            for column, value in saved_row.items():
+                if value is not None:
+                    row[column] = self.row_timestamp(timestamp_us) if column == 'Timestamp' else value
+            self.open_rows.append([timestamp_us, row, self.row_count])
+            self.row_count += 1
+            self.current_row = row
+
+# Index of the measurement cycles of a parsed log, so analyses can go to the rows they need
+# instead of scanning the whole table. cycles holds a dict per measurement with row offsets into
+# the parsed rows (positions in the DataFrame of the file), None when there is no such row:
+#   start_row, end_row: rows of the cycle, from the row of the measurement start, end exclusive
+#   tracking_row: first row started after the TLMS measurement values
+#   first_done_row: first row with Measurement_Status 'Done'
+#   first_valid_row: first row with SpTrRes_Event_code 5 (tracking valid)
+#   z_bands: {band: [(start_row, end_row), ...]} runs of rows whose forward filled
+#     SpTrMsg_position_Z is within the band, both limits included
+# The values are forward filled within a cycle, like the rows of iter_measurement_cycles.
+# z_bands: optional function of the forward filled values of the first Done row of a cycle
+# ({column: value}), returning {band: (low, high)}. Rows are checked from the first Done row on.
+class CycleIndex:
+    def __init__(self, z_bands=None):
+        self.z_bands = z_bands
+        self.cycles = []
+        self.row_count = 0 # Rows added
+        self.values = {column: None for column in CYCLE_INDEX_COLUMNS} # Forward filled values
+        self.bands = [] # Band limits of every cycle, None until its Done row
+        self.runs = [] # Start row of the open run of every band of every cycle
+        self.closed_cycles = 0 # Cycles whose rows are all added
+
+    def start_measurement(self, row_number):
+        if self.cycles:
+            self.cycles[-1]['end_row'] = row_number
+        self.cycles.append({'cycle': len(self.cycles), 'start_row': row_number, 'end_row': None, 'tracking_row': None,
+                            'first_done_row': None, 'first_valid_row': None, 'z_bands': {}})
+        self.bands.append(None)
+        self.runs.append({})
+
+    def start_tracking(self, row_number):
+        if self.cycles and self.cycles[-1]['tracking_row'] is None:
+            self.cycles[-1]['tracking_row'] = row_number
+
+    # Rows are added in their order in the parsed output
+    def add_row(self, row):
+        row_number = self.row_count
+        self.row_count += 1
+
+        # Cycle of the row, rows of a previous cycle may finish after the next one started
+        cycle_number = len(self.cycles) - 1
+        while cycle_number >= 0 and self.cycles[cycle_number]['start_row'] > row_number:
+            cycle_number -= 1
+        if cycle_number < 0:
+            return
+        while self.closed_cycles < cycle_number: # Rows of the earlier cycles are all added
+            self.close_cycle(self.closed_cycles)
+            self.values = {column: None for column in CYCLE_INDEX_COLUMNS} # Forward filled within a cycle
+        cycle = self.cycles[cycle_number]
+        if cycle['first_done_row'] is None:
+            # The job values are only needed up to the first Done row
+            values = self.values
+            for column in CYCLE_INDEX_COLUMNS:
+                value = row[column]
+                if value is not None:
+                    values[column] = value
+        if cycle['first_valid_row'] is None and row['SpTrRes_Event_code'] == 5:
+            cycle['first_valid_row'] = row_number
+        if cycle['first_done_row'] is None:
+            if row['Measurement_Status'] != 'Done':
+                return
+            cycle['first_done_row'] = row_number
+            if self.z_bands is not None:
+                self.bands[cycle_number] = self.z_bands(dict(self.values))
+                for band in self.bands[cycle_number]:
+                    cycle['z_bands'][band] = []
+
+        bands = self.bands[cycle_number]
+        if bands:
+            z = row['SpTrMsg_position_Z']
+            if z is None:
+                z = self.values['SpTrMsg_position_Z']
+            else:
+                self.values['SpTrMsg_position_Z'] = z
+            runs = self.runs[cycle_number]
+            for band, (low, high) in bands.items():
+                inside = z is not None and low <= z <= high
+                if inside and band not in runs:
+                    runs[band] = row_number
+                elif not inside and band in runs:
+                    cycle['z_bands'][band].append((runs.pop(band), row_number))
+
+    # End the open Z band runs of a cycle at its last row
+    def close_cycle(self, cycle_number):
+        cycle = self.cycles[cycle_number]
+        if cycle['end_row'] is None:
+            cycle['end_row'] = self.row_count
+        for band, start_row in self.runs[cycle_number].items():
+            cycle['z_bands'][band].append((start_row, cycle['end_row']))
+        self.runs[cycle_number] = {}
+        self.closed_cycles = cycle_number + 1
+
+    # End of the parsed rows
+    def close(self):
+        while self.closed_cycles < len(self.cycles):
+            self.close_cycle(self.closed_cycles)
+
+    # A cycle with its row offsets counted from its start row, for the rows of one cycle
+    # (SprTrc_columnar.iter_log_file_cycles)
+    def local_cycle(self, cycle_number):
+        cycle = self.cycles[cycle_number]
+        offset = cycle['start_row']
+        local_cycle = {column: value - offset if column.endswith('_row') and value is not None else value for column, value in cycle.items()}
+        local_cycle['z_bands'] = {band: [(start_row - offset, end_row - offset) for start_row, end_row in runs] for band, runs in cycle['z_bands'].items()}
+        return local_cycle
+
+# Forward filled columns of the cycle index, the values of the z_bands functions
+CYCLE_INDEX_COLUMNS = ['Task', 'Cont_Height', 'Point_Center_Z', 'Measurement_Status', 'SpTrMsg_position_Z']
+
+# Yield the measurement data rows of a log file one by one as their timestamp window closes
+def iter_measurement_records(log_file):
+    parser = MeasureResultParser()
     with open(log_file, 'r') as file:
-        log_lines = file.readlines()
-    
-    # Search and store TLMS trailer/container measurement values
-
-    state = ParsingState.INIT
-    for log_line in log_lines:
-        data = init_measure_result_data() # Store data and status values
-        if state == ParsingState.INIT:
-            state = ParsingState.SEARCH_TLMS_MEASUREMENT_START
-        if state == ParsingState.SEARCH_TLMS_MEASUREMENT_START:
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - ASCCS Start Measurement Message received')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = key_match.group(1)
-                timestamp = parse_timestamp(timestamp)
-                if check_timestamp(parsed_data, timestamp): # Check if there is already data with found timestamp
-                    parsed_data[-1]['Timestamp'] = timestamp # Add timestamp to the last data row if there is already data with this timestamp
-                else: # There is no data with this timestamp
-                    data['Timestamp'] = timestamp
-                    parsed_data.append(data)
-                # print(f"Timestamp: {timestamp}, ASCCS Start Measurement Message received")
-                state = ParsingState.SEARCH_TLMS_MEASUREMENT_VALUES
-
-        elif state == ParsingState.SEARCH_TLMS_MEASUREMENT_VALUES:
-
-            # Search for the TLMS measurement job
-            # Measurement_ID
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Measurement ID:\s*(.*?)$')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                if check_timestamp(parsed_data, timestamp): # Check if there is already data with found timestamp
-                    parsed_data[-1]['Measurement_ID'] = str(key_match.group(2)).strip() # Add Measurement_ID to the last data row if there is already data with this timestamp
-                else: # There is no data with this timestamp
-                    data['Timestamp'] = timestamp # Store timestamp
-                    data['Measurement_ID'] = str(key_match.group(2)).strip() # Store Measurement_ID
-                    parsed_data.append(data) # Append data to the list
-                continue            
-
-            # Search for the TLMS measurement job
-            # Lane
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Lane:\s*(\d*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                if check_timestamp(parsed_data, timestamp):
-                    parsed_data[-1]['Lane'] = int(key_match.group(2))
-                else:
-                    data['Timestamp'] = timestamp
-                    data['Lane'] = int(key_match.group(2))
-                    parsed_data.append(data)
-                continue
+        for log_line in file:
+            finished_row = parser.feed(log_line)
+            if finished_row is not None:
+                yield finished_row
+    yield from parser.close()
 
-            # Search for the TLMS measurement job
-            # Task
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Task:\s*(\d*\s*-\s*[\w ]*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                if check_timestamp(parsed_data, timestamp):
-                    parsed_data[-1]['Task'] = str(key_match.group(2)).strip()
-                else:
-                    data['Timestamp'] = timestamp
-                    data['Task'] = str(key_match.group(2)).strip()
-                    parsed_data.append(data)
-                continue
+# Job information of a measurement, values of its first data row
+JOB_INFO_COLUMNS = ['Timestamp', 'Lane', 'Task', 'Position', 'Chassis_length', 'Chassis_type', 'Cont_Length', 'Cont_Width', 'Cont_Height']
+PROBE_MAX_LINES = 5000 # Lines read by the header probe at most, e.g. when the end of the TLMS values is missing
 
-            # Search for the TLMS measurement job
-            # Position
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Pos:\s*(\d*\s*-\s*[\w ]*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                if check_timestamp(parsed_data, timestamp):
-                    parsed_data[-1]['Position'] = str(key_match.group(2)).strip()
-                else:
-                    data['Timestamp'] = timestamp
-                    data['Position'] = str(key_match.group(2)).strip()
-                    parsed_data.append(data)
-                continue
+# Parse only the TLMS measurement values at the start of a log file: reading stops when the
+# values block is complete. Returns the rows parsed so far, the last one still open.
+# The rows hold the same TLMS values as the first rows of parse_log_file.
+def probe_log_header(log_file, max_lines=PROBE_MAX_LINES):
+    parser = MeasureResultParser()
+    rows = []
+    with open(log_file, 'r') as file:
+        for line_number, log_line in enumerate(file):
+            finished_row = parser.feed(log_line)
+            if finished_row is not None:
+                rows.append(finished_row)
+            if parser.state == ParsingState.SEARCH_SPREADER_TRACKING_VALUES or line_number + 1 >= max_lines:
+                break
+    rows.extend(parser.close())
+    return rows
 
-            # Search for the TLMS measurement job
-            # Chassis length
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Len:\s*(.*?)$')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                if check_timestamp(parsed_data, timestamp):
-                    parsed_data[-1]['Chassis_length'] = str(key_match.group(2)).strip()
-                else:
-                    data['Timestamp'] = timestamp
-                    data['Chassis_length'] = str(key_match.group(2)).strip()
-                    parsed_data.append(data)
-                continue
+# JOB_INFO_COLUMNS of the first measurement of a log file, from the header only, see cycle_job_info
+def probe_job_info(log_file):
+    return cycle_job_info(probe_log_header(log_file))
 
-            # Search for the TLMS measurement job
-            # Chassis type
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Type:\s*(\d*\s*-\s*[\w ]*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                if check_timestamp(parsed_data, timestamp):
-                    parsed_data[-1]['Chassis_type'] = str(key_match.group(2)).strip()
-                else:
-                    data['Timestamp'] = timestamp
-                    data['Chassis_type'] = str(key_match.group(2)).strip()
-                    parsed_data.append(data)
-                continue
+# JOB_INFO_COLUMNS of a measurement cycle from its rows: the Timestamp of the first row and the job
+# values forward filled up to the first 'Done' row, or the last row without one. A job line logged
+# after the timestamp window of the first row is in a later row of the cycle.
+def cycle_job_info(rows):
+    job_info = dict.fromkeys(JOB_INFO_COLUMNS)
+    for row in rows:
+        for column in JOB_INFO_COLUMNS:
+            if row[column] is not None and (job_info[column] is None or column != 'Timestamp'):
+                job_info[column] = row[column]
+        if row['Measurement_Status'] == 'Done':
+            break
+    return job_info
 
-            # Search for the TLMS measurement job
-            # Container length, width, height
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Cont\.\s*(Length|Width|Height):\s*(\d*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                # Check if there is already data with found timestamp
-                if check_timestamp(parsed_data, timestamp):
-                    # There is already data with this timestamp
-                    if key_match.group(2) == "Length":
-                        parsed_data[-1]['Cont_Length'] = int(key_match.group(3))
-                    elif key_match.group(2) == "Width":
-                        parsed_data[-1]['Cont_Width'] = int(key_match.group(3))
-                    elif key_match.group(2) == "Height":
-                        parsed_data[-1]['Cont_Height'] = int(key_match.group(3))
-                else:
-                    data['Timestamp'] = timestamp
-                    if key_match.group(2) == "Length":
-                        data['Cont_Length'] = int(key_match.group(3))
-                    elif key_match.group(2) == "Width":
-                        data['Cont_Width'] = int(key_match.group(3))
-                    elif key_match.group(2) == "Height":
-                        data['Cont_Height'] = int(key_match.group(3))
-                    parsed_data.append(data)
-                continue
+# Same rows as iter_measurement_records from a memory-mapped file. The few header lines are
+# parsed line by line, the spreader tracking values with one bytes regex pass over the mapped
+# buffer: lines without a tracking field are skipped by the regex engine and only the
+# extracted values are decoded.
+# new_row, timestamp_us: the data rows, see MeasureResultParser
+def scan_measurement_records(log_file, new_row=init_measure_result_data, cycle_index=None, timestamp_us=False):
+    yield from scan_log_file(MeasureResultParser(new_row, cycle_index=cycle_index, field_counts=SprTrc_profile.field_counts(), timestamp_us=timestamp_us), log_file)
 
-            # Search for the TLMS measurement job
-            # Lane status
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - LaneStat\s*-\s*(\w*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                if check_timestamp(parsed_data, timestamp):
-                    parsed_data[-1]['Lane_Status'] = str(key_match.group(2)).strip()
-                else:
-                    data['Timestamp'] = timestamp
-                    data['Lane_Status'] = str(key_match.group(2)).strip()
-                    parsed_data.append(data)
-                continue            
-
-            # Search for the TLMS measurement job
-            # Measurement status
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; -  \| MeasStat\s*-\s*(\w*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                if check_timestamp(parsed_data, timestamp):
-                    parsed_data[-1]['Measurement_Status'] = str(key_match.group(2)).strip()
-                else:
-                    data['Timestamp'] = timestamp
-                    data['Measurement_Status'] = str(key_match.group(2)).strip()
-                    parsed_data.append(data)
-                continue 
-
-            # Measurement result
-            # Assumed_trailer
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Assuming\s*([\w_]*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                if check_timestamp(parsed_data, timestamp):
-                    parsed_data[-1]['Assumed_trailer'] = str(key_match.group(2)).strip()
-                else:
-                    data['Timestamp'] = timestamp
-                    data['Assumed_trailer'] = str(key_match.group(2)).strip()
-                    parsed_data.append(data)
-                continue             
-
-            # Search for the TLMS measurement Job
-            # X, Y and Z
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Point Center X\/Y\/Z:\s*(\d*) / (\d*) / (\d*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                if check_timestamp(parsed_data, timestamp):
-                    parsed_data[-1]['Point_Center_X'] = int(key_match.group(2))
-                    parsed_data[-1]['Point_Center_Y'] = int(key_match.group(3))
-                    parsed_data[-1]['Point_Center_Z'] = int(key_match.group(4))
-                else:
-                    data['Timestamp'] = parse_timestamp(key_match.group(1))
-                    data['Point_Center_X'] = int(key_match.group(2))
-                    data['Point_Center_Y'] = int(key_match.group(3))
-                    data['Point_Center_Z'] = int(key_match.group(4))
-                    parsed_data.append(data)
-                continue
+# Start of the line of the next measurement start at or after position, or -1.
+# The message text is found with a plain bytes search, the line prefix is checked only there
+MEASUREMENT_START_TEXT = MEASUREMENT_START_PATTERN.pattern.encode('ascii')
 
-            # Search for the TLMS measurement job
-            # Skew
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Skew:\s*(-?\d*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                if check_timestamp(parsed_data, timestamp):
-                    parsed_data[-1]['Skew'] = int(key_match.group(2))
-                else:
-                    data['Timestamp'] = timestamp
-                    data['Skew'] = int(key_match.group(2))
-                    parsed_data.append(data)
-                continue       
-
-            # Search for end of TLMS measurement
-            # Tilt
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Tilt\s*(-?\d*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                if check_timestamp(parsed_data, timestamp):
-                    parsed_data[-1]['Tilt'] = int(key_match.group(2))
-                else:
-                    data['Timestamp'] = timestamp
-                    data['Tilt'] = int(key_match.group(2))
-                    parsed_data.append(data)
-                continue 
-
-            # Search for end of TLMS measurement
-            # Number of detected twistlocks
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; -- Number of detected twist locks \(TL\):\s*(\d*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                if check_timestamp(parsed_data, timestamp):
-                    parsed_data[-1]['Nr_of_detected_TL'] = int(key_match.group(2))
-                else:
-                    data['Timestamp'] = timestamp
-                    data['Nr_of_detected_TL'] = int(key_match.group(2))
-                    parsed_data.append(data)
-                continue
-            
-            # Search for end of TLMS measurement
-            # Measurement finished OR Spreader Tracking Message received OR Spreader tracking results
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Measurement finished| - Spreader Tracking Message received|Spreader tracking results:')
-            key_match = pattern.search(log_line)
-            if key_match:
-                state = ParsingState.SEARCH_SPREADER_TRACKING_VALUES
-
-        elif state == ParsingState.SEARCH_SPREADER_TRACKING_VALUES:
-
-            # Search for Spreader tracking message values
-            # length, position x/y/z/angle
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Spreader (length|position [XYZ]|position Angle):\s*(-?\d*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                # Check if there is already data with found timestamp
-                if check_timestamp(parsed_data, timestamp):
-                    # There is already data with this timestamp
-                    if key_match.group(2) == "length":
-                        parsed_data[-1]['SpTrMsg_length'] = int(key_match.group(3))
-                    if key_match.group(2) == "position X":
-                        parsed_data[-1]['SpTrMsg_position_X'] = int(key_match.group(3))
-                    elif key_match.group(2) == "position Y":
-                        parsed_data[-1]['SpTrMsg_position_Y'] = int(key_match.group(3))
-                    elif key_match.group(2) == "position Z":
-                        parsed_data[-1]['SpTrMsg_position_Z'] = int(key_match.group(3))
-                    elif key_match.group(2) == "position Angle":
-                        parsed_data[-1]['SpTrMsg_position_Skew'] = int(key_match.group(3))
-                else:
-                    data['Timestamp'] = timestamp
-                    if key_match.group(2) == "length":
-                        data['SpTrMsg_length'] = int(key_match.group(3))
-                    if key_match.group(2) == "position X":
-                        data['SpTrMsg_position_X'] = int(key_match.group(3))
-                    elif key_match.group(2) == "position Y":
-                        data['SpTrMsg_position_Y'] = int(key_match.group(3))
-                    elif key_match.group(2) == "position Z":
-                        data['SpTrMsg_position_Z'] = int(key_match.group(3))
-                    elif key_match.group(2) == "position Angle":
-                        data['SpTrMsg_position_Skew'] = int(key_match.group(3))
-                    parsed_data.append(data)
-                continue
-            
-            # Search for Spreader tracking results values
-            # TLMS Status
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - TLMS Status:\s*(\d*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                if check_timestamp(parsed_data, timestamp):
-                    parsed_data[-1]['SpTrRes_TLMS_Status'] = int(key_match.group(2))
-                else:
-                    data['Timestamp'] = timestamp
-                    data['SpTrRes_TLMS_Status'] = int(key_match.group(2))
-                    parsed_data.append(data)
-                continue
+def find_measurement_start(buffer, position):
+    while True:
+        text_position = buffer.find(MEASUREMENT_START_TEXT, position)
+        if text_position < 0:
+            return -1
+        line_start = buffer.rfind(b'\n', 0, text_position) + 1
+        text_end = text_position + len(MEASUREMENT_START_TEXT)
+        if MEASUREMENT_START_SCAN_PATTERN.search(buffer, line_start, text_end):
+            return line_start
+        position = text_position + 1
 
-            # position X, position Y, Skew
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Spreader calc\. (position X|position Y|Skew):\s*(-?\d*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                # Check if there is already data with found timestamp
-                if check_timestamp(parsed_data, timestamp):
-                    if key_match.group(2) == "position X":
-                        parsed_data[-1]['SpTrRes_calc_X'] = int(key_match.group(3))
-                    elif key_match.group(2) == "position Y":
-                        parsed_data[-1]['SpTrRes_calc_Y'] = int(key_match.group(3))
-                    elif key_match.group(2) == "Skew":
-                        parsed_data[-1]['SpTrRes_calc_Skew'] = int(key_match.group(3))
-                else:
-                    data['Timestamp'] = timestamp
-                    if key_match.group(2) == "position X":
-                        data['SpTrRes_calc_X'] = int(key_match.group(3))
-                    elif key_match.group(2) == "position Y":
-                        data['SpTrRes_calc_Y'] = int(key_match.group(3))
-                    elif key_match.group(2) == "Skew":
-                        data['SpTrRes_calc_Skew'] = int(key_match.group(3))
-                    parsed_data.append(data)
-                continue
+# Whether a log file has another measurement start after the first one
+def has_later_measurement(log_file):
+    with open(log_file, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return False
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            position = find_measurement_start(buffer, 0)
+            next_line = buffer.find(b'\n', position) + 1 if position >= 0 else 0
+            return next_line > 0 and find_measurement_start(buffer, next_line) >= 0
 
-            # Calculation reliability
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Calc\. reliability:\s*(\d*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                # Check if there is already data with found timestamp
-                if check_timestamp(parsed_data, timestamp):
-                    parsed_data[-1]['SpTrRes_Reliability'] = int(key_match.group(2))
-                else:
-                    data['Timestamp'] = timestamp
-                    data['SpTrRes_Reliability'] = int(key_match.group(2))
-                    parsed_data.append(data)
-                continue
+# Feed a log file to parser, scanning it like scan_measurement_records. Yields the finished rows.
+# The tracking values of a measurement are scanned up to the start of the next one.
+def scan_log_file(parser, log_file):
+    try:
+        yield from scan_buffer(parser, log_file)
+    finally:
+        if SprTrc_profile.is_profiling():
+            SprTrc_profile.count('rows_emitted', parser.row_count)
+            SprTrc_profile.count('cycles', parser.cycle_id + 1 if parser.cycle_id is not None else 0)
 
-            # Error and event code
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Error/Event code:\s*(\d*)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                # Check if there is already data with found timestamp
-                if check_timestamp(parsed_data, timestamp):
-                    parsed_data[-1]['SpTrRes_Event_code'] = int(key_match.group(2))
-                else:
-                    data['Timestamp'] = timestamp
-                    data['SpTrRes_Event_code'] = int(key_match.group(2))
-                    parsed_data.append(data)
-                continue
+def scan_buffer(parser, log_file):
+    with open(log_file, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        SprTrc_profile.count('bytes_read', size)
+        if size == 0: # An empty file can not be mapped
+            yield from parser.close()
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            # Skip to the start of the measurement
+            position = find_measurement_start(buffer, 0)
+            position = len(buffer) if position < 0 else position
 
-            # Error and event description
-            pattern = re.compile(r'(\d{2}\.\d{2}\.\d{4} \d{2}:\d{2}:\d{2};\d+);\d+; ; ;S; - Error/Event description:\s*([a-zA-Z -]+)')
-            key_match = pattern.search(log_line)
-            if key_match:
-                timestamp = parse_timestamp(key_match.group(1))
-                # Check if there is already data with found timestamp
-                if check_timestamp(parsed_data, timestamp):
-                    parsed_data[-1]['SpTrRes_Event_desc'] = str(key_match.group(2))
-                else:
-                    data['Timestamp'] = timestamp
-                    data['SpTrRes_Event_desc'] = str(key_match.group(2))
-                    parsed_data.append(data)
-                continue
+            while position < len(buffer):
+                # Measurement start and TLMS measurement values line by line
+                line_end = buffer.find(b'\n', position)
+                line_end = len(buffer) if line_end < 0 else line_end + 1
+                log_line = buffer[position:line_end].decode(LOG_ENCODING, errors='replace').replace('\r\n', '\n')
+                finished_row = parser.feed(log_line)
+                if finished_row is not None:
+                    yield finished_row
+                position = line_end
+                if parser.state != ParsingState.SEARCH_SPREADER_TRACKING_VALUES:
+                    continue
 
-    if len(parsed_data) < 1:
-        parsed_data.append(data)
+                # Spreader tracking values in one pass, up to the next measurement
+                tracking_end = find_measurement_start(buffer, position)
+                tracking_end = len(buffer) if tracking_end < 0 else tracking_end
+                dispatch = parser.tracking_scan_dispatch
+                timestamp_text = None
+                for key_match in SPREADER_TRACKING_SCAN_PATTERN.finditer(buffer, position, tracking_end):
+                    if key_match.group(1) == timestamp_text:
+                        # Same timestamp as the previous field, which is in the window of the current row
+                        columns, handler = dispatch[key_match.lastindex]
+                        handler(parser.current_row, columns, key_match, key_match.lastindex)
+                        continue
+                    timestamp_text = key_match.group(1)
+                    finished_row = parser.store_field(parse_timestamp_us(timestamp_text), key_match, dispatch)
+                    if finished_row is not None:
+                        yield finished_row
+                position = tracking_end
+    yield from parser.close()
 
-    return parsed_data
+# Parse a log file one measurement cycle at a time. Yields (Cycle_ID, rows) of every cycle in
+# file order, only the rows of one cycle are kept. (None, [empty row]) for a file without data.
+# new_row: factory of the empty data rows, see MeasureResultParser
+def iter_measurement_cycles(log_file, new_row=init_measure_result_data):
+    cycle_id = None
+    cycle_rows = []
+    for finished_row in scan_measurement_records(log_file, new_row):
+        if finished_row['Cycle_ID'] != cycle_id and cycle_rows:
+            yield cycle_id, cycle_rows
+            cycle_rows = []
+        cycle_id = finished_row['Cycle_ID']
+        cycle_rows.append(finished_row)
+    if cycle_rows:
+        yield cycle_id, cycle_rows
 
-def check_timestamp(parsed_data, timestamp):
-    if len(parsed_data) > 0:
-        delta = abs(timestamp - parsed_data[-1]['Timestamp'])
-        in_window = delta < timedelta(milliseconds=2)
-        return in_window
-    else:
-        return False
+# Filters pushed down into the parser
+# lane, task, position: job metadata, a single value or a list of values. task and position match the
+# full log value ('1 -  Pick') or the name after the number ('Pick'). They apply to every measurement
+# cycle of a log by its job values up to its first 'Done' row (cycle_job_info): the rows of cycles of other jobs are dropped.
+# A file of one measurement of another job is skipped after reading its header with probe_job_info.
+# z_range: (low, high) mm of the forward filled SpTrMsg_position_Z, bounds exclusive like filter_spreader_data_by_z
+# time_range: (start, end) of the row timestamps, datetime or ISO text, end exclusive. The rows of a log
+# are in time order, parsing stops at the first row from end.
+# None leaves a value or bound open. The values of dropped rows are carried into the next kept row,
+# so the kept rows forward fill to the same values as without the filter.
+class RecordFilter:
+    def __init__(self, lane=None, task=None, position=None, z_range=None, time_range=None):
+        self.lane = filter_values(lane, int)
+        self.task = filter_values(task, str.strip)
+        self.position = filter_values(position, str.strip)
+        self.z_low, self.z_high = z_range if z_range is not None else (None, None)
+        self.start, self.end = (filter_timestamp(timestamp) for timestamp in time_range) if time_range is not None else (None, None)
+
+    def has_job_filter(self):
+        return self.lane is not None or self.task is not None or self.position is not None
+
+    def has_row_filter(self):
+        return self.z_low is not None or self.z_high is not None or self.start is not None or self.end is not None
+
+    # job_info: dict of JOB_INFO_COLUMNS, e.g. from probe_job_info
+    def matches_job(self, job_info):
+        if self.lane is not None and job_info['Lane'] not in self.lane:
+            return False
+        for values, column in [(self.task, 'Task'), (self.position, 'Position')]:
+            if values is not None:
+                value = job_info[column]
+                if value is None or (value not in values and value.split('-', 1)[-1].strip() not in values):
+                    return False
+        return True
+
+    # Whether the file can have rows of the job: the header decides unless the file has more measurements
+    def matches_file(self, log_file):
+        return not self.has_job_filter() or self.matches_job(probe_job_info(log_file)) or has_later_measurement(log_file)
+
+    # timestamp of the row, z the forward filled SpTrMsg_position_Z
+    def matches_row(self, timestamp, z):
+        if self.start is not None or self.end is not None:
+            if timestamp is None or (self.start is not None and timestamp < self.start) or (self.end is not None and timestamp >= self.end):
+                return False
+        if self.z_low is not None or self.z_high is not None:
+            if z is None or (self.z_low is not None and z <= self.z_low) or (self.z_high is not None and z >= self.z_high):
+                return False
+        return True
 
-def handle_logs(log_files):
+    # No later row of the log can match
+    def past_end(self, timestamp):
+        return self.end is not None and timestamp is not None and timestamp >= self.end
+
+# None, or a set of the converted filter values
+def filter_values(values, convert):
+    if values is None:
+        return None
+    if isinstance(values, (str, int)):
+        values = [values]
+    return {convert(value) for value in values}
+
+def filter_timestamp(timestamp):
+    return datetime.fromisoformat(timestamp) if isinstance(timestamp, str) else timestamp
+
+# Drop the rows that do not match the row filters of record_filter or belong to a measurement
+# cycle of another job, see RecordFilter
+def filter_measurement_records(records, record_filter):
+    carried = {}
+    z = None
+    first_row = True
+    cycle_id = None
+    cycle_rows = None # Rows of the cycle and their forward filled Z until its job values are complete
+    job_matches = True
+    for data in records:
+        if record_filter.past_end(data['Timestamp']):
+            break
+        if record_filter.has_job_filter() and (first_row or data['Cycle_ID'] != cycle_id):
+            # First row of a measurement cycle
+            if cycle_rows is not None:
+                # Previous cycle without a 'Done' row
+                job_matches = record_filter.matches_job(cycle_job_info(row for row, _ in cycle_rows))
+                yield from filter_cycle_rows(cycle_rows, record_filter, job_matches, carried)
+            first_row = False
+            cycle_id = data['Cycle_ID']
+            cycle_rows = []
+        if data['SpTrMsg_position_Z'] is not None:
+            z = data['SpTrMsg_position_Z']
+        if cycle_rows is not None:
+            cycle_rows.append((data, z))
+            if data['Measurement_Status'] == 'Done':
+                job_matches = record_filter.matches_job(cycle_job_info(row for row, _ in cycle_rows))
+                yield from filter_cycle_rows(cycle_rows, record_filter, job_matches, carried)
+                cycle_rows = None
+            continue
+        yield from filter_cycle_rows([(data, z)], record_filter, job_matches, carried)
+    if cycle_rows is not None:
+        job_matches = record_filter.matches_job(cycle_job_info(row for row, _ in cycle_rows))
+        yield from filter_cycle_rows(cycle_rows, record_filter, job_matches, carried)
+
+# Rows of (data, forward filled Z) matching the row filters of record_filter when job_matches.
+# carried: the values of the dropped rows, taken by the next kept row
+def filter_cycle_rows(rows, record_filter, job_matches, carried):
+    for data, z in rows:
+        if job_matches and record_filter.matches_row(data['Timestamp'], z):
+            for column, value in carried.items():
+                if data[column] is None:
+                    data[column] = value
+            carried.clear()
+            yield data
+        else:
+            carried.update((column, value) for column, value in data.items() if value is not None)
+
+# record_filter: optional RecordFilter, no rows of the measurement cycles of another job
+# cycle_index: optional CycleIndex of the rows, not with a record_filter
+def parse_log_file(log_file, record_filter=None, cycle_index=None):
+    if record_filter is not None and cycle_index is not None:
+        raise ValueError("a cycle index is built of the unfiltered rows")
+    with SprTrc_profile.stage('parse'):
+        if record_filter is None:
+            return list(scan_measurement_records(log_file, cycle_index=cycle_index))
+        if not record_filter.matches_file(log_file):
+            return []
+        return list(filter_measurement_records(scan_measurement_records(log_file), record_filter))
+
+DATASET_DIR_NAME = "MeasureResult_dataset"
+
+# cache: optional SprTrc_cache.ParseCache to reuse the parse results of unchanged files
+# plots: show the spreader movement plots of every file
+# plot_dir: save the spreader movement plots to this directory as plot_format ('png' or 'svg') files instead
+# max_plot_points: decimate longer plotted series to about this many points
+# record_filter: optional RecordFilter, files without matching rows are left out
+# output_format: 'csv' for a CSV file per log, 'parquet' or 'feather' for one dataset of all logs
+# partitioned by date, lane and task in output_dir/MeasureResult_dataset (see SprTrc_dataset)
+def handle_logs(log_files, cache=None, output_dir="Output", plots=True, plot_dir=None, plot_format='png', max_plot_points=None, record_filter=None, output_format='csv'):
+    import SprTrc_columnar # Imported here, SprTrc_columnar imports this module
     data_logs = []
+    log_file_names = []
+    failed_logs = [] # Files that failed to parse or analyse are reported and skipped
     for file in log_files:
-        # Parse log file
-        df_parsed_log_file = pd.DataFrame.from_dict(parse_log_file(file))
+        with SprTrc_profile.file_profile(file):
+            try:
+                # Parse log file
+                df_parsed_log_file = cache.parse_log_file_columnar(file, record_filter) if cache is not None else SprTrc_columnar.parse_log_file_columnar(file, record_filter)
+                if record_filter is not None and df_parsed_log_file.empty:
+                    continue
 
-        # Generate log file name
-        log_file_name = generate_log_filename(file, df_parsed_log_file)
-                
-        # Fill missing values
-        df_parsed_log_file = df_parsed_log_file.ffill(axis=0)
-        data_logs.append(df_parsed_log_file) # Parsed data values
-        df_parsed_log_file.to_csv("Output/" + log_file_name + ".csv")
+                # Generate log file name
+                log_file_name = generate_log_filename(file, df_parsed_log_file)
 
-        analyze_spreader_movement(df_parsed_log_file, log_file_name)
+                # Fill missing values
+                with SprTrc_profile.stage('ffill'):
+                    df_parsed_log_file = df_parsed_log_file.ffill(axis=0)
+                if output_format == 'csv':
+                    with SprTrc_profile.stage('write_csv'):
+                        df_parsed_log_file.to_csv(os.path.join(output_dir, log_file_name + ".csv"))
 
-def generate_log_filename(file, df_parsed_log_file):
-    if not pd.isna(df_parsed_log_file.at[0, 'Lane']):
-        Lane = str(int(df_parsed_log_file.at[0, 'Lane']))
-    else:
-        Lane = "xx"
+                image_file = os.path.join(plot_dir, log_file_name + '.' + plot_format) if plot_dir is not None else None
+                with SprTrc_profile.stage('spreader_movement'):
+                    analyze_spreader_movement(df_parsed_log_file, log_file_name, plots, image_file, max_plot_points)
+            except Exception as error:
+                print("{} skipped, {}: {}".format(file, type(error).__name__, error))
+                failed_logs.append({'log_file_name': os.path.basename(file), 'error': "{}: {}".format(type(error).__name__, error)})
+                continue
+            data_logs.append(df_parsed_log_file) # Parsed data values
+            log_file_names.append(log_file_name)
 
-    if not pd.isna(df_parsed_log_file.at[0, 'Position']):
-        Pos = str(df_parsed_log_file.at[0, 'Position']).split('-')
-        Pos = Pos[1].strip()
-    else:
-        Pos = "yy"
+    if failed_logs:
+        import pandas as pd
+        pd.DataFrame(failed_logs).to_csv(os.path.join(output_dir, "Failed_logs.csv"), index=False)
+        print("{} of {} log files failed, see {}".format(len(failed_logs), len(log_files), os.path.join(output_dir, "Failed_logs.csv")))
 
-    if not pd.isna(df_parsed_log_file.at[0, 'Task']):
-        Task = str(df_parsed_log_file.at[0, 'Task']).split('-')
-        Task = Task[1].strip()
-    else:
-        Task = "na"
-            
-    log_file_name = "Lane_" + Lane + "_" + "Pos_" + Pos + "_" + Task + "_" + os.path.splitext(os.path.basename(file))[0]
+    # Sway metrics of all files in one batch
+    if data_logs:
+        import SprTrc_settling
+        import SprTrc_spectral
+        df_batch = SprTrc_settling.concat_log_data(data_logs)
+        if output_format != 'csv':
+            import SprTrc_dataset
+            with SprTrc_profile.stage('write_dataset'):
+                SprTrc_dataset.write_log_dataset(df_batch, os.path.join(output_dir, DATASET_DIR_NAME), output_format, SprTrc_settling.GROUP_COLUMN, log_file_names)
+        with SprTrc_profile.stage('sway_metrics'):
+            df_sway_metrics = SprTrc_spectral.analyse_spreader_sway(df_batch)
+        df_sway_metrics.insert(0, 'log_file_name', [log_file_names[file_index] for file_index in df_sway_metrics.index])
+        df_sway_metrics.to_csv(os.path.join(output_dir, "Sway_metrics.csv"))
+
+def generate_log_filename(file, df_parsed_log_file):
+    log_file_name = format_log_filename(file, df_parsed_log_file.iloc[0] if not df_parsed_log_file.empty else {})
         
     if df_parsed_log_file.empty:
         print(log_file_name + " is empty")
@@ -477,7 +877,13 @@ def generate_log_filename(file, df_parsed_log_file):
             print(log_file_name)
     return log_file_name
 
-def analyze_spreader_movement(spreader_tracking_data, log_file_name):
+# image_file: render the plots off-screen to this file instead of showing them
+def analyze_spreader_movement(spreader_tracking_data, log_file_name, plots=True, image_file=None, max_plot_points=None):
+    import numpy as np
+    import pandas as pd
+    from scipy.signal import detrend
+    import SprTrc_settling
+
     # Select relevant columns and create a copy to avoid the warning
     df_SpTr_data = spreader_tracking_data[['Timestamp', 'Task', 'Measurement_Status', 'Cont_Height', 'Point_Center_Y', 'Point_Center_Z', 'Skew', 'SpTrRes_calc_Y', 'SpTrRes_calc_Skew']].copy()
 
@@ -490,17 +896,17 @@ def analyze_spreader_movement(spreader_tracking_data, log_file_name):
         df_first_TLMS_result = df_first_TLMS_result.iloc[0]
         print(df_first_TLMS_result['Point_Center_Z'])
         container_height = df_first_TLMS_result['Cont_Height']
-        if df_SpTr_data.iloc[0].Task == '1 -  Pick':
-            offset = 400.0
-        elif df_SpTr_data.iloc[0].Task == '2 -  Place':
-            offset = container_height + 360.0
+        if df_SpTr_data.iloc[0].Task == SprTrc_settling.PICK_TASK:
+            offset = SprTrc_settling.GATE_PICK_OFFSET
+        elif df_SpTr_data.iloc[0].Task == SprTrc_settling.PLACE_TASK:
+            offset = container_height + SprTrc_settling.GATE_PLACE_OFFSET
         else:
             offset = 0.0
     
     # Set up gate for signal
     z_limit = df_first_TLMS_result['Point_Center_Z'] + offset
-    z_upper_window = 20.0
-    z_lower_window = -350.0
+    z_upper_window = SprTrc_settling.GATE_UPPER_WINDOW
+    z_lower_window = SprTrc_settling.GATE_LOWER_WINDOW
     z_upper_limit = z_limit + z_upper_window
     z_lower_limit = z_limit + z_lower_window
 
@@ -545,6 +951,17 @@ def analyze_spreader_movement(spreader_tracking_data, log_file_name):
     amplitude = (df_SpTr_data['detrended'].max() - df_SpTr_data['detrended'].min()) / 2
     print(f"Estimated Amplitude: {amplitude}")
 
+    if image_file is not None:
+        import SprTrc_render
+        SprTrc_render.get_figure(SprTrc_render.SpreaderMovementFigure, max_plot_points).render(df_SpTr_data, log_file_name, image_file)
+        return
+
+    if not plots:
+        return
+
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import ScalarFormatter
+
     # Create two subplots: one for original data and one for detrended data
     plt.figure(figsize=(12, 10)).suptitle(log_file_name)  # Adjust the figure size as needed
 
@@ -582,11 +999,118 @@ def analyze_spreader_movement(spreader_tracking_data, log_file_name):
     plt.show()
 
     # You can continue with other processing steps (FFT, curve fitting, etc.)
-def main():
-    # Select log files
-    log_names = filedialog.askopenfilenames()
+
+
+# Lane_<lane>_Pos_<position>_<task>_<log file name> of the job info of the first data row
+# job_info: a data row or the dict of probe_job_info, missing values are None, NaN or pd.NA
+def format_log_filename(file, job_info):
+    import pandas as pd
+
+    Lane = job_info.get('Lane')
+    if pd.notna(Lane):
+        Lane = str(int(Lane))
+    else:
+        Lane = "xx"
+
+    Pos = job_info.get('Position')
+    if pd.notna(Pos):
+        Pos = str(Pos).split('-')
+        Pos = Pos[1].strip()
+    else:
+        Pos = "yy"
+
+    Task = job_info.get('Task')
+    if pd.notna(Task):
+        Task = str(Task).split('-')
+        Task = Task[1].strip()
+    else:
+        Task = "na"
+
+    return "Lane_" + Lane + "_" + "Pos_" + Pos + "_" + Task + "_" + os.path.splitext(os.path.basename(file))[0]
+
+# Collect MeasureResult files under log root
+# catalog: optional SprTrc_catalog.LogCatalog, refreshed incrementally instead of walking the whole tree
+def collect_measure_result_files(log_root, catalog=None):
+    if catalog is not None:
+        catalog.refresh(log_root)
+        return catalog.find(log_root)
+    measure_result_files = []
+    for root, dirs, files in os.walk(log_root):
+        for file in files:
+            if file.startswith("MeasureResult") and file.lower().endswith(".csv"):
+                measure_result_files.append(os.path.join(root, file))
+    return measure_result_files
+
+# Expand command line inputs to log files: directories (MeasureResult files under them),
+# glob patterns, log files and '@list.txt' files with one log file path per line
+# catalog: optional SprTrc_catalog.LogCatalog for the directories, filters: its find() arguments
+# (start, end, lane, task, position) to select the files of the directories by their header
+def expand_log_inputs(inputs, catalog=None, filters=None):
+    log_files = []
+    for log_input in inputs:
+        if log_input.startswith('@'):
+            with open(log_input[1:], 'r') as file:
+                log_files.extend(line.strip() for line in file if line.strip())
+        elif os.path.isdir(log_input):
+            if catalog is not None and filters:
+                catalog.refresh(log_input)
+                log_files.extend(catalog.find(log_input, **filters))
+            else:
+                log_files.extend(collect_measure_result_files(log_input, catalog))
+        elif glob.has_magic(log_input):
+            log_files.extend(sorted(glob.glob(log_input, recursive=True)))
+        else:
+            log_files.append(log_input)
+    return log_files
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Parse MeasureResult logs to CSV files and analyse the spreader movement. Without inputs the log files are selected in a file dialog.")
+    parser.add_argument('inputs', nargs='*', help="Log files, directories, glob patterns or @file_list.txt")
+    parser.add_argument('--output-dir', default="Output", help="Directory of the parsed CSV files (default: Output)")
+    parser.add_argument('--output-format', choices=['csv', 'parquet', 'feather'], default='csv', help="CSV file per log, or one Parquet/Feather dataset partitioned by date, lane and task")
+    parser.add_argument('--plots', action='store_true', help="Show the spreader movement plots, default when the files are selected in the dialog")
+    parser.add_argument('--plot-dir', help="Save the spreader movement plots as image files to this directory")
+    parser.add_argument('--plot-format', choices=['png', 'svg'], default='png', help="Image format of --plot-dir")
+    parser.add_argument('--max-plot-points', type=int, help="Decimate longer plotted series to about this many points")
+    parser.add_argument('--cache-dir', help="Reuse parse results of unchanged files from this cache directory")
+    parser.add_argument('--catalog', help="File catalog of the input directories, refreshed incrementally instead of walking them")
+    parser.add_argument('--lane', type=int, nargs='+', help="Only files of these lanes")
+    parser.add_argument('--task', nargs='+', help="Only files of these tasks, e.g. Pick or Place")
+    parser.add_argument('--position', nargs='+', help="Only files of these positions, e.g. Middle")
+    parser.add_argument('--z-range', type=float, nargs=2, metavar=('LOW', 'HIGH'), help="Only rows with the spreader Z between LOW and HIGH mm, e.g. 4000 5500")
+    parser.add_argument('--time-range', nargs=2, metavar=('START', 'END'), help="Only rows from START before END, e.g. 2024-03-12T10:00 2024-03-12T11:00")
+    SprTrc_profile.add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.inputs:
+        catalog = None
+        if args.catalog:
+            import SprTrc_catalog
+            catalog = SprTrc_catalog.LogCatalog(args.catalog)
+        log_names = expand_log_inputs(args.inputs, catalog)
+        plots = args.plots
+    else:
+        # Select log files
+        from tkinter import filedialog
+        log_names = filedialog.askopenfilenames()
+        plots = True
+
+    cache = None
+    if args.cache_dir:
+        import SprTrc_cache
+        cache = SprTrc_cache.ParseCache(args.cache_dir)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.plot_dir:
+        os.makedirs(args.plot_dir, exist_ok=True)
+    record_filter = RecordFilter(args.lane, args.task, args.position, args.z_range, args.time_range)
+    if not (record_filter.has_job_filter() or record_filter.has_row_filter()):
+        record_filter = None
+
     # Parse values
-    handle_logs(log_names)
+    with SprTrc_profile.profile_run(args.profile, args.profiler, args.profiler_output):
+        handle_logs(log_names, cache, args.output_dir, plots, args.plot_dir, args.plot_format, args.max_plot_points, record_filter, args.output_format)
 
 
 if __name__ == "__main__":
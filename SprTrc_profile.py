@@ -0,0 +1,241 @@
+import os
+import sys
+import csv
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+# Run profile of the parse and analysis pipeline
+# The pipeline times its stages with stage(name) blocks and counts with count(name). Both do
+# nothing until a profile is started, so the instrumentation stays in the code at the cost of
+# one global lookup per call. A started profile collects:
+#   stages: seconds and calls of every stage, e.g. parse, dataframe, ffill, settling, plot
+#   counters: e.g. files, bytes_read, rows_emitted, cycles, cache_hits
+#   field_counts: lines matched per field pattern of the parser
+#   files: seconds, stage seconds and counters of every file, to find the slowest files
+# Stages may nest, e.g. cache_store is inside the file of the parse it stores.
+# Only the standard library is used, the parser imports this module.
+
+PROFILE_FILE_TYPES = ['.json', '.csv']
+PROFILERS = ['cprofile', 'pyinstrument']
+REPORT_FILES = 10 # Slowest files in the report
+
+current_profile = None # Profile of this process, None when not profiling
+
+class RunProfile:
+    def __init__(self):
+        self.started = time.time()
+        self.stages = {} # name: [seconds, calls]
+        self.counters = {}
+        self.field_counts = {}
+        self.files = []
+
+    def add_time(self, name, seconds, calls=1):
+        stage_time = self.stages.get(name)
+        if stage_time is None:
+            stage_time = self.stages[name] = [0.0, 0]
+        stage_time[0] += seconds
+        stage_time[1] += calls
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    # Stage seconds and counters so far, the start of a file record
+    def snapshot(self):
+        return {name: stage_time[0] for name, stage_time in self.stages.items()}, dict(self.counters)
+
+    # Record a file with the stage seconds and counters since snapshot
+    def add_file(self, log_file, seconds, snapshot):
+        stage_seconds, counters = snapshot
+        file_record = {'file': log_file, 'seconds': seconds}
+        for name, (total_seconds, _) in self.stages.items():
+            if total_seconds != stage_seconds.get(name, 0.0):
+                file_record[name + '_seconds'] = total_seconds - stage_seconds.get(name, 0.0)
+        for name, total in self.counters.items():
+            if total != counters.get(name, 0):
+                file_record[name] = total - counters.get(name, 0)
+        self.files.append(file_record)
+
+    # Add the profile of a worker process, a to_dict() result
+    def merge(self, profile_data):
+        for name, (seconds, calls) in profile_data['stages'].items():
+            self.add_time(name, seconds, calls)
+        for name, amount in profile_data['counters'].items():
+            self.count(name, amount)
+        for name, amount in profile_data['field_counts'].items():
+            self.field_counts[name] = self.field_counts.get(name, 0) + amount
+        self.files.extend(profile_data['files'])
+
+    def to_dict(self):
+        return {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'elapsed_seconds': time.time() - self.started,
+            'stages': self.stages,
+            'counters': self.counters,
+            'field_counts': self.field_counts,
+            'files': self.files
+        }
+
+    def slowest_files(self, count=REPORT_FILES):
+        return sorted(self.files, key=lambda file_record: file_record['seconds'], reverse=True)[:count]
+
+    # Text summary: stages by time, counters, field counts and the slowest files
+    def report(self):
+        elapsed = time.time() - self.started
+        lines = ["Profile: {:.3f} s".format(elapsed), "{:<24} {:>10} {:>8} {:>7}".format('stage', 'seconds', 'calls', '%')]
+        for name, (seconds, calls) in sorted(self.stages.items(), key=lambda item: item[1][0], reverse=True):
+            lines.append("{:<24} {:>10.3f} {:>8} {:>6.1f}%".format(name, seconds, calls, 100.0 * seconds / elapsed if elapsed else 0.0))
+        for name, amount in self.counters.items():
+            lines.append("{:<24} {:>10}".format(name, amount))
+        if self.field_counts:
+            lines.append("Matched lines per field:")
+            for name, amount in sorted(self.field_counts.items(), key=lambda item: item[1], reverse=True):
+                lines.append("{:>10}  {}".format(amount, name))
+        if self.files:
+            lines.append("Slowest files:")
+            for file_record in self.slowest_files():
+                lines.append("{:>10.3f} s  {}".format(file_record['seconds'], file_record['file']))
+        return "\n".join(lines)
+
+    # .json: the whole profile, .csv: one row per file
+    def dump(self, profile_file):
+        if os.path.splitext(profile_file)[1].lower() == '.csv':
+            columns = ['file', 'seconds']
+            for file_record in self.files:
+                columns.extend(column for column in file_record if column not in columns)
+            with open(profile_file, 'w', newline='') as file:
+                writer = csv.DictWriter(file, columns)
+                writer.writeheader()
+                writer.writerows(self.files)
+        else:
+            with open(profile_file, 'w') as file:
+                json.dump(self.to_dict(), file, indent=2)
+
+# Timer of a stage of the current profile
+class StageTimer:
+    __slots__ = ('profile', 'name', 'start')
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.add_time(self.name, time.perf_counter() - self.start)
+
+NO_STAGE = nullcontext()
+
+def start_profile():
+    global current_profile
+    current_profile = RunProfile()
+    return current_profile
+
+def stop_profile():
+    global current_profile
+    profile = current_profile
+    current_profile = None
+    return profile
+
+def is_profiling():
+    return current_profile is not None
+
+# with stage('parse'): ... times the block when profiling
+def stage(name):
+    return StageTimer(current_profile, name) if current_profile is not None else NO_STAGE
+
+def count(name, amount=1):
+    if current_profile is not None:
+        current_profile.count(name, amount)
+
+# Matched lines per field pattern of the current profile, for MeasureResultParser(field_counts=...)
+def field_counts():
+    return current_profile.field_counts if current_profile is not None else None
+
+# Yield the items of iterable, timing the time spent producing them as a stage,
+# e.g. the parsing inside a generator of parsed cycles
+def timed_iter(name, iterable):
+    if current_profile is None:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        with stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+# with file_profile(log_file): ... records the file with its seconds, stage seconds and counters
+@contextmanager
+def file_profile(log_file):
+    profile = current_profile
+    if profile is None:
+        yield
+        return
+    snapshot = profile.snapshot()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_file(log_file, time.perf_counter() - start, snapshot)
+        profile.count('files')
+
+# Run a block under cProfile or pyinstrument (optional dependency), written to output_file:
+# cProfile stats for python -m pstats or snakeviz, pyinstrument an .html page or a text report
+@contextmanager
+def profiler_hook(profiler, output_file):
+    if profiler is None:
+        yield
+        return
+    if profiler == 'cprofile':
+        import cProfile
+        code_profiler = cProfile.Profile()
+        code_profiler.enable()
+        try:
+            yield
+        finally:
+            code_profiler.disable()
+            code_profiler.dump_stats(output_file)
+    elif profiler == 'pyinstrument':
+        from pyinstrument import Profiler
+        code_profiler = Profiler()
+        code_profiler.start()
+        try:
+            yield
+        finally:
+            code_profiler.stop()
+            with open(output_file, 'w') as file:
+                file.write(code_profiler.output_html() if output_file.lower().endswith('.html') else code_profiler.output_text())
+    else:
+        raise ValueError("Unknown profiler: {}".format(profiler))
+
+def default_profiler_output(profiler):
+    return 'profile.prof' if profiler == 'cprofile' else 'profile.html'
+
+# Profile a run: the pipeline profile dumped to profile_file (.json or .csv) and reported on
+# stderr, and optionally the whole run under a code profiler. The code profiler sees this
+# process only, the stages and counters of pool workers are merged into the profile.
+@contextmanager
+def profile_run(profile_file=None, profiler=None, profiler_output=None):
+    if profile_file is None and profiler is None:
+        yield None
+        return
+    profile = start_profile()
+    try:
+        with profiler_hook(profiler, profiler_output or default_profiler_output(profiler)):
+            yield profile
+    finally:
+        stop_profile()
+        print(profile.report(), file=sys.stderr)
+        if profile_file is not None:
+            profile.dump(profile_file)
+
+# Profile options of the command line tools, see profile_run
+def add_profile_arguments(parser):
+    parser.add_argument('--profile', metavar='PROFILE_FILE', help="Write the stage timers and counters of the run to this .json file, or the per-file profile to a .csv file")
+    parser.add_argument('--profiler', choices=PROFILERS, help="Run under cProfile or pyinstrument")
+    parser.add_argument('--profiler-output', help="Output file of --profiler (default: profile.prof for cprofile, profile.html for pyinstrument)")
@@ -0,0 +1,134 @@
+import os
+import numpy as np
+
+# Off-screen rendering of the per-file plots to image files
+# The figures are drawn on the Agg canvas without pyplot, so no window is opened and the
+# rendering works in worker processes. A figure is built once per process and kind and reused
+# for every file: only the line data, limits and titles change between files.
+# matplotlib is imported when the first figure is built.
+
+IMAGE_FORMATS = ['png', 'svg']
+
+# Indexes of the points kept when a series is decimated to about max_points points:
+# the minimum and maximum of every bucket, so sway peaks stay visible
+def decimate_indexes(values, max_points):
+    length = len(values)
+    if max_points is None or length <= max_points:
+        return np.arange(length)
+    bucket_count = max(max_points // 2, 1)
+    bucket_size = -(-length // bucket_count) # Ceiling division
+    padded = np.full(bucket_count * bucket_size, np.nan)
+    padded[:length] = values
+    buckets = padded.reshape(bucket_count, bucket_size)
+    all_nan = np.isnan(buckets).all(axis=1)
+    buckets[all_nan] = 0.0 # Missing values only, any index of the bucket is fine
+    offsets = np.arange(bucket_count) * bucket_size
+    indexes = np.concatenate([offsets + np.nanargmin(buckets, axis=1), offsets + np.nanargmax(buckets, axis=1)])
+    return np.unique(indexes[indexes < length])
+
+# Base of the reusable figures. lines: {name: (axes index, column, style)}
+class FigureTemplate:
+    def __init__(self, rows, columns, figsize, lines, max_points=None):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.ticker import ScalarFormatter
+
+        self.max_points = max_points
+        self.figure = Figure(figsize=figsize, layout='constrained') # Layout solved while drawing, no tight_layout pass
+        FigureCanvasAgg(self.figure)
+        self.axes = self.figure.subplots(rows, columns, squeeze=False).ravel()
+        for ax in self.axes:
+            ax.yaxis.set_major_formatter(ScalarFormatter(useOffset=False)) # Disable scientific notation
+            ax.ticklabel_format(useOffset=False, axis='y', style='plain')
+        self.lines = {}
+        for name, (axes_index, column, style) in lines.items():
+            self.lines[name] = (self.axes[axes_index].plot(np.array([], dtype='datetime64[us]'), [], label=column, **style)[0], column)
+
+    # Set the data of a line from a DataFrame, None hides the line
+    def set_line(self, name, df_data):
+        line, column = self.lines[name]
+        if df_data is None or df_data.empty:
+            line.set_data(np.array([], dtype='datetime64[us]'), [])
+            return
+        values = df_data[column].to_numpy(dtype=float, na_value=np.nan)
+        indexes = decimate_indexes(values, self.max_points)
+        line.set_data(df_data['Timestamp'].to_numpy(dtype='datetime64[us]')[indexes], values[indexes])
+
+    def save(self, image_file):
+        for ax in self.axes:
+            ax.relim()
+            ax.autoscale_view()
+            if ax.lines:
+                ax.legend(loc='upper right') # 'best' tests every plotted point
+        self.figure.savefig(image_file)
+
+# Spreader tracking X, Y, skew and Z of the Z range and the settling height range,
+# the image file version of plot_settling_height_data in the analysis script
+class SettlingHeightFigure(FigureTemplate):
+    def __init__(self, max_points=None):
+        blue = {'color': 'blue'}
+        red = {'color': 'red'}
+        super().__init__(3, 2, (18, 12), {
+            'center_x': (0, 'Point_Center_X', blue), 'calc_x': (0, 'SpTrRes_calc_X', blue),
+            'center_x_settling': (0, 'Point_Center_X', red), 'calc_x_settling': (0, 'SpTrRes_calc_X', red),
+            'position_z': (1, 'SpTrMsg_position_Z', {}), 'position_z_settling': (1, 'SpTrMsg_position_Z', red),
+            'center_y': (2, 'Point_Center_Y', blue), 'calc_y': (2, 'SpTrRes_calc_Y', blue),
+            'center_y_settling': (2, 'Point_Center_Y', red), 'calc_y_settling': (2, 'SpTrRes_calc_Y', red),
+            'skew': (4, 'Skew', blue), 'calc_skew': (4, 'SpTrRes_calc_Skew', blue),
+            'skew_settling': (4, 'Skew', red), 'calc_skew_settling': (4, 'SpTrRes_calc_Skew', red)
+        }, max_points)
+        for axes_index, label in [(0, 'X Position'), (1, 'Z Position'), (2, 'Y Position'), (4, 'Skew Position')]:
+            self.axes[axes_index].set_xlabel('Timestamp')
+            self.axes[axes_index].set_ylabel(label)
+        for axes_index in [3, 5]:
+            self.axes[axes_index].set_visible(False)
+
+    # df_z_range: rows in the plotted Z range, df_settling_height_range: rows at the settling height or None
+    def render(self, df_z_range, df_settling_height_range, title, image_file):
+        for name in ['center_x', 'calc_x', 'position_z', 'center_y', 'calc_y', 'skew', 'calc_skew']:
+            self.set_line(name, df_z_range)
+            self.set_line(name + '_settling', df_settling_height_range)
+        settling = df_settling_height_range is not None
+        self.axes[0].set_title('Spreader tracking X @ settling height' if settling else 'Spreader X Position Over Time')
+        self.axes[1].set_title('Spreader Z Position @ settling height' if settling else 'Spreader Z Position Over Time')
+        self.axes[2].set_title('Spreader tracking Y @ settling height' if settling else 'Spreader Y Position Over Time')
+        self.axes[4].set_title('Spreader tracking skew @ settling height' if settling else 'Spreader Skew Position Over Time')
+        self.figure.suptitle(title)
+        self.save(image_file)
+
+# Spreader movement Y and skew in the Z gate, the image file version of the
+# analyze_spreader_movement plots. df_SpTr_data is indexed by the timestamp
+class SpreaderMovementFigure(FigureTemplate):
+    def __init__(self, max_points=None):
+        super().__init__(2, 1, (12, 10), {
+            'calc_y': (0, 'SpTrRes_calc_Y', {'color': 'blue'}), 'center_y': (0, 'Point_Center_Y', {'color': 'red', 'linestyle': '--'}),
+            'calc_skew': (1, 'SpTrRes_calc_Skew', {'color': 'blue'}), 'skew': (1, 'Skew', {'color': 'red', 'linestyle': '--'})
+        }, max_points)
+        self.axes[0].set_title('Spreader Movement Y')
+        self.axes[0].set_ylabel('SpTrRes_calc_Y (Deflection)')
+        self.axes[1].set_title('Spreader Movement Skew')
+        self.axes[1].set_ylabel('SpTrRes_calc_Skew')
+        for ax in self.axes:
+            ax.set_xlabel('Timestamp')
+            ax.tick_params(axis='x', labelrotation=45)
+
+    def render(self, df_SpTr_data, log_file_name, image_file):
+        df_SpTr_data = df_SpTr_data.reset_index()
+        for name in self.lines:
+            self.set_line(name, df_SpTr_data)
+        self.figure.suptitle(log_file_name)
+        self.save(image_file)
+
+# Figures of this process, built on first use
+figure_templates = {}
+
+def get_figure(figure_class, max_points=None):
+    key = (figure_class, max_points)
+    if key not in figure_templates:
+        figure_templates[key] = figure_class(max_points)
+    return figure_templates[key]
+
+# cycle_id: measurement cycle of the plot, the later cycles of a file get a _cycle<n> suffix
+def image_file_path(plot_dir, log_file, image_format='png', cycle_id=None):
+    suffix = '_cycle{}'.format(cycle_id) if cycle_id else ''
+    return os.path.join(plot_dir, os.path.splitext(os.path.basename(log_file))[0] + suffix + '.' + image_format)
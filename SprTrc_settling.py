@@ -0,0 +1,225 @@
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# Settling height analysis of spreader tracking data
+# The settling height is the height the spreader waits at before the final landing:
+# Pick: target Z + PICK_SETTLING_OFFSET, Place: target Z + container height + PLACE_SETTLING_OFFSET.
+# The spreader is at the settling height while its Z is within the settling window around it.
+
+PICK_TASK = '1 -  Pick'
+PLACE_TASK = '2 -  Place'
+PICK_SETTLING_OFFSET = 370 # mm
+PLACE_SETTLING_OFFSET = 360 # mm
+SETTLING_WINDOW_ABOVE = 50 # mm
+SETTLING_WINDOW_BELOW = 60 # mm
+
+# Z gate of the sway analysis while the spreader is lowered to the target:
+# Pick: target Z + GATE_PICK_OFFSET, Place: target Z + container height + GATE_PLACE_OFFSET,
+# the spreader Z within GATE_LOWER_WINDOW..GATE_UPPER_WINDOW of it
+GATE_PICK_OFFSET = 400.0 # mm
+GATE_PLACE_OFFSET = 360.0 # mm
+GATE_UPPER_WINDOW = 20.0 # mm
+GATE_LOWER_WINDOW = -350.0 # mm
+
+GROUP_COLUMN = 'file_index'
+
+# Slope based settling: the spreader is settled while the Z slope over the slope window is below
+# PLATEAU_MAX_SLOPE. The defaults are the earlier rolling mean of 12 Z differences below 0.5 mm
+# at the 10 ms tracking interval, as a time based window for unevenly spaced samples.
+PLATEAU_WINDOW = 0.12 # s
+PLATEAU_MAX_SLOPE = 50.0 # mm/s
+
+# Concatenate the parsed log data of many files into one table, GROUP_COLUMN numbers the files
+# Text columns stay categorical with the union of the categories, pd.concat would make them objects
+def concat_log_data(frames):
+    frames = list(frames)
+    text_columns = [column for column, dtype in frames[0].dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+    df_batch = pd.concat([frame.drop(columns=text_columns) for frame in frames], ignore_index=True)
+    for column in text_columns:
+        df_batch[column] = concat_categoricals([frame[column].array for frame in frames])
+    df_batch[GROUP_COLUMN] = np.repeat(np.arange(len(frames)), [len(frame) for frame in frames])
+    return df_batch[list(frames[0].columns) + [GROUP_COLUMN]]
+
+# Recode the categoricals to the union of their categories and concatenate the codes
+def concat_categoricals(categoricals):
+    categories = {}
+    codes = []
+    for categorical in categoricals:
+        recode = np.array([categories.setdefault(category, len(categories)) for category in categorical.categories] + [-1], dtype=np.int32)
+        codes.append(recode[categorical.codes]) # Code -1 (missing) picks the last entry
+    return pd.Categorical.from_codes(np.concatenate(codes), categories=list(categories))
+
+# First row position of every group in positions, -1 for groups without one
+# positions: increasing row positions of the group-sorted table, group_codes: group of every row
+def first_group_positions(positions, group_codes, group_count):
+    first_positions = np.full(group_count, -1, dtype=np.int64)
+    groups, first_index = np.unique(group_codes[positions], return_index=True)
+    first_positions[groups] = positions[first_index]
+    return first_positions
+
+def last_group_positions(positions, group_codes, group_count):
+    last_positions = first_group_positions(positions[::-1], group_codes, group_count)
+    return last_positions
+
+# Settling height, settling window and settling time of every group in one vectorized pass
+# Same results as calculate_settling_range(df, use_slope=False) of every group on its own.
+# df_batch: parsed and forward filled log data of many files, e.g. from concat_log_data
+# group_column: column that identifies a file or measurement
+# Returns the settling window membership of every row (aligned with df_batch) and a table with
+# settling_height, settling_start, settling_end and settling_time (NaN/NaT if not found) per group
+def calculate_settling_range_batch(df_batch, group_column=GROUP_COLUMN):
+    group_codes, groups = pd.factorize(df_batch[group_column], sort=False)
+    group_count = len(groups)
+    order = np.argsort(group_codes, kind='stable') # Rows of a group together, in their original order
+    group_codes = group_codes[order]
+
+    # Target Z, task and container height of the first 'Done' row of every group
+    measurement_done = (df_batch['Measurement_Status'] == 'Done').to_numpy(dtype=bool, na_value=False)[order]
+    first_done = first_group_positions(np.flatnonzero(measurement_done), group_codes, group_count)
+    has_done = first_done >= 0
+    done_rows = order[first_done[has_done]]
+    target_z_height = df_batch['Point_Center_Z'].to_numpy(dtype=float, na_value=np.nan)[done_rows]
+    task = df_batch['Task'].to_numpy(dtype=object)[done_rows]
+    cont_height = df_batch['Cont_Height'].to_numpy(dtype=float, na_value=np.nan)[done_rows]
+
+    settling_height = np.full(group_count, np.nan)
+    settling_height[has_done] = np.select(
+        [task == PICK_TASK, task == PLACE_TASK],
+        [target_z_height + PICK_SETTLING_OFFSET, target_z_height + cont_height + PLACE_SETTLING_OFFSET],
+        np.nan)
+
+    # Rows within the settling window, NaN heights never are
+    row_settling_height = settling_height[group_codes]
+    spreader_z = df_batch['SpTrMsg_position_Z'].to_numpy(dtype=float, na_value=np.nan)[order]
+    in_range = (spreader_z >= row_settling_height - SETTLING_WINDOW_BELOW) & (spreader_z <= row_settling_height + SETTLING_WINDOW_ABOVE)
+
+    # Settling time from the first to the last row in the window
+    range_positions = np.flatnonzero(in_range)
+    first_in_range = first_group_positions(range_positions, group_codes, group_count)
+    last_in_range = last_group_positions(range_positions, group_codes, group_count)
+    has_range = first_in_range >= 0
+    timestamps = df_batch['Timestamp'].to_numpy(dtype='datetime64[us]')[order]
+    settling_start = np.full(group_count, np.datetime64('NaT', 'us'))
+    settling_end = np.full(group_count, np.datetime64('NaT', 'us'))
+    settling_start[has_range] = timestamps[first_in_range[has_range]]
+    settling_end[has_range] = timestamps[last_in_range[has_range]]
+
+    in_settling_range = np.zeros(len(df_batch), dtype=bool)
+    in_settling_range[order] = in_range
+    df_settling = pd.DataFrame({
+        'settling_height': settling_height,
+        'settling_start': settling_start,
+        'settling_end': settling_end,
+        'settling_time': settling_end - settling_start
+    }, index=pd.Index(groups, name=group_column))
+    return pd.Series(in_settling_range, index=df_batch.index, name='in_settling_range'), df_settling
+
+# Settling window of a measurement for stp.CycleIndex(settling_z_bands): {'settling': (low, high)}
+# done_values: forward filled values of the first 'Done' row, no band if its task has no settling height
+def settling_z_bands(done_values):
+    target_z_height = done_values['Point_Center_Z']
+    if target_z_height is None:
+        return {}
+    if done_values['Task'] == PICK_TASK:
+        settling_height = target_z_height + PICK_SETTLING_OFFSET
+    elif done_values['Task'] == PLACE_TASK and done_values['Cont_Height'] is not None:
+        settling_height = target_z_height + done_values['Cont_Height'] + PLACE_SETTLING_OFFSET
+    else:
+        return {}
+    return {'settling': (settling_height - SETTLING_WINDOW_BELOW, settling_height + SETTLING_WINDOW_ABOVE)}
+
+# Row positions of the runs of a Z band of a cycle of stp.CycleIndex, empty if there is no such band
+def cycle_band_positions(cycle, band):
+    runs = cycle['z_bands'].get(band, [])
+    if not runs:
+        return np.array([], dtype=np.int64)
+    return np.concatenate([np.arange(start_row, end_row) for start_row, end_row in runs])
+
+# Streaming plateau detector of the spreader Z position
+# Samples are fed in time order with update(). The slope of a sample is the Z change from the
+# oldest sample within the slope window, divided by the time between them. The samples of the
+# window are kept in a ring buffer, so every update is O(1) amortized.
+# A plateau is a run of consecutive samples with |slope| < max_slope, lasting at least
+# min_duration seconds. Plateaus are reported as (start index, end index) of the fed samples.
+class PlateauDetector:
+    def __init__(self, window=PLATEAU_WINDOW, max_slope=PLATEAU_MAX_SLOPE, min_duration=0.0):
+        self.window_us = round(window * 1e6)
+        self.max_slope = max_slope
+        self.min_duration_us = round(min_duration * 1e6)
+        self.samples = deque() # (time in us, Z) within the slope window
+        self.index = -1 # Index of the latest sample
+        self.plateau_start = None # (index, time in us) of the open plateau
+        self.plateau_end = None
+
+    # Feed one sample, time in microseconds. Samples without Z are skipped, but keep their index.
+    # Returns the (start, end) indexes of a plateau that ended with this sample or None
+    def update(self, time_us, z):
+        self.index += 1
+        if z is None or z != z: # None or NaN
+            return None
+        samples = self.samples
+        samples.append((time_us, z))
+        while time_us - samples[0][0] > self.window_us:
+            samples.popleft()
+        oldest_time_us, oldest_z = samples[0]
+        slope = (z - oldest_z) * 1e6 / (time_us - oldest_time_us) if time_us > oldest_time_us else 0.0
+
+        if abs(slope) < self.max_slope:
+            if self.plateau_start is None:
+                self.plateau_start = (self.index, time_us)
+            self.plateau_end = (self.index, time_us)
+            return None
+        return self.close_plateau()
+
+    # Feed a parsed data row with an int microsecond Timestamp, e.g. in the on_row callback of a
+    # SprTrc_follow.LogFollower(timestamp_us=True)
+    def update_row(self, data):
+        if data['Timestamp'] is None:
+            self.index += 1
+            return None
+        return self.update(data['Timestamp'], data['SpTrMsg_position_Z'])
+
+    def close_plateau(self):
+        plateau = None
+        if self.plateau_start is not None and self.plateau_end[1] - self.plateau_start[1] >= self.min_duration_us:
+            plateau = (self.plateau_start[0], self.plateau_end[0])
+        self.plateau_start = self.plateau_end = None
+        return plateau
+
+    # Plateau open at the end of the data or None
+    def close(self):
+        return self.close_plateau()
+
+# Plateaus of the Z position, the same as feeding every sample to a PlateauDetector
+# timestamps: datetime64 values in time order, z: Z positions, NaN where missing
+# Returns a list of (start, end) positions
+def find_plateaus(timestamps, z, window=PLATEAU_WINDOW, max_slope=PLATEAU_MAX_SLOPE, min_duration=0.0):
+    time_us = np.asarray(timestamps, dtype='datetime64[us]').astype(np.int64)
+    z = np.asarray(z, dtype=float)
+    positions = np.flatnonzero(~np.isnan(z))
+    time_us, z = time_us[positions], z[positions]
+    if len(positions) == 0:
+        return []
+
+    # Oldest sample of every slope window
+    oldest = np.searchsorted(time_us, time_us - round(window * 1e6), side='left')
+    elapsed_us = time_us - time_us[oldest]
+    slope = np.zeros(len(z))
+    np.divide((z - z[oldest]) * 1e6, elapsed_us, out=slope, where=elapsed_us > 0)
+    flat = np.abs(slope) < max_slope
+
+    # Runs of flat samples
+    edges = np.diff(np.concatenate([[False], flat, [False]]).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    long_enough = time_us[ends] - time_us[starts] >= round(min_duration * 1e6)
+    return list(zip(positions[starts[long_enough]].tolist(), positions[ends[long_enough]].tolist()))
+
+# Slope based settling range of the rows at the settling height: from the start of the first
+# plateau to the end of the last one. Returns the rows as a slice of df_settling_height_range or None
+def find_settling_plateau_range(df_settling_height_range, window=PLATEAU_WINDOW, max_slope=PLATEAU_MAX_SLOPE, min_duration=0.0):
+    plateaus = find_plateaus(df_settling_height_range['Timestamp'], df_settling_height_range['SpTrMsg_position_Z'].to_numpy(dtype=float, na_value=np.nan), window, max_slope, min_duration)
+    if not plateaus:
+        return None
+    return df_settling_height_range.iloc[plateaus[0][0]:plateaus[-1][1] + 1]
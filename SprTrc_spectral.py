@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+from scipy.signal import hilbert
+
+import SprTrc_settling
+
+# Batch spectral analysis of the spreader sway while it is lowered to the target
+# Every cycle (file or measurement) is gated to the Z window around the target height like
+# SprTrc_parser.analyze_spreader_movement does, resampled onto a uniform time grid and stacked
+# into one 2-D array. The spectra and sway metrics of all cycles are computed at once.
+
+SWAY_SIGNALS = {
+    'Y': 'SpTrRes_calc_Y',
+    'Skew': 'SpTrRes_calc_Skew'
+}
+
+SAMPLE_INTERVAL = 0.01 # s, resampling grid
+FFT_PADDING = 4 # Zero padding of the FFT, finer frequency grid for the short segments
+MIN_SEGMENT_SAMPLES = 8
+ENVELOPE_EDGE = 0.1 # Part of the segment ignored at both ends in the decay fit, Hilbert edge effects
+SWAY_METRICS = ['dominant_frequency', 'psd_peak', 'amplitude', 'decay_rate', 'damping_ratio'] # See sway_metrics
+
+# Gate, resample and stack the sway signals of every group
+# Returns the group codes of the cycles, the segment start times (datetime64[us]), the sample counts
+# and a dict of signal name: (cycles, samples) array, zero after the end of each segment
+def resample_gated_segments(df_batch, group_column, signals, sample_interval):
+    group_codes, groups = pd.factorize(df_batch[group_column], sort=False)
+    group_count = len(groups)
+    order = np.argsort(group_codes, kind='stable')
+    sorted_codes = group_codes[order]
+
+    # Gate limits from the first TLMS result and the task of the first row of every group
+    measurement_done = (df_batch['Measurement_Status'] == 'Done').to_numpy(dtype=bool, na_value=False)[order]
+    first_done = SprTrc_settling.first_group_positions(np.flatnonzero(measurement_done), sorted_codes, group_count)
+    has_done = first_done >= 0
+    done_rows = order[first_done[has_done]]
+    first_rows = order[SprTrc_settling.first_group_positions(np.arange(len(order)), sorted_codes, group_count)[has_done]]
+    task = df_batch['Task'].to_numpy(dtype=object)[first_rows]
+    cont_height = df_batch['Cont_Height'].to_numpy(dtype=float, na_value=np.nan)[done_rows]
+    offset = np.select([task == SprTrc_settling.PICK_TASK, task == SprTrc_settling.PLACE_TASK], [SprTrc_settling.GATE_PICK_OFFSET, cont_height + SprTrc_settling.GATE_PLACE_OFFSET], 0.0)
+    z_limit = np.full(group_count, np.nan)
+    z_limit[has_done] = df_batch['Point_Center_Z'].to_numpy(dtype=float, na_value=np.nan)[done_rows] + offset
+
+    # Gated rows with all sway signals, sorted by group and time
+    spreader_z = df_batch['SpTrMsg_position_Z'].to_numpy(dtype=float, na_value=np.nan)
+    row_z_limit = np.empty(len(df_batch))
+    row_z_limit[order] = z_limit[sorted_codes]
+    signal_values = {name: df_batch[column].to_numpy(dtype=float, na_value=np.nan) for name, column in signals.items()}
+    time_us = df_batch['Timestamp'].to_numpy(dtype='datetime64[us]').astype(np.int64)
+    gated = (spreader_z >= row_z_limit + SprTrc_settling.GATE_LOWER_WINDOW) & (spreader_z <= row_z_limit + SprTrc_settling.GATE_UPPER_WINDOW) & (time_us != np.iinfo(np.int64).min)
+    for values in signal_values.values():
+        gated &= ~np.isnan(values)
+    rows = np.flatnonzero(gated)
+    rows = rows[np.lexsort((time_us[rows], group_codes[rows]))]
+    row_codes = group_codes[rows]
+    row_time_us = time_us[rows]
+
+    # Time span and grid length of every gated segment
+    cycle_codes, segment_first, segment_rows = np.unique(row_codes, return_index=True, return_counts=True)
+    segment_start_us = row_time_us[segment_first]
+    segment_end_us = row_time_us[segment_first + segment_rows - 1]
+    sample_interval_us = round(sample_interval * 1e6)
+    sample_counts = (segment_end_us - segment_start_us) // sample_interval_us + 1
+    valid = (segment_rows >= MIN_SEGMENT_SAMPLES) & (sample_counts >= MIN_SEGMENT_SAMPLES)
+    cycle_codes, segment_start_us, sample_counts = cycle_codes[valid], segment_start_us[valid], sample_counts[valid]
+    if len(cycle_codes) == 0: # No gated segment in the batch, nothing to interpolate
+        return groups[:0], np.zeros(0, dtype='datetime64[us]'), np.zeros(0, dtype=np.int64), {name: np.zeros((0, 0)) for name in signals}
+    keep = np.isin(row_codes, cycle_codes)
+    rows, row_codes, row_time_us = rows[keep], row_codes[keep], row_time_us[keep]
+
+    # Resample all segments with one interpolation: every segment is placed on its own stretch
+    # of a common time axis, so the grid points of a segment only see its own rows
+    cycle_index = np.full(group_count, -1)
+    cycle_index[cycle_codes] = np.arange(len(cycle_codes))
+    stretch_us = int(sample_counts.max()) * sample_interval_us + sample_interval_us
+    source_time = (row_time_us - segment_start_us[cycle_index[row_codes]]) + cycle_index[row_codes] * stretch_us
+    grid_cycle = np.repeat(np.arange(len(cycle_codes)), sample_counts)
+    grid_sample = np.arange(len(grid_cycle)) - np.repeat(np.cumsum(sample_counts) - sample_counts, sample_counts)
+    grid_time = grid_sample * sample_interval_us + grid_cycle * stretch_us
+
+    segment_length = int(sample_counts.max())
+    segments = {}
+    for name, values in signal_values.items():
+        segment = np.zeros((len(cycle_codes), segment_length))
+        segment[grid_cycle, grid_sample] = np.interp(grid_time, source_time, values[rows])
+        segments[name] = segment
+    return groups[cycle_codes], segment_start_us.astype('datetime64[us]'), sample_counts, segments
+
+# Remove the least squares line of every row, over its first sample_counts samples
+def detrend_segments(segments, sample_counts):
+    sample = np.arange(segments.shape[1])
+    valid = sample < sample_counts[:, None]
+    sample_mean = (sample_counts - 1) / 2.0
+    centered = np.where(valid, sample - sample_mean[:, None], 0.0)
+    value_mean = segments.sum(axis=1) / sample_counts
+    slope = (centered * segments).sum(axis=1) / (centered ** 2).sum(axis=1)
+    return np.where(valid, segments - value_mean[:, None] - slope[:, None] * centered, 0.0)
+
+# Hann window over the first sample_counts samples of every row
+def segment_windows(sample_counts, length):
+    sample = np.arange(length)
+    window = 0.5 - 0.5 * np.cos(2.0 * np.pi * sample / np.maximum(sample_counts - 1, 1)[:, None])
+    return np.where(sample < sample_counts[:, None], window, 0.0)
+
+# Sway metrics of detrended segments:
+# dominant_frequency (Hz) of the windowed one-sided PSD peak, psd_peak the PSD there (unit²/Hz),
+# amplitude as half of the peak to peak value like analyze_spreader_movement,
+# decay_rate (1/s) of the Hilbert envelope and damping_ratio = decay_rate / (2 pi dominant_frequency)
+def sway_metrics(detrended, sample_counts, sample_interval):
+    cycle_count, length = detrended.shape
+    sample = np.arange(length)
+    valid = sample < sample_counts[:, None]
+
+    # Power spectral density, zero padded to a common FFT length
+    fft_length = 1 << max(int(FFT_PADDING * length - 1).bit_length(), 2)
+    window = segment_windows(sample_counts, length)
+    spectrum = np.fft.rfft(detrended * window, n=fft_length, axis=1)
+    frequencies = np.fft.rfftfreq(fft_length, sample_interval)
+    psd = np.abs(spectrum) ** 2 * (2.0 * sample_interval) / (window ** 2).sum(axis=1)[:, None]
+    peak_bin = np.argmax(psd[:, 1:-1], axis=1) + 1 # Without the DC and last bin
+
+    # Parabolic interpolation of the log PSD around the peak bin
+    rows = np.arange(cycle_count)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        below, peak, above = (np.log(psd[rows, peak_bin + shift]) for shift in (-1, 0, 1))
+        peak_shift = 0.5 * (below - above) / (below - 2.0 * peak + above)
+    peak_shift = np.where(np.isfinite(peak_shift), np.clip(peak_shift, -0.5, 0.5), 0.0)
+    dominant_frequency = (peak_bin + peak_shift) * frequencies[1]
+
+    amplitude = (np.where(valid, detrended, -np.inf).max(axis=1) - np.where(valid, detrended, np.inf).min(axis=1)) / 2
+
+    # Exponential decay of the envelope: least squares line of log(envelope) over time
+    envelope = np.abs(hilbert(detrended, axis=1))
+    edge = np.floor(sample_counts * ENVELOPE_EDGE)[:, None]
+    fitted = valid & (sample >= edge) & (sample < sample_counts[:, None] - edge) & (envelope > 0)
+    log_envelope = np.log(np.where(fitted, envelope, 1.0))
+    fitted_count = fitted.sum(axis=1)
+    time_mean = np.where(fitted, sample, 0).sum(axis=1) / np.maximum(fitted_count, 1)
+    centered = np.where(fitted, sample - time_mean[:, None], 0.0)
+    denominator = (centered ** 2).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        decay_rate = -(centered * log_envelope).sum(axis=1) / denominator / sample_interval
+        damping_ratio = decay_rate / (2.0 * np.pi * dominant_frequency)
+    decay_rate[fitted_count < 2] = np.nan
+    damping_ratio[fitted_count < 2] = np.nan
+
+    return {
+        'dominant_frequency': dominant_frequency,
+        'psd_peak': psd[rows, peak_bin],
+        'amplitude': amplitude,
+        'decay_rate': decay_rate,
+        'damping_ratio': damping_ratio
+    }
+
+# Per-cycle sway metrics of a batch of parsed and forward filled log data, e.g. from
+# SprTrc_settling.concat_log_data or SprTrc_columnar.parse_log_files_columnar
+# group_column: column that identifies a cycle (file or measurement)
+# Returns a table indexed by the group with the segment start, duration and sample count and
+# <signal>_<metric> columns of every sway signal. Cycles without a gated segment are left out,
+# a batch without any gated segment gives an empty table with the same columns.
+def analyse_spreader_sway(df_batch, group_column=SprTrc_settling.GROUP_COLUMN, signals=SWAY_SIGNALS, sample_interval=SAMPLE_INTERVAL):
+    cycles, segment_start, sample_counts, segments = resample_gated_segments(df_batch, group_column, signals, sample_interval)
+    metrics = {
+        'segment_start': segment_start,
+        'segment_duration': (sample_counts - 1) * sample_interval,
+        'segment_samples': sample_counts
+    }
+    for name, segment in segments.items():
+        if len(cycles) > 0:
+            for metric, values in sway_metrics(detrend_segments(segment, sample_counts), sample_counts, sample_interval).items():
+                metrics[name + '_' + metric] = values
+        else:
+            for metric in SWAY_METRICS:
+                metrics[name + '_' + metric] = np.zeros(0)
+    return pd.DataFrame(metrics, index=pd.Index(cycles, name=group_column))
@@ -0,0 +1,75 @@
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# Benchmark collecting the per-file analysis results of a batch:
+# one-row DataFrame + pd.concat per file (previous loop) against AnalysisAccumulator
+# Usage: python benchmarks/bench_analysis_accumulator.py [--files 1000 10000 50000] [--concat-max N]
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, REPO_DIR)
+
+def load_analysis_script():
+    spec = importlib.util.spec_from_file_location('analyse_spreader_tracking_data', os.path.join(REPO_DIR, 'Analyse_spreader tracking data.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# Synthetic analysis record of file number file_index
+def synthetic_analysis_record(analysis, file_index):
+    analysis_record = analysis.initialize_analysis_data_structure()
+    analysis_record['log_file_name'] = "MeasureResult_{:06d}.csv".format(file_index)
+    analysis_record['log_file_timestamp'] = datetime(2024, 3, 1) + timedelta(seconds=90 * file_index)
+    analysis_record['Lane'] = file_index % 12 + 1
+    analysis_record['Task'] = '1 -  Pick' if file_index % 2 else '2 -  Place'
+    analysis_record['Position'] = '3 -  Middle'
+    analysis_record['Cont_Length'] = 12192
+    analysis_record['Cont_Width'] = 2438
+    analysis_record['Cont_Height'] = 2896
+    analysis_record['SpTr_settling_time'] = pd.Timedelta(milliseconds=2000 + file_index % 500)
+    return analysis_record
+
+def collect_with_concat(analysis, file_count):
+    df_processed_logs = pd.DataFrame()
+    for file_index in range(file_count):
+        analysis_record = synthetic_analysis_record(analysis, file_index)
+        df_current_analysis = pd.DataFrame(columns=list(analysis_record))
+        for column, value in analysis_record.items():
+            if value is not None:
+                df_current_analysis.loc[0, column] = value
+        df_processed_logs = pd.concat([df_processed_logs, df_current_analysis], ignore_index=True)
+    return df_processed_logs
+
+def collect_with_accumulator(analysis, file_count):
+    processed_logs = analysis.AnalysisAccumulator()
+    for file_index in range(file_count):
+        processed_logs.append(synthetic_analysis_record(analysis, file_index))
+    return processed_logs.to_dataframe()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the batch analysis result accumulation")
+    parser.add_argument('--files', type=int, nargs='+', default=[1000, 10000, 50000], help="Synthetic batch sizes")
+    parser.add_argument('--concat-max', type=int, default=10000, help="Largest batch timed with the quadratic concat loop")
+    args = parser.parse_args()
+
+    analysis = load_analysis_script()
+    print("{:>8s} {:>14s} {:>14s} {:>18s}".format('files', 'concat [s]', 'accumulator [s]', 'accumulator us/file'))
+    for file_count in args.files:
+        concat_elapsed = None
+        if file_count <= args.concat_max:
+            start = time.perf_counter()
+            collect_with_concat(analysis, file_count)
+            concat_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        df_processed_logs = collect_with_accumulator(analysis, file_count)
+        elapsed = time.perf_counter() - start
+        assert len(df_processed_logs) == file_count
+        print("{:8d} {:>14s} {:14.3f} {:18.1f}".format(file_count, "{:.3f}".format(concat_elapsed) if concat_elapsed is not None else 'skipped', elapsed, elapsed / file_count * 1e6))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Benchmark finding the MeasureResult files of a log tree:
+# os.walk (collect_measure_result_files) against an incremental SprTrc_catalog refresh and query
+# Usage: python benchmarks/bench_catalog.py [--directories 200] [--files-per-directory 100]
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import SprTrc_parser as stp
+import SprTrc_catalog
+from synthetic_log import write_synthetic_log
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark os.walk against the incremental file catalog")
+    parser.add_argument('--directories', type=int, default=200, help="Day directories in the log tree")
+    parser.add_argument('--files-per-directory', type=int, default=100, help="MeasureResult files per directory")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Small logs, the catalog reads the header only
+        template_file = os.path.join(tmp_dir, 'template.csv')
+        write_synthetic_log(template_file, tracking_samples=50)
+        with open(template_file, 'rb') as file:
+            log_data = file.read()
+        log_root = os.path.join(tmp_dir, 'logs')
+        for directory_index in range(args.directories):
+            directory = os.path.join(log_root, 'day_{:04d}'.format(directory_index))
+            os.makedirs(directory)
+            for file_index in range(args.files_per_directory):
+                with open(os.path.join(directory, 'MeasureResult_{:05d}.csv'.format(file_index)), 'wb') as file:
+                    file.write(log_data)
+        print("Log tree: {} directories, {} files".format(args.directories, args.directories * args.files_per_directory))
+
+        walk_elapsed, walk_files = timed(stp.collect_measure_result_files, log_root)
+        print("os.walk:               {:8.3f} s ({} files)".format(walk_elapsed, len(walk_files)))
+
+        catalog = SprTrc_catalog.LogCatalog(os.path.join(tmp_dir, 'catalog.sqlite'))
+        first_elapsed, _ = timed(catalog.refresh, log_root)
+        print("catalog first refresh: {:8.3f} s (headers read)".format(first_elapsed))
+        refresh_elapsed, counts = timed(catalog.refresh, log_root)
+        print("catalog refresh:       {:8.3f} s ({} directories listed)".format(refresh_elapsed, counts['directories_listed']))
+
+        # One new file in one directory
+        with open(os.path.join(log_root, 'day_0000', 'MeasureResult_new.csv'), 'wb') as file:
+            file.write(log_data)
+        changed_elapsed, counts = timed(catalog.refresh, log_root)
+        print("catalog refresh, 1 new:{:8.3f} s ({} directories listed, {} files added)".format(changed_elapsed, counts['directories_listed'], counts['files_added']))
+
+        query_elapsed, catalog_files = timed(catalog.find, log_root, task='Place')
+        print("catalog query:         {:8.3f} s ({} files)".format(query_elapsed, len(catalog_files)))
+        catalog.close()
+
+if __name__ == '__main__':
+    main()
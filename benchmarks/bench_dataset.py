@@ -0,0 +1,81 @@
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+# Benchmark writing and reading back the parsed log data of a batch:
+# a CSV file per log (handle_logs) and one Excel workbook against the partitioned
+# Parquet and Feather datasets of SprTrc_dataset
+# Usage: python benchmarks/bench_dataset.py [--files 40] [--samples 2000] [--no-excel]
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import pandas as pd
+import SprTrc_columnar
+import SprTrc_dataset
+from synthetic_log import write_synthetic_log
+
+EXCEL_MAX_ROWS = 1048575 # Rows of a worksheet without the header
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def directory_bytes(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(file) for file in glob.glob(os.path.join(path, '**', '*'), recursive=True) if os.path.isfile(file))
+
+def write_csv_files(df_batch, csv_dir, log_file_names):
+    os.makedirs(csv_dir)
+    for file_index, df_log_data in df_batch.groupby('file_index', sort=False):
+        df_log_data.drop(columns='file_index').reset_index(drop=True).to_csv(os.path.join(csv_dir, log_file_names[file_index] + '.csv'))
+
+def read_csv_files(csv_dir):
+    return pd.concat([pd.read_csv(csv_file, index_col=0) for csv_file in sorted(glob.glob(os.path.join(csv_dir, '*.csv')))], ignore_index=True)
+
+def report(name, write_elapsed, read_elapsed, size, rows):
+    print("{:10s} write {:8.3f} s, read {:8.3f} s, {:8.1f} MB, {} rows".format(name, write_elapsed, read_elapsed, size / 1e6, rows))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV/Excel output against partitioned Parquet/Feather datasets")
+    parser.add_argument('--files', type=int, default=40, help="Synthetic log files")
+    parser.add_argument('--samples', type=int, default=2000, help="Spreader tracking samples per synthetic log")
+    parser.add_argument('--no-excel', action='store_true', help="Skip the Excel workbook, slow for large batches")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_files = []
+        for file_index in range(args.files):
+            log_file = os.path.join(tmp_dir, 'MeasureResult_{}.csv'.format(file_index))
+            write_synthetic_log(log_file, tracking_samples=args.samples, task='1 -  Pick' if file_index % 2 else '2 -  Place', seed=file_index)
+            log_files.append(log_file)
+        df_batch, _ = SprTrc_columnar.parse_log_files_columnar(log_files)
+        log_file_names = [os.path.splitext(os.path.basename(log_file))[0] for log_file in log_files]
+        print("Batch: {} files, {} rows".format(args.files, len(df_batch)))
+
+        csv_dir = os.path.join(tmp_dir, 'csv')
+        write_elapsed, _ = timed(write_csv_files, df_batch, csv_dir, log_file_names)
+        read_elapsed, df_read = timed(read_csv_files, csv_dir)
+        report('csv', write_elapsed, read_elapsed, directory_bytes(csv_dir), len(df_read))
+
+        if not args.no_excel:
+            excel_file = os.path.join(tmp_dir, 'batch.xlsx')
+            df_excel = df_batch.iloc[:EXCEL_MAX_ROWS]
+            write_elapsed, _ = timed(df_excel.to_excel, excel_file, index=False)
+            read_elapsed, df_read = timed(pd.read_excel, excel_file)
+            report('xlsx', write_elapsed, read_elapsed, directory_bytes(excel_file), len(df_read))
+
+        for dataset_format in SprTrc_dataset.DATASET_FORMATS:
+            dataset_dir = os.path.join(tmp_dir, dataset_format)
+            write_elapsed, _ = timed(SprTrc_dataset.write_log_dataset, df_batch, dataset_dir, dataset_format, log_file_names=log_file_names)
+            read_elapsed, df_read = timed(SprTrc_dataset.read_log_dataset, dataset_dir, dataset_format)
+            report(dataset_format, write_elapsed, read_elapsed, directory_bytes(dataset_dir), len(df_read))
+            read_elapsed, df_read = timed(SprTrc_dataset.read_log_dataset, dataset_dir, dataset_format, tasks='Pick')
+            print("{:10s} read of the Pick partitions {:8.3f} s, {} rows".format(dataset_format, read_elapsed, len(df_read)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Benchmark filtered batch parsing: parse every row of every file and filter in pandas against
+# the filters pushed down into the parser (stp.RecordFilter), time and peak traced memory
+# Usage: python benchmarks/bench_filter.py [--files 40] [--samples 2000] [--task Place] [--z-range 4000 5500]
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import SprTrc_parser as stp
+import SprTrc_columnar
+from synthetic_log import write_synthetic_log
+
+def traced(function, *args, **kwargs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+# Parse everything, then select the files and rows in pandas
+def parse_then_filter(log_files, record_filter):
+    df_batch, _ = SprTrc_columnar.parse_log_files_columnar(log_files)
+    first_rows = df_batch.groupby('file_index', sort=False).head(1)
+    selected = first_rows.loc[first_rows.apply(lambda row: record_filter.matches_job(row.to_dict()), axis=1), 'file_index']
+    df_batch = df_batch[df_batch['file_index'].isin(selected)]
+    if record_filter.z_low is not None:
+        df_batch = df_batch[df_batch['SpTrMsg_position_Z'] > record_filter.z_low]
+    if record_filter.z_high is not None:
+        df_batch = df_batch[df_batch['SpTrMsg_position_Z'] < record_filter.z_high]
+    return df_batch.reset_index(drop=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark predicate pushdown into the parser")
+    parser.add_argument('--files', type=int, default=40, help="Synthetic log files, alternating Pick and Place")
+    parser.add_argument('--samples', type=int, default=2000, help="Spreader tracking samples per synthetic log")
+    parser.add_argument('--task', default='Place', help="Task filter")
+    parser.add_argument('--z-range', type=float, nargs=2, default=[4000.0, 5500.0], help="Spreader Z filter, mm")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_files = []
+        for file_index in range(args.files):
+            log_file = os.path.join(tmp_dir, 'MeasureResult_{}.csv'.format(file_index))
+            write_synthetic_log(log_file, tracking_samples=args.samples, task='1 -  Pick' if file_index % 2 else '2 -  Place', seed=file_index)
+            log_files.append(log_file)
+        record_filter = stp.RecordFilter(task=args.task, z_range=args.z_range)
+        print("Batch: {} files, {} samples each, task {}, Z {}".format(args.files, args.samples, args.task, args.z_range))
+
+        full_elapsed, full_peak, df_full = traced(parse_then_filter, log_files, record_filter)
+        print("parse, then filter: {:8.3f} s, peak {:8.1f} MB, {} rows".format(full_elapsed, full_peak / 1e6, len(df_full)))
+        pushdown_elapsed, pushdown_peak, (df_pushdown, _) = traced(SprTrc_columnar.parse_log_files_columnar, log_files, record_filter=record_filter)
+        print("pushdown:           {:8.3f} s, peak {:8.1f} MB, {} rows ({:.1f}x faster)".format(pushdown_elapsed, pushdown_peak / 1e6, len(df_pushdown), full_elapsed / pushdown_elapsed))
+
+if __name__ == '__main__':
+    main()
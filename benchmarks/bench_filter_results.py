@@ -0,0 +1,75 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+# Benchmark filtering a measure result table: the per-column text comparison with Excel
+# input and output against SprTrc_filter with Parquet input and output
+# Usage: python benchmarks/bench_filter_results.py [--rows 500000] [--excel]
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import SprTrc_dataset
+import SprTrc_filter
+
+SELECTED_COLUMNS = {'Lane': [3, 4, 5], 'Task': ['2 -  Place'], 'Position': ['3 -  Middle', '1 -  Front']}
+
+# Filtering of the script before the engine, every column compared as text
+def filter_as_text(df, selected_columns):
+    filtered_df = df
+    for column, values in selected_columns.items():
+        if values:
+            filtered_df = filtered_df[filtered_df[column].astype(str).isin(map(str, values))]
+    return filtered_df
+
+def synthetic_results(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'log_file_name': ['MeasureResult_{}.csv'.format(index) for index in range(rows)],
+        'log_file_timestamp': pd.Timestamp('2024-03-12') + pd.to_timedelta(rng.integers(0, 90 * 86400, rows), unit='s'),
+        'Lane': rng.integers(1, 13, rows),
+        'Task': rng.choice(['1 -  Pick', '2 -  Place'], rows),
+        'Position': rng.choice(['1 -  Front', '2 -  Rear', '3 -  Middle'], rows),
+        'Cont_Height': rng.choice([2591, 2896], rows),
+        'Settling_time': rng.normal(2.0, 0.5, rows)
+    })
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the measure result filtering engine")
+    parser.add_argument('--rows', type=int, default=500000, help="Rows of the synthetic result table")
+    parser.add_argument('--excel', action='store_true', help="Also time reading and writing Excel, slow for large tables")
+    args = parser.parse_args()
+
+    df_results = synthetic_results(args.rows)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        parquet_file = os.path.join(tmp_dir, 'results.parquet')
+        SprTrc_dataset.write_table(df_results, parquet_file)
+        print("Table: {} rows, filter {}".format(args.rows, SELECTED_COLUMNS))
+
+        text_elapsed, df_text = timed(filter_as_text, df_results, SELECTED_COLUMNS)
+        print("text comparison: {:8.3f} s, {} rows".format(text_elapsed, len(df_text)))
+        engine_elapsed, engine = timed(SprTrc_filter.MeasureResultFilter, df_results)
+        index_elapsed, _ = timed(lambda: [engine.column_values(column) for column in SELECTED_COLUMNS])
+        mask_elapsed, df_engine = timed(engine.filter, SELECTED_COLUMNS)
+        print("value indexes:   {:8.3f} s".format(engine_elapsed + index_elapsed))
+        print("engine mask:     {:8.3f} s, {} rows ({:.0f}x), same rows: {}".format(mask_elapsed, len(df_engine), text_elapsed / mask_elapsed, df_engine.equals(df_text)))
+
+        read_elapsed, _ = timed(SprTrc_dataset.read_table, parquet_file)
+        write_elapsed, _ = timed(SprTrc_dataset.write_table, df_engine, os.path.join(tmp_dir, 'filtered.parquet'))
+        print("parquet:         read {:8.3f} s, write {:8.3f} s".format(read_elapsed, write_elapsed))
+        if args.excel:
+            excel_file = os.path.join(tmp_dir, 'results.xlsx')
+            df_results.to_excel(excel_file, index=False)
+            read_elapsed, _ = timed(pd.read_excel, excel_file)
+            write_elapsed, _ = timed(df_text.to_excel, os.path.join(tmp_dir, 'filtered.xlsx'), index=False)
+            print("excel:           read {:8.3f} s, write {:8.3f} s".format(read_elapsed, write_elapsed))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# Benchmark the startup cost of importing the parser modules in a fresh interpreter
+# Reports the wall time over an empty interpreter start and the -X importtime breakdown
+# Usage: python benchmarks/bench_import_time.py [--modules SprTrc_parser ...] [--reference path/to/older/SprTrc_parser.py]
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+def import_statement(module=None, path=None):
+    if path is not None:
+        return ("import importlib.util; spec = importlib.util.spec_from_file_location('reference', {!r}); "
+                "spec.loader.exec_module(importlib.util.module_from_spec(spec))").format(path)
+    return "import {}".format(module)
+
+def run_python(code, *options):
+    return subprocess.run([sys.executable, *options, '-c', code], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+
+def wall_time(code, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_python(code)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+# (cumulative time [us], module) of the top-level imports and their direct imports, from the -X importtime output
+def import_times(code):
+    imports = []
+    for line in run_python(code, '-X', 'importtime').stderr.splitlines():
+        # 'import time:  self [us] | cumulative | imported package', nested imports are indented by 2 per level
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            imports.append((int(cumulative_us), name.strip()))
+    return imports
+
+# Heaviest imports of the code, leaving out the modules imported by the interpreter start
+def heaviest_imports(code, count, startup_modules):
+    imports = [(cumulative_us, module) for cumulative_us, module in import_times(code) if module not in startup_modules]
+    return sorted(imports, reverse=True)[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the import time of the parser modules")
+    parser.add_argument('--modules', nargs='+', default=['SprTrc_parser', 'SprTrc_cache', 'SprTrc_columnar'], help="Modules to import")
+    parser.add_argument('--reference', help="Older SprTrc_parser.py to compare against (before)")
+    parser.add_argument('--repeat', type=int, default=5, help="Interpreter starts per module, the best time is reported")
+    parser.add_argument('--top', type=int, default=6, help="Heaviest imports listed per module")
+    args = parser.parse_args()
+
+    targets = [(module, import_statement(module)) for module in args.modules]
+    if args.reference:
+        targets.append(('reference', import_statement(path=os.path.abspath(args.reference))))
+
+    empty_start = wall_time('pass', args.repeat)
+    startup_modules = {module for _, module in import_times('pass')}
+    print("Empty interpreter start: {:.1f} ms".format(empty_start * 1000))
+    for name, code in targets:
+        elapsed = wall_time(code, args.repeat) - empty_start
+        print("\n{}: +{:.1f} ms".format(name, elapsed * 1000))
+        for cumulative_us, module in heaviest_imports(code, args.top, startup_modules):
+            print("    {:8.1f} ms  {}".format(cumulative_us / 1000, module))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+# Benchmark SprTrc_parser.parse_log_file throughput in lines/sec
+# Usage: python benchmarks/bench_parse_log_file.py [--samples N] [--line-parser] [--reference path/to/older/SprTrc_parser.py]
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import SprTrc_parser as stp
+from synthetic_log import write_synthetic_log
+
+def load_parser_module(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# Rows without the Cycle_ID column, which older parsers do not have
+def without_cycle_ids(rows):
+    return [{column: value for column, value in row.items() if column != 'Cycle_ID'} for row in rows]
+
+def time_parse(parse_log_file, log_file, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parsed_data = parse_log_file(log_file)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, parsed_data
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parse_log_file on a synthetic MeasureResult log")
+    parser.add_argument('--samples', type=int, default=5000, help="Spreader tracking samples in the synthetic log")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetitions, the best time is reported")
+    parser.add_argument('--line-parser', action='store_true', help="Also time the line by line iter_measurement_records")
+    parser.add_argument('--reference', help="Older SprTrc_parser.py to compare against (before)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_file = os.path.join(tmp_dir, 'MeasureResult_synthetic.csv')
+        line_count = write_synthetic_log(log_file, tracking_samples=args.samples)
+        print("Synthetic log: {} lines, {:.1f} MB".format(line_count, os.path.getsize(log_file) / 1e6))
+
+        elapsed, parsed_data = time_parse(stp.parse_log_file, log_file, args.repeat)
+        print("current:   {:10.0f} lines/sec ({:.3f} s, {} rows)".format(line_count / elapsed, elapsed, len(parsed_data)))
+
+        if args.line_parser:
+            line_elapsed, line_data = time_parse(lambda log_file: list(stp.iter_measurement_records(log_file)), log_file, args.repeat)
+            print("lines:     {:10.0f} lines/sec ({:.3f} s, {} rows)".format(line_count / line_elapsed, line_elapsed, len(line_data)))
+
+        if args.reference:
+            reference = load_parser_module(args.reference, 'SprTrc_parser_reference')
+            reference_elapsed, reference_data = time_parse(reference.parse_log_file, log_file, args.repeat)
+            print("reference: {:10.0f} lines/sec ({:.3f} s, {} rows)".format(line_count / reference_elapsed, reference_elapsed, len(reference_data)))
+            print("speedup:   {:10.2f}x".format(reference_elapsed / elapsed))
+            if without_cycle_ids(reference_data) != without_cycle_ids(parsed_data):
+                print("WARNING: parsed rows differ from the reference parser")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Speed of parse_timestamp, parse_timestamp_us and decode_timestamps_us against datetime.strptime
+# Their equivalence is tested in tests/test_parse_timestamp.py
+# Usage: python benchmarks/bench_parse_timestamp.py [--count N]
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import SprTrc_parser as stp
+
+def generate_timestamps(count, seed=0):
+    # Consecutive log timestamps with 1-6 fraction digits, crossing a few dates
+    rng = random.Random(seed)
+    timestamp = datetime(2024, 2, 28, 23, 0, 0)
+    timestamps = []
+    for _ in range(count):
+        timestamp += timedelta(milliseconds=rng.randint(0, 2000))
+        fraction_digits = rng.randint(1, 6)
+        fraction = str(timestamp.microsecond).zfill(6)[:fraction_digits]
+        timestamps.append(timestamp.strftime('%d.%m.%Y %H:%M:%S;') + fraction)
+    return timestamps
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the log timestamp decoders against datetime.strptime")
+    parser.add_argument('--count', type=int, default=200000, help="Number of timestamps")
+    args = parser.parse_args()
+
+    timestamps = generate_timestamps(args.count)
+
+    for name, decode in [
+        ('strptime', lambda: [datetime.strptime(timestamp, stp.TIMESTAMP_FORMAT) for timestamp in timestamps]),
+        ('parse_timestamp', lambda: [stp.parse_timestamp(timestamp) for timestamp in timestamps]),
+        ('parse_timestamp_us', lambda: [stp.parse_timestamp_us(timestamp) for timestamp in timestamps]),
+        ('decode_timestamps_us', lambda: stp.decode_timestamps_us(timestamps)),
+    ]:
+        start = time.perf_counter()
+        decode()
+        elapsed = time.perf_counter() - start
+        print("{:22s} {:12.0f} timestamps/sec".format(name, args.count / elapsed))
+
+if __name__ == '__main__':
+    main()
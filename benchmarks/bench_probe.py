@@ -0,0 +1,42 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Benchmark reading the job info of a batch of log files:
+# full parse (parse_log_file and the first row) against the header probe (probe_job_info)
+# Usage: python benchmarks/bench_probe.py [--files 50] [--samples 2000]
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import SprTrc_parser as stp
+from synthetic_log import write_synthetic_log
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the header probe against a full parse")
+    parser.add_argument('--files', type=int, default=50, help="Synthetic log files")
+    parser.add_argument('--samples', type=int, default=2000, help="Spreader tracking samples per synthetic log")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_files = []
+        for file_index in range(args.files):
+            log_file = os.path.join(tmp_dir, 'MeasureResult_{}.csv'.format(file_index))
+            write_synthetic_log(log_file, tracking_samples=args.samples, task='1 -  Pick' if file_index % 2 else '2 -  Place', seed=file_index)
+            log_files.append(log_file)
+        print("Batch: {} files, {:.1f} MB".format(args.files, sum(os.path.getsize(log_file) for log_file in log_files) / 1e6))
+
+        start = time.perf_counter()
+        parsed = [{column: stp.parse_log_file(log_file)[0][column] for column in stp.JOB_INFO_COLUMNS} for log_file in log_files]
+        parse_elapsed = time.perf_counter() - start
+        print("full parse: {:8.3f} s".format(parse_elapsed))
+
+        start = time.perf_counter()
+        probed = [stp.probe_job_info(log_file) for log_file in log_files]
+        probe_elapsed = time.perf_counter() - start
+        print("probe:      {:8.3f} s ({:.0f}x)".format(probe_elapsed, parse_elapsed / probe_elapsed))
+        print("same job info: {}".format(parsed == probed))
+
+if __name__ == '__main__':
+    main()
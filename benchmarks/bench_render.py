@@ -0,0 +1,85 @@
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+# Benchmark rendering the settling height plots of a batch to PNG files:
+# a new pyplot figure per file (plot_settling_height_data) against the reused SprTrc_render
+# figure, sequentially and in a process pool
+# Usage: python benchmarks/bench_render.py [--files 200] [--samples 2000] [--workers 4] [--max-plot-points 1000]
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import matplotlib
+matplotlib.use('Agg')
+import SprTrc_render
+from synthetic_log import write_synthetic_log
+
+def load_analysis_script():
+    spec = importlib.util.spec_from_file_location('analyse_spreader_tracking_data', os.path.join(REPO_DIR, 'Analyse_spreader tracking data.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+analysis = load_analysis_script()
+
+# Pyplot figure per file, plt.show() replaced by saving and closing the figure
+def render_with_pyplot(log_file, plot_dir):
+    import matplotlib.pyplot as plt
+    _, df_log_data, df_settling_height_range = analysis.analyse_log_file(log_file)
+    show = plt.show
+    plt.show = lambda: (plt.savefig(SprTrc_render.image_file_path(plot_dir, log_file)), plt.close('all'))
+    try:
+        analysis.plot_settling_height_data(df_log_data, df_settling_height_range)
+    finally:
+        plt.show = show
+
+def render_with_template(log_file, plot_dir, max_plot_points=None):
+    current_analysis, df_log_data, df_settling_height_range = analysis.analyse_log_file(log_file)
+    analysis.save_settling_height_plot(current_analysis, log_file, df_log_data, df_settling_height_range, plot_dir, 'png', max_plot_points)
+
+def render_worker(arguments):
+    render_with_template(*arguments)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark off-screen rendering of the settling height plots")
+    parser.add_argument('--files', type=int, default=200, help="Synthetic log files")
+    parser.add_argument('--samples', type=int, default=2000, help="Spreader tracking samples per synthetic log")
+    parser.add_argument('--workers', type=int, default=4, help="Worker processes of the pool run")
+    parser.add_argument('--max-plot-points', type=int, help="Decimate the plotted series in the template runs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_files = []
+        for file_index in range(args.files):
+            log_file = os.path.join(tmp_dir, 'MeasureResult_{}.csv'.format(file_index))
+            write_synthetic_log(log_file, tracking_samples=args.samples, task='1 -  Pick' if file_index % 2 else '2 -  Place', seed=file_index)
+            log_files.append(log_file)
+        plot_dir = os.path.join(tmp_dir, 'plots')
+        os.makedirs(plot_dir)
+        print("Batch: {} files, {} samples each".format(args.files, args.samples))
+
+        start = time.perf_counter()
+        for log_file in log_files:
+            render_with_pyplot(log_file, plot_dir)
+        pyplot_elapsed = time.perf_counter() - start
+        print("pyplot per file: {:8.3f} s".format(pyplot_elapsed))
+
+        start = time.perf_counter()
+        for log_file in log_files:
+            render_with_template(log_file, plot_dir, args.max_plot_points)
+        template_elapsed = time.perf_counter() - start
+        print("template:        {:8.3f} s ({:.1f}x)".format(template_elapsed, pyplot_elapsed / template_elapsed))
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(args.workers) as pool:
+            pool.map(render_worker, [(log_file, plot_dir, args.max_plot_points) for log_file in log_files], chunksize=8)
+        pool_elapsed = time.perf_counter() - start
+        print("template pool:   {:8.3f} s ({:.1f}x, {} workers)".format(pool_elapsed, pyplot_elapsed / pool_elapsed, args.workers))
+
+if __name__ == '__main__':
+    main()
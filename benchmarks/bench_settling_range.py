@@ -0,0 +1,69 @@
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# Benchmark the settling range analysis of a batch:
+# calculate_settling_range per file against SprTrc_settling.calculate_settling_range_batch
+# Usage: python benchmarks/bench_settling_range.py [--files 10000] [--samples 300] [--distinct 20]
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import SprTrc_columnar
+import SprTrc_settling
+from synthetic_log import write_synthetic_log
+
+def load_analysis_script():
+    spec = importlib.util.spec_from_file_location('analyse_spreader_tracking_data', os.path.join(REPO_DIR, 'Analyse_spreader tracking data.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# Parsed and forward filled data of distinct synthetic logs, Pick and Place alternating
+def synthetic_log_data(distinct, samples):
+    frames = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for seed in range(distinct):
+            log_file = os.path.join(tmp_dir, 'MeasureResult_{}.csv'.format(seed))
+            write_synthetic_log(log_file, tracking_samples=samples, task='1 -  Pick' if seed % 2 else '2 -  Place', seed=seed)
+            frames.append(SprTrc_columnar.parse_log_file_columnar(log_file).ffill(axis=0))
+    return frames
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-file and batch settling range analysis")
+    parser.add_argument('--files', type=int, default=10000, help="Files in the batch")
+    parser.add_argument('--samples', type=int, default=300, help="Spreader tracking samples per synthetic log")
+    parser.add_argument('--distinct', type=int, default=20, help="Distinct synthetic logs, repeated to fill the batch")
+    args = parser.parse_args()
+
+    analysis = load_analysis_script()
+    distinct_frames = synthetic_log_data(args.distinct, args.samples)
+    frames = [distinct_frames[file_index % args.distinct] for file_index in range(args.files)]
+    print("Batch: {} files, {} rows".format(args.files, sum(len(frame) for frame in frames)))
+
+    start = time.perf_counter()
+    settling_times = [analysis.calculate_settling_range(df_log_data)[1] for df_log_data in frames]
+    per_file_elapsed = time.perf_counter() - start
+    print("per file:        {:8.3f} s".format(per_file_elapsed))
+
+    start = time.perf_counter()
+    df_batch = SprTrc_settling.concat_log_data(frames)
+    concat_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    _, df_settling = SprTrc_settling.calculate_settling_range_batch(df_batch)
+    batch_elapsed = time.perf_counter() - start
+    print("concat:          {:8.3f} s".format(concat_elapsed))
+    print("batch:           {:8.3f} s".format(batch_elapsed))
+    print("speedup:         {:8.1f}x (analysis), {:.1f}x (with concat)".format(per_file_elapsed / batch_elapsed, per_file_elapsed / (batch_elapsed + concat_elapsed)))
+
+    batch_settling_times = [None if pd.isnull(settling_time) else settling_time for settling_time in df_settling['settling_time']]
+    if batch_settling_times != settling_times:
+        print("WARNING: batch settling times differ from the per-file results")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+# Benchmark the sway spectral analysis of a batch:
+# SprTrc_parser.analyze_spreader_movement per file against SprTrc_spectral.analyse_spreader_sway
+# Usage: python benchmarks/bench_spectral.py [--files 2000] [--samples 300] [--distinct 20]
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import SprTrc_parser as stp
+import SprTrc_settling
+import SprTrc_spectral
+from bench_settling_range import synthetic_log_data
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-file and batch sway spectral analysis")
+    parser.add_argument('--files', type=int, default=2000, help="Files (cycles) in the batch")
+    parser.add_argument('--samples', type=int, default=300, help="Spreader tracking samples per synthetic log")
+    parser.add_argument('--distinct', type=int, default=20, help="Distinct synthetic logs, repeated to fill the batch")
+    args = parser.parse_args()
+
+    distinct_frames = synthetic_log_data(args.distinct, args.samples)
+    frames = [distinct_frames[file_index % args.distinct] for file_index in range(args.files)]
+    print("Batch: {} files, {} rows".format(args.files, sum(len(frame) for frame in frames)))
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()): # analyze_spreader_movement prints its results
+        for df_log_data in frames:
+            stp.analyze_spreader_movement(df_log_data, 'benchmark', plots=False)
+    per_file_elapsed = time.perf_counter() - start
+    print("per file:        {:8.3f} s".format(per_file_elapsed))
+
+    df_batch = SprTrc_settling.concat_log_data(frames)
+    start = time.perf_counter()
+    df_sway_metrics = SprTrc_spectral.analyse_spreader_sway(df_batch)
+    batch_elapsed = time.perf_counter() - start
+    print("batch:           {:8.3f} s ({} cycles)".format(batch_elapsed, len(df_sway_metrics)))
+    print("speedup:         {:8.1f}x".format(per_file_elapsed / batch_elapsed))
+
+    # Never seated batch: no cycle has a gated segment, the metrics table is empty
+    df_unseated = df_batch.assign(SpTrMsg_position_Z=20000)
+    start = time.perf_counter()
+    df_unseated_metrics = SprTrc_spectral.analyse_spreader_sway(df_unseated)
+    print("not seated:      {:8.3f} s ({} cycles)".format(time.perf_counter() - start, len(df_unseated_metrics)))
+    if not df_unseated_metrics.empty or list(df_unseated_metrics.columns) != list(df_sway_metrics.columns):
+        print("WARNING: a batch without gated segments should give an empty table with the metric columns")
+
+if __name__ == '__main__':
+    main()
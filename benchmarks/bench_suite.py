@@ -0,0 +1,195 @@
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Benchmark suite of the parse and analysis pipeline on synthetic MeasureResult logs
+# Cases, every one at every scale (total size of the logs):
+#   parse_log_file             SprTrc_parser.parse_log_file of every log
+#   calculate_settling_range   settling range of every forward filled measurement cycle
+#   analyze_spreader_movement  SprTrc_parser.analyze_spreader_movement of every log, without plots
+#   batch                      the analysis script main() over all logs, without plots
+# Only the benchmarked calls are timed, the best of --repeat runs. The logs are generated once
+# per scale and generator options into --data-dir and reused by later runs. The results are
+# written as JSON and compared with an earlier results file given as --baseline.
+# Usage: python benchmarks/bench_suite.py [--scales 1MB 100MB 1GB] [--baseline results.json]
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import SprTrc_parser as stp
+import SprTrc_columnar
+from synthetic_log import parse_size, write_synthetic_cycles_log
+
+CASES = ['parse_log_file', 'calculate_settling_range', 'analyze_spreader_movement', 'batch']
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), 'SprTrc_benchmarks')
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+DATA_SET_FILE = 'data_set.json' # Counts of a complete data set
+
+# Registered as a module, the process pool of the batch case pickles its worker function (fork start method)
+def load_analysis_script():
+    spec = importlib.util.spec_from_file_location('analyse_spreader_tracking_data', os.path.join(REPO_DIR, 'Analyse_spreader tracking data.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+# Logs of one scale: files of cycles_per_file cycles until their total size reaches size.
+# Returns the log files and the counts of files, cycles, lines and bytes
+def synthetic_data_set(data_dir, size, options):
+    set_dir = os.path.join(data_dir, '{samples}s_{tracking_rate:g}hz_{pick_ratio:g}pick_{noise_lines}noise_{cycles_per_file}c_{seed}'.format(**options), str(size))
+    set_file = os.path.join(set_dir, DATA_SET_FILE)
+    if os.path.exists(set_file):
+        with open(set_file) as file:
+            data_set = json.load(file)
+        return [os.path.join(set_dir, log_file) for log_file in data_set['log_files']], data_set['counts']
+
+    os.makedirs(set_dir, exist_ok=True)
+    start = time.perf_counter()
+    log_files = []
+    counts = {'files': 0, 'cycles': 0, 'lines': 0, 'bytes': 0}
+    while counts['bytes'] < size:
+        log_file = 'MeasureResult_{:05d}.csv'.format(counts['files'])
+        file_counts = write_synthetic_cycles_log(os.path.join(set_dir, log_file), options['cycles_per_file'], None, options['samples'],
+                                                 options['tracking_rate'], options['pick_ratio'], options['noise_lines'], options['seed'] + counts['files'])
+        log_files.append(log_file)
+        counts['files'] += 1
+        for name in ['cycles', 'lines', 'bytes']:
+            counts[name] += file_counts[name]
+    with open(set_file, 'w') as file:
+        json.dump({'log_files': log_files, 'counts': counts}, file)
+    print("Generated {} logs, {:.1f} MB in {:.1f} s".format(counts['files'], counts['bytes'] / 1e6, time.perf_counter() - start))
+    return [os.path.join(set_dir, log_file) for log_file in log_files], counts
+
+# Forward filled parse results of every log, one at a time
+def iter_log_data(log_files):
+    for log_file in log_files:
+        yield log_file, SprTrc_columnar.parse_log_file_columnar(log_file).ffill(axis=0)
+
+# Benchmark cases: (seconds, items) of one run over the logs
+def run_parse_log_file(log_files, analysis, options):
+    rows = 0
+    start = time.perf_counter()
+    for log_file in log_files:
+        rows += len(stp.parse_log_file(log_file))
+    return time.perf_counter() - start, rows
+
+def run_calculate_settling_range(log_files, analysis, options):
+    elapsed = 0.0
+    cycles = 0
+    for log_file, df_log_data in iter_log_data(log_files):
+        for _, df_cycle in df_log_data.groupby('Cycle_ID', sort=False):
+            df_cycle = df_cycle.reset_index(drop=True)
+            start = time.perf_counter()
+            analysis.calculate_settling_range(df_cycle)
+            elapsed += time.perf_counter() - start
+            cycles += 1
+    return elapsed, cycles
+
+def run_analyze_spreader_movement(log_files, analysis, options):
+    elapsed = 0.0
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for log_file, df_log_data in iter_log_data(log_files):
+            start = time.perf_counter()
+            stp.analyze_spreader_movement(df_log_data, os.path.basename(log_file), plots=False)
+            elapsed += time.perf_counter() - start
+    return elapsed, len(log_files)
+
+def run_batch(log_files, analysis, options):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            analysis.main(log_files, os.path.join(tmp_dir, 'Spreader_tracking_analysis.parquet'), workers=options['workers'], plots=False)
+            elapsed = time.perf_counter() - start
+    return elapsed, len(log_files)
+
+CASE_RUNS = {
+    'parse_log_file': (run_parse_log_file, 'rows'),
+    'calculate_settling_range': (run_calculate_settling_range, 'cycles'),
+    'analyze_spreader_movement': (run_analyze_spreader_movement, 'files'),
+    'batch': (run_batch, 'files'),
+}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Print the speedup of every result against the same case and scale of a baseline results file
+def compare_results(results, baseline_file):
+    with open(baseline_file) as file:
+        baseline = json.load(file)
+    if baseline['options'] != results['options']:
+        print("WARNING: the baseline was run with other options: {}".format(baseline['options']))
+    baseline_seconds = {(result['case'], result['scale']): result['seconds'] for result in baseline['results']}
+    print("Against {} (commit {}):".format(baseline_file, baseline.get('commit')))
+    for result in results['results']:
+        seconds = baseline_seconds.get((result['case'], result['scale']))
+        if seconds is None:
+            continue
+        print("{:<28} {:>8} {:10.3f} s -> {:10.3f} s {:8.2f}x".format(result['case'], result['scale'], seconds, result['seconds'], seconds / result['seconds']))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parse and analysis pipeline on synthetic logs and store the results")
+    parser.add_argument('--scales', nargs='+', default=['1MB'], help="Total sizes of the logs, e.g. 1MB 100MB 1GB")
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=CASES, help="Benchmark cases")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetitions, the best time is stored")
+    parser.add_argument('--samples', type=int, default=800, help="Spreader tracking samples per cycle")
+    parser.add_argument('--tracking-rate', type=float, default=100.0, help="Spreader tracking samples per second")
+    parser.add_argument('--pick-ratio', type=float, default=0.5, help="Share of Pick cycles, the others are Place")
+    parser.add_argument('--noise-lines', type=int, default=1, help="Unrelated lines after every tracking block")
+    parser.add_argument('--cycles-per-file', type=int, default=1, help="Measurement cycles per log file")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed of the logs")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes of the batch case")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help="Directory of the generated logs (default: {})".format(DEFAULT_DATA_DIR))
+    parser.add_argument('--output', help="Results file (default: results/bench_suite_<time>.json next to this script)")
+    parser.add_argument('--baseline', help="Earlier results file to compare with")
+    args = parser.parse_args()
+
+    options = {'samples': args.samples, 'tracking_rate': args.tracking_rate, 'pick_ratio': args.pick_ratio, 'noise_lines': args.noise_lines,
+               'cycles_per_file': args.cycles_per_file, 'seed': args.seed, 'workers': args.workers}
+    started = datetime.now()
+    results = {
+        'started': started.isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'options': options,
+        'repeat': args.repeat,
+        'results': []
+    }
+    analysis = load_analysis_script()
+
+    for scale in args.scales:
+        log_files, counts = synthetic_data_set(args.data_dir, parse_size(scale), options)
+        print("{}: {} logs, {} cycles, {} lines, {:.1f} MB".format(scale, counts['files'], counts['cycles'], counts['lines'], counts['bytes'] / 1e6))
+        for case in args.cases:
+            run, item_name = CASE_RUNS[case]
+            best = None
+            for _ in range(args.repeat):
+                seconds, items = run(log_files, analysis, options)
+                best = seconds if best is None else min(best, seconds)
+            results['results'].append(dict(counts, case=case, scale=scale, seconds=best, items=items, item_name=item_name))
+            print("{:<28} {:10.3f} s {:10.1f} MB/s {:12.0f} {}/s".format(case, best, counts['bytes'] / 1e6 / best, items / best, item_name))
+
+    output_file = args.output or os.path.join(DEFAULT_RESULTS_DIR, 'bench_suite_{}.json'.format(started.strftime('%Y%m%d_%H%M%S')))
+    if os.path.dirname(output_file):
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    with open(output_file, 'w') as file:
+        json.dump(results, file, indent=2)
+    print("Results saved to {}".format(output_file))
+
+    if args.baseline:
+        compare_results(results, args.baseline)
+
+if __name__ == '__main__':
+    main()
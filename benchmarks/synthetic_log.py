@@ -0,0 +1,175 @@
+import argparse
+import math
+import random
+import re
+from datetime import datetime, timedelta
+
+# Synthetic MeasureResult log lines in the format the SprTrc_parser patterns expect
+# generate_measurement_lines writes one measurement cycle, iter_synthetic_cycles a sequence of
+# them with a Pick/Place mix, and write_synthetic_cycles_log a log of a number of cycles or a size.
+# The same seed and options always give the same log.
+# Usage: python benchmarks/synthetic_log.py MeasureResult_synthetic.csv [--cycles 10 | --size 100MB]
+
+START_TIME = datetime(2024, 3, 12, 10, 15, 30)
+SAMPLE_INTERVAL = timedelta(milliseconds=10) # Spreader tracking at 100 Hz
+CYCLE_GAP = timedelta(seconds=30) # Idle time between the measurement cycles
+
+# Unrelated output between the tracking blocks, none of it matches a parser field
+NOISE_TEXTS = [
+    " - Laser scanner {} frame received",
+    " - PLC status word: 0x{:04X}",
+    " - Heartbeat {}",
+    " - Spreader Tracking state: {} active",
+]
+IDLE_TEXT = " - Waiting for ASCCS request, idle {} s"
+
+def format_log_line(timestamp, text, line_nr=0):
+    # 'dd.mm.yyyy hh:mm:ss;ms;n; ; ;S; - text'
+    return "{};{:03d};{}; ; ;S;{}\n".format(timestamp.strftime('%d.%m.%Y %H:%M:%S'), timestamp.microsecond // 1000, line_nr, text)
+
+# Size in bytes of a size text like '1MB', '100MB' or '1GB', or a plain number of bytes
+def parse_size(size_text):
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?)B?\s*', size_text.upper())
+    if match is None:
+        raise ValueError("Invalid size: {}".format(size_text))
+    return int(float(match.group(1)) * {'': 1, 'K': 10**3, 'M': 10**6, 'G': 10**9}[match.group(2)])
+
+# Lines of one measurement cycle: the start message, the TLMS measurement values and
+# tracking_samples spreader tracking blocks every sample_interval
+# noise_lines: unrelated lines after every tracking block
+def generate_measurement_lines(start_time, tracking_samples=2000, task='2 -  Place', seed=0, sample_interval=SAMPLE_INTERVAL, noise_lines=1):
+    rng = random.Random(seed)
+    timestamp = start_time
+    lines = []
+    container_height = 2896
+    point_center_z = rng.randint(1200, 1600)
+
+    # Job values arrive in the same timestamp window as the start message
+    lines.append(format_log_line(timestamp, " - ASCCS Start Measurement Message received"))
+    for text in [
+        " - Measurement ID: {}".format(rng.randint(100000, 999999)),
+        " - Lane: {}".format(rng.randint(1, 12)),
+        " - Task: {}".format(task),
+        " - Pos: 3 -  Middle",
+        " - Len: 40ft",
+        " - Type: 1 -  Standard",
+        " - Cont. Length: 12192",
+        " - Cont. Width: 2438",
+        " - Cont. Height: {}".format(container_height),
+        " - LaneStat - Occupied",
+    ]:
+        lines.append(format_log_line(timestamp, text))
+    timestamp += timedelta(milliseconds=400)
+    for text in [
+        " -  | MeasStat - Done",
+        " - Assuming TRAILER_40",
+        " - Point Center X/Y/Z: {} / {} / {}".format(rng.randint(20000, 30000), rng.randint(1000, 3000), point_center_z),
+        " - Skew: {}".format(rng.randint(-20, 20)),
+        " - Tilt {}".format(rng.randint(-5, 5)),
+        " -- Number of detected twist locks (TL): 4",
+        " - Measurement finished",
+    ]:
+        lines.append(format_log_line(timestamp, text))
+
+    # Spreader descends from 12 m to the settling height, settles there and lands, sampled every sample_interval
+    if task.endswith('Place'):
+        settling_height = point_center_z + container_height + 360
+        landing_height = point_center_z + container_height
+    else:
+        settling_height = point_center_z + 370
+        landing_height = point_center_z
+    descent_samples = tracking_samples * 2 // 3
+    settling_samples = tracking_samples // 6
+    z = 12000.0
+    for sample in range(tracking_samples):
+        timestamp += sample_interval
+        if sample < descent_samples:
+            z += (settling_height - z) * 6.0 / descent_samples
+        elif sample < descent_samples + settling_samples:
+            z = settling_height + rng.randint(-5, 5)
+        else:
+            z = max(z - rng.randint(5, 25), landing_height)
+        sway = 40 * math.sin(sample * 0.05)
+        # Every line of a block has the same timestamp, its prefix is formatted once
+        prefix = format_log_line(timestamp, "")[:-1]
+        for text in [
+            " - Spreader Tracking Message received",
+            " - Spreader length: 40",
+            " - Spreader position X: {}".format(25000 + rng.randint(-30, 30)),
+            " - Spreader position Y: {}".format(2000 + int(sway) + rng.randint(-5, 5)),
+            " - Spreader position Z: {}".format(int(z)),
+            " - Spreader position Angle: {}".format(rng.randint(-10, 10)),
+            " - TLMS Status: 1",
+            " - Spreader calc. position X: {}".format(rng.randint(-50, 50)),
+            " - Spreader calc. position Y: {}".format(int(sway) + rng.randint(-5, 5)),
+            " - Spreader calc. Skew: {}".format(int(sway / 8) + rng.randint(-2, 2)),
+            " - Calc. reliability: {}".format(rng.randint(0, 100)),
+            " - Error/Event code: 5",
+            " - Error/Event description: Tracking valid",
+        ]:
+            lines.append(prefix + text + "\n")
+        # Unrelated diagnostic output between the tracking blocks
+        if noise_lines > 0:
+            lines.append(prefix + " - Diagnostics: scan {} processed\n".format(sample))
+        for noise_line in range(1, noise_lines):
+            lines.append(prefix + NOISE_TEXTS[(sample + noise_line) % len(NOISE_TEXTS)].format(sample) + "\n")
+    return lines
+
+def write_synthetic_log(path, tracking_samples=2000, task='2 -  Place', seed=0):
+    lines = generate_measurement_lines(START_TIME, tracking_samples, task, seed)
+    with open(path, 'w') as file:
+        file.writelines(lines)
+    return len(lines)
+
+# Lines of the measurement cycles of one log, a list of lines per cycle, endless when cycles is None
+# tracking_rate: spreader tracking samples per second
+# pick_ratio: share of Pick cycles, the others are Place
+# noise_lines: unrelated lines after every tracking block, and every idle second between the cycles
+def iter_synthetic_cycles(cycles=None, tracking_samples=2000, tracking_rate=100.0, pick_ratio=0.5, noise_lines=1, seed=0, start_time=START_TIME):
+    rng = random.Random(seed)
+    sample_interval = timedelta(microseconds=round(1e6 / tracking_rate))
+    cycle = 0
+    while cycles is None or cycle < cycles:
+        task = '1 -  Pick' if rng.random() < pick_ratio else '2 -  Place'
+        lines = generate_measurement_lines(start_time, tracking_samples, task, rng.randrange(2**32), sample_interval, noise_lines)
+        # Idle output until the next measurement
+        idle_start = start_time + timedelta(milliseconds=400) + tracking_samples * sample_interval
+        if noise_lines > 0:
+            for idle_second in range(1, int(CYCLE_GAP.total_seconds())):
+                lines.append(format_log_line(idle_start + timedelta(seconds=idle_second), IDLE_TEXT.format(idle_second)))
+        yield lines
+        start_time = idle_start + CYCLE_GAP
+        cycle += 1
+
+# Write a log of a number of cycles, or of whole cycles until it has at least size bytes
+# Returns the counts of cycles, lines and bytes
+def write_synthetic_cycles_log(path, cycles=1, size=None, tracking_samples=2000, tracking_rate=100.0, pick_ratio=0.5, noise_lines=1, seed=0):
+    counts = {'cycles': 0, 'lines': 0, 'bytes': 0}
+    with open(path, 'w', newline='\n') as file:
+        for lines in iter_synthetic_cycles(None if size is not None else cycles, tracking_samples, tracking_rate, pick_ratio, noise_lines, seed):
+            text = "".join(lines)
+            file.write(text)
+            counts['cycles'] += 1
+            counts['lines'] += len(lines)
+            counts['bytes'] += len(text)
+            if size is not None and counts['bytes'] >= size:
+                break
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic MeasureResult log")
+    parser.add_argument('log_file', help="Output log file")
+    parser.add_argument('--cycles', type=int, default=1, help="Measurement cycles in the log")
+    parser.add_argument('--size', type=parse_size, help="Write whole cycles up to at least this size instead, e.g. 100MB")
+    parser.add_argument('--samples', type=int, default=2000, help="Spreader tracking samples per cycle")
+    parser.add_argument('--tracking-rate', type=float, default=100.0, help="Spreader tracking samples per second")
+    parser.add_argument('--pick-ratio', type=float, default=0.5, help="Share of Pick cycles, the others are Place")
+    parser.add_argument('--noise-lines', type=int, default=1, help="Unrelated lines after every tracking block")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    counts = write_synthetic_cycles_log(args.log_file, args.cycles, args.size, args.samples, args.tracking_rate, args.pick_ratio, args.noise_lines, args.seed)
+    print("{}: {} cycles, {} lines, {:.1f} MB".format(args.log_file, counts['cycles'], counts['lines'], counts['bytes'] / 1e6))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules are flat scripts in the repository root, synthetic_log is in benchmarks/
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, 'benchmarks'))
@@ -0,0 +1,87 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+import SprTrc_parser as stp
+
+# The fixed-layout timestamp decoders give the same result as datetime.strptime and reject the same inputs.
+# They decode the timestamp group of LOG_LINE_PREFIX_PATTERN, which has checked the separators
+
+DECODERS = [
+    stp.parse_timestamp,
+    lambda timestamp: stp.timestamp_from_us(stp.parse_timestamp_us(timestamp)),
+    lambda timestamp: stp.timestamp_from_us(stp.parse_timestamp_us(timestamp.encode('ascii'))),
+    lambda timestamp: stp.decode_timestamps_us([timestamp]).view('datetime64[us]').astype(datetime)[0],
+]
+
+# Consecutive log timestamps with 1-6 fraction digits, crossing the leap day of 2024
+def generate_timestamps(count, seed=0):
+    rng = random.Random(seed)
+    timestamp = datetime(2024, 2, 28, 23, 0, 0)
+    timestamps = []
+    for _ in range(count):
+        timestamp += timedelta(milliseconds=rng.randint(0, 200000))
+        fraction = str(timestamp.microsecond).zfill(6)[:rng.randint(1, 6)]
+        timestamps.append(timestamp.strftime('%d.%m.%Y %H:%M:%S;') + fraction)
+    return timestamps
+
+def test_same_as_strptime():
+    timestamps = generate_timestamps(2000)
+    expected = [datetime.strptime(timestamp, stp.TIMESTAMP_FORMAT) for timestamp in timestamps]
+    for decode in DECODERS[:3]:
+        assert [decode(timestamp) for timestamp in timestamps] == expected
+    assert list(stp.decode_timestamps_us(timestamps).view('datetime64[us]').astype(datetime)) == expected
+
+@pytest.mark.parametrize('decode', DECODERS)
+@pytest.mark.parametrize('timestamp', ['29.02.2024 12:00:00;1', '29.02.2000 00:00:00;0', '31.12.2023 23:59:59;999999'])
+def test_leap_years(decode, timestamp):
+    assert decode(timestamp) == datetime.strptime(timestamp, stp.TIMESTAMP_FORMAT)
+
+@pytest.mark.parametrize('decode', DECODERS)
+@pytest.mark.parametrize('timestamp', ['29.02.2023 12:00:00;1', '29.02.1900 12:00:00;1', '31.04.2024 12:00:00;1'])
+def test_invalid_dates(decode, timestamp):
+    with pytest.raises(ValueError):
+        decode(timestamp)
+
+# '%f' pads the fraction digits on the right: ';5' is 500 ms
+@pytest.mark.parametrize('decode', DECODERS)
+@pytest.mark.parametrize('fraction, microsecond', [('5', 500000), ('05', 50000), ('005', 5000), ('123456', 123456)])
+def test_missing_fraction_digits(decode, fraction, microsecond):
+    assert decode('12.03.2024 10:15:30;' + fraction) == datetime(2024, 3, 12, 10, 15, 30, microsecond)
+
+@pytest.mark.parametrize('decode', DECODERS)
+@pytest.mark.parametrize('timestamp', ['12.03.2024 10:15:30;', '12.03.2024 10:15:30;1234567', '12.13.2024 10:15:30;1',
+                                       '12.03.2024 24:15:30;1', '12.03.2024 10:60:30;1', '12.03.2024 10:15:60;1'])
+def test_malformed_timestamps(decode, timestamp):
+    with pytest.raises(ValueError):
+        decode(timestamp)
+
+def test_crlf_lines():
+    lines = [
+        "12.03.2024 10:15:30;000;0; ; ;S; - ASCCS Start Measurement Message received\n",
+        "12.03.2024 10:15:30;000;0; ; ;S; - Lane: 3\n",
+        "12.03.2024 10:15:30;400;0; ; ;S; -  | MeasStat - Done\n",
+        "12.03.2024 10:15:30;400;0; ; ;S; - Measurement finished\n",
+        "12.03.2024 10:15:30;410;0; ; ;S; - Spreader position Z: 4321\n",
+    ]
+    rows = parse_lines(lines)
+    assert parse_lines([line.replace('\n', '\r\n') for line in lines]) == rows
+    assert [row['Timestamp'] for row in rows] == [datetime(2024, 3, 12, 10, 15, 30), datetime(2024, 3, 12, 10, 15, 30, 400000), datetime(2024, 3, 12, 10, 15, 30, 410000)]
+    assert rows[2]['SpTrMsg_position_Z'] == 4321
+
+# A line with a malformed prefix is not a log line: its value is not stored
+def test_malformed_prefix_line():
+    lines = [
+        "12.03.2024 10:15:30;000;0; ; ;S; - ASCCS Start Measurement Message received\n",
+        "12.03.2024 10:15;000;0; ; ;S; - Lane: 3\n",
+        "12.03.2024 10:15:30;000;0; ; S; - Lane: 4\n",
+        "12.03.2024 10:15:30;000;0; ; ;S; - Lane: 5\n",
+    ]
+    rows = parse_lines(lines)
+    assert [row['Lane'] for row in rows] == [5]
+
+def parse_lines(lines):
+    parser = stp.MeasureResultParser()
+    rows = [row for row in map(parser.feed, lines) if row is not None]
+    return rows + parser.close()
@@ -0,0 +1,81 @@
+import re
+from datetime import datetime
+
+import pytest
+
+import SprTrc_parser as stp
+import SprTrc_columnar
+from synthetic_log import START_TIME, format_log_line, iter_synthetic_cycles, parse_size, write_synthetic_cycles_log
+
+# Synthetic logs of benchmarks/synthetic_log.py parse back to the cycles and values they were generated with
+
+SAMPLES = 40
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / 'MeasureResult_synthetic.csv'
+    counts = write_synthetic_cycles_log(path, cycles=3, tracking_samples=SAMPLES, noise_lines=2, seed=7)
+    return path, counts
+
+def test_counts(log_file):
+    path, counts = log_file
+    assert counts['cycles'] == 3
+    assert counts['bytes'] == path.stat().st_size
+    assert counts['lines'] == path.read_bytes().count(b'\n')
+
+def test_parse_round_trip(log_file):
+    path, _ = log_file
+    rows = stp.parse_log_file(path)
+    cycles = list(iter_synthetic_cycles(3, SAMPLES, noise_lines=2, seed=7))
+    # A row of the job values, one of the TLMS results and one per tracking sample
+    assert len(rows) == 3 * (SAMPLES + 2)
+    for cycle_id, lines in enumerate(cycles):
+        cycle_rows = [row for row in rows if row['Cycle_ID'] == cycle_id]
+        assert len(cycle_rows) == SAMPLES + 2
+        assert cycle_rows[0]['Timestamp'] == stp.parse_timestamp(stp.LOG_LINE_PREFIX_PATTERN.match(lines[0]).group(1))
+        assert cycle_rows[0]['Lane'] == int(field_value(lines, 'Lane'))
+        assert cycle_rows[0]['Task'] == field_value(lines, 'Task')
+        assert cycle_rows[1]['Measurement_Status'] == 'Done'
+        assert [row['SpTrMsg_position_Z'] for row in cycle_rows[2:]] == [int(value) for value in field_values(lines, 'Spreader position Z')]
+
+def test_same_rows_by_every_parser(log_file):
+    path, _ = log_file
+    rows = stp.parse_log_file(path)
+    assert list(stp.iter_measurement_records(path)) == rows
+    df_log_data = SprTrc_columnar.parse_log_file_columnar(path)
+    df_rows = df_log_data.astype(object).where(df_log_data.notna(), None)
+    assert df_rows.to_dict('records') == [{column: row[column] for column in df_log_data.columns} for row in rows]
+
+def test_crlf_round_trip(log_file, tmp_path):
+    path, _ = log_file
+    crlf_path = tmp_path / 'MeasureResult_crlf.csv'
+    crlf_path.write_bytes(path.read_bytes().replace(b'\n', b'\r\n'))
+    assert stp.parse_log_file(crlf_path) == stp.parse_log_file(path)
+
+def test_same_seed_same_log(tmp_path):
+    logs = []
+    for name, seed in [('a.csv', 1), ('b.csv', 1), ('c.csv', 2)]:
+        write_synthetic_cycles_log(tmp_path / name, cycles=2, tracking_samples=SAMPLES, seed=seed)
+        logs.append((tmp_path / name).read_bytes())
+    assert logs[0] == logs[1]
+    assert logs[0] != logs[2]
+
+def test_size_writes_whole_cycles(tmp_path):
+    size = parse_size('20KB')
+    counts = write_synthetic_cycles_log(tmp_path / 'sized.csv', size=size, tracking_samples=SAMPLES)
+    assert counts['bytes'] >= size
+    assert len({row['Cycle_ID'] for row in stp.parse_log_file(tmp_path / 'sized.csv')}) == counts['cycles']
+
+def test_format_log_line():
+    timestamp = datetime(2024, 2, 29, 23, 59, 59, 987000)
+    line = format_log_line(timestamp, " - Lane: 4")
+    prefix_match = stp.LOG_LINE_PREFIX_PATTERN.match(line)
+    assert stp.parse_timestamp(prefix_match.group(1)) == timestamp
+    assert line[prefix_match.end():] == " - Lane: 4\n"
+    assert format_log_line(START_TIME, "").startswith("12.03.2024 10:15:30;000;0;")
+
+def field_values(lines, name):
+    return [match.group(1) for match in (re.search(r' - {}: (.*)$'.format(re.escape(name)), line) for line in lines) if match]
+
+def field_value(lines, name):
+    return field_values(lines, name)[0]